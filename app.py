@@ -1,6 +1,7 @@
 import streamlit as st
 import os
 import sys
+import time
 
 # Try to import Flask-dependent modules, but continue if they fail
 try:
@@ -9,6 +10,9 @@ try:
     from app.frontend.job_seeker import job_seeker_dashboard
     from app.frontend.job_giver import job_giver_dashboard
     from app.database.connection import init_db
+    from app.database.instrumentation import query_scope
+    from app.database.unit_of_work import keep_reads_on_primary, session_scope
+    from app.database.connection import REPLICA_MAX_LAG
     from app.frontend.auth import handle_auth_flow
 except ImportError as e:
     st.error(f"Error importing modules: {e}")
@@ -25,7 +29,8 @@ except ImportError as e:
 
 print("APP.PY: Script started. Imports loaded.")
 
-# Initialize the database
+# Initialize the database (migrations run once per process; reruns reuse the result
+# and retry after a failure)
 print("APP.PY: Calling init_db()...")
 db_connected = init_db()
 print(f"APP.PY: init_db() returned: {db_connected}")
@@ -38,6 +43,10 @@ if "db_connected" not in st.session_state:
 elif not hasattr(st.session_state, 'db_connected'): # Defensive check
     st.session_state.db_connected = db_connected
     print(f"APP.PY: Set st.session_state.db_connected to {db_connected} (attr missing)")
+elif st.session_state.db_connected != db_connected:
+    # init_db() retries after a failed start, so the database may have come back
+    st.session_state.db_connected = db_connected
+    print(f"APP.PY: Updated st.session_state.db_connected to {db_connected}")
 else:
     print(f"APP.PY: st.session_state.db_connected already exists: {st.session_state.db_connected}")
 
@@ -51,6 +60,21 @@ st.set_page_config(
 )
 print("APP.PY: st.set_page_config() completed.")
 
+def _pin_reads_to_primary():
+    # This rerun's remaining reads, and the next reruns' until replicas catch up
+    keep_reads_on_primary()
+    st.session_state.db_read_primary_until = time.time() + REPLICA_MAX_LAG
+
+def page_session_scope():
+    """Replica settings for a dashboard rerun.
+
+    Each write action commits as its own unit of work. After this session
+    writes, its reads stay on the primary for as long as a replica may lag,
+    so it never sees an older state than it wrote.
+    """
+    pinned = st.session_state.get("db_read_primary_until", 0) > time.time()
+    return session_scope(read_from_primary=pinned, on_write=_pin_reads_to_primary)
+
 # Function to get the correct path for static files
 def get_image_path(image_name):
     base_path = os.path.dirname(os.path.abspath(__file__))
@@ -211,12 +235,15 @@ else:
     # Route to appropriate dashboard based on user type
     if st.session_state.user_type == "admin":
         print("APP.PY: Routing to admin_dashboard().")
-        admin_dashboard()
+        with query_scope("admin_dashboard"), page_session_scope():
+            admin_dashboard()
     elif st.session_state.user_type == "job_seeker":
         print("APP.PY: Routing to job_seeker_dashboard().")
-        job_seeker_dashboard()
+        with query_scope("job_seeker_dashboard"), page_session_scope():
+            job_seeker_dashboard()
     elif st.session_state.user_type == "job_giver":
         print("APP.PY: Routing to job_giver_dashboard().")
-        job_giver_dashboard()
+        with query_scope("job_giver_dashboard"), page_session_scope():
+            job_giver_dashboard()
 
 print("APP.PY: Script execution reached end of file.")
\ No newline at end of file
@@ -0,0 +1,150 @@
+import asyncio
+import atexit
+import os
+import threading
+
+from dotenv import load_dotenv
+
+# psycopg 3 is optional; without it only the synchronous psycopg2 path is available
+try:
+    import psycopg
+    from psycopg_pool import AsyncConnectionPool
+except ImportError:
+    psycopg = None
+    AsyncConnectionPool = None
+
+load_dotenv()
+
+ASYNC_AVAILABLE = psycopg is not None
+
+_QUERY_ERRORS = (psycopg.Error, RuntimeError) if ASYNC_AVAILABLE else (RuntimeError,)
+
+
+def _env_int(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        print(f"Invalid value for {name}, using default {default}")
+        return default
+
+
+def async_enabled():
+    """True if DB_ASYNC_READS is on and psycopg 3 is installed"""
+    if os.environ.get("DB_ASYNC_READS", "false").lower() not in ("1", "true", "yes"):
+        return False
+    if not ASYNC_AVAILABLE:
+        print("DB_ASYNC_READS is set but psycopg/psycopg_pool are not installed; using sync reads")
+        return False
+    return True
+
+
+# The async pool lives on one long-running event loop in a background thread,
+# so synchronous callers (Streamlit reruns, Flask views) can share it.
+_loop = None
+_loop_lock = threading.Lock()
+_pool = None
+
+
+def _get_loop():
+    global _loop
+    if _loop is not None:
+        return _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="db-async-loop", daemon=True)
+            thread.start()
+            atexit.register(_shutdown)
+            _loop = loop
+    return _loop
+
+
+async def get_async_pool():
+    """Return the process-wide async connection pool, opening it on first use.
+
+    The pool is bound to the event loop it was opened on; synchronous code
+    should go through run_sync()/gather_sync(), which use the shared loop.
+    """
+    global _pool
+    if _pool is not None:
+        return _pool
+    if not ASYNC_AVAILABLE:
+        raise RuntimeError("psycopg 3 and psycopg_pool are required for async database access")
+
+    database_url = os.environ.get("DATABASE_URL")
+    if not database_url:
+        raise RuntimeError("DATABASE_URL environment variable not set")
+
+    pool = AsyncConnectionPool(
+        database_url,
+        min_size=_env_int("DB_ASYNC_POOL_MIN_SIZE", 1),
+        max_size=_env_int("DB_ASYNC_POOL_MAX_SIZE", 10),
+        max_idle=_env_int("DB_POOL_MAX_IDLE", 300),
+        max_lifetime=_env_int("DB_POOL_MAX_LIFETIME", 1800),
+        timeout=_env_int("DB_POOL_TIMEOUT", 10),
+        kwargs={"connect_timeout": _env_int("DB_CONNECT_TIMEOUT", 10)},
+        open=False,
+    )
+    await pool.open()
+    if _pool is None:
+        _pool = pool
+        print(f"Async connection pool ready (max {pool.max_size} connections)")
+    else:
+        await pool.close()
+    return _pool
+
+
+async def fetchone(query, params=None):
+    """Run a read-only statement and return the first row, or None on error"""
+    try:
+        pool = await get_async_pool()
+        async with pool.connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query, params)
+                return await cursor.fetchone()
+    except _QUERY_ERRORS as e:
+        print(f"Async query error: {e}")
+        return None
+
+
+async def fetchall(query, params=None):
+    """Run a read-only statement and return all rows, or [] on error"""
+    try:
+        pool = await get_async_pool()
+        async with pool.connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query, params)
+                return await cursor.fetchall()
+    except _QUERY_ERRORS as e:
+        print(f"Async query error: {e}")
+        return []
+
+
+def submit(coro):
+    """Start a coroutine on the shared database loop; returns a
+    concurrent.futures.Future for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop())
+
+
+def run_sync(coro, timeout=None):
+    """Run a coroutine on the shared database loop and wait for its result"""
+    return submit(coro).result(timeout)
+
+
+def gather_sync(*coros, timeout=None):
+    """Run several coroutines concurrently from synchronous code; results in order"""
+    async def _gather():
+        return await asyncio.gather(*coros)
+    return run_sync(_gather(), timeout)
+
+
+def _shutdown():
+    loop = _loop
+    if loop is None:
+        return
+    if _pool is not None:
+        try:
+            asyncio.run_coroutine_threadsafe(_pool.close(), loop).result(5)
+        except Exception as e:
+            print(f"Error closing async connection pool: {e}")
+    loop.call_soon_threadsafe(loop.stop)
@@ -0,0 +1,209 @@
+"""Data backfills for columns derived from existing data.
+
+Each backfill walks its table in id order, one batch per statement, so it
+can run on a live database and be re-run at any time; rows that are already
+filled in are skipped. Migrations call them on upgrade, and they can be run
+by hand to catch rows written by processes that predate the change:
+
+    python -m app.database.backfills
+"""
+import psycopg2
+from psycopg2.extras import execute_values
+
+from app.utils.bitmap import RoaringBitmap
+from app.utils.gazetteer import location_id
+from app.utils.salary import parse_salary
+
+
+def backfill_job_salaries(cursor, batch_size=1000):
+    """Parse jobs.salary_range into the numeric salary columns (migration 9).
+
+    Meant for an autocommit connection so each batch commits on its own.
+    Returns the number of rows updated; ranges with no amount in them stay
+    NULL.
+    """
+    last_id = 0
+    updated = 0
+    while True:
+        cursor.execute(
+            """
+            SELECT id, salary_range FROM jobs
+            WHERE id > %s AND salary_range IS NOT NULL AND salary_period IS NULL
+            ORDER BY id
+            LIMIT %s
+            """,
+            (last_id, batch_size)
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        values = []
+        for job_id, salary_range in rows:
+            salary = parse_salary(salary_range)
+            if salary is not None:
+                values.append((job_id, salary.min_amount, salary.max_amount,
+                               salary.currency, salary.period))
+        if values:
+            execute_values(
+                cursor,
+                """
+                UPDATE jobs
+                SET salary_min = v.salary_min, salary_max = v.salary_max,
+                    salary_currency = v.salary_currency, salary_period = v.salary_period
+                FROM (VALUES %s) AS v(id, salary_min, salary_max, salary_currency, salary_period)
+                WHERE jobs.id = v.id
+                """,
+                values,
+                template="(%s, %s::integer, %s::integer, %s, %s)"
+            )
+            updated += len(values)
+    print(f"Backfilled salaries for {updated} jobs")
+    return updated
+
+
+def backfill_seen_sets(cursor, batch_size=1000):
+    """Build the swipe_seen_sets bitmaps from existing right swipes (migration 13).
+
+    Walks users in id order; sets that already exist (written by live
+    swipes) are left alone. Returns the number of sets created.
+    """
+    last_user_id = 0
+    created = 0
+    while True:
+        cursor.execute("SELECT id FROM users WHERE id > %s ORDER BY id LIMIT %s",
+                       (last_user_id, batch_size))
+        user_ids = [row[0] for row in cursor.fetchall()]
+        if not user_ids:
+            break
+        last_user_id = user_ids[-1]
+
+        # Every user's set across all targets, plus job givers' per-job sets
+        cursor.execute(
+            """
+            SELECT user_id, target_type, 0, array_agg(DISTINCT target_id)
+            FROM swipes
+            WHERE user_id = ANY(%s) AND direction = 'right'
+            GROUP BY user_id, target_type
+            UNION ALL
+            SELECT user_id, target_type, job_id, array_agg(DISTINCT target_id)
+            FROM swipes
+            WHERE user_id = ANY(%s) AND direction = 'right'
+            AND target_type = 'job_seeker' AND job_id IS NOT NULL
+            GROUP BY user_id, target_type, job_id
+            """,
+            (user_ids, user_ids)
+        )
+        values = [(user_id, target_type, job_id, RoaringBitmap(target_ids).to_bytes())
+                  for user_id, target_type, job_id, target_ids in cursor.fetchall()]
+        if values:
+            execute_values(
+                cursor,
+                """
+                INSERT INTO swipe_seen_sets (user_id, target_type, job_id, bitmap)
+                VALUES %s
+                ON CONFLICT (user_id, target_type, job_id) DO NOTHING
+                """,
+                values,
+                page_size=len(values)  # one statement, so rowcount covers the batch
+            )
+            created += cursor.rowcount
+    print(f"Backfilled {created} seen sets")
+    return created
+
+
+def backfill_locations(cursor, batch_size=1000):
+    """Resolve free-text locations to gazetteer ids (migration 17) for jobs,
+    job seekers and job givers.
+
+    Meant for an autocommit connection so each batch commits on its own.
+    Locations the gazetteer does not know stay NULL; re-running after the
+    gazetteer gains aliases picks them up. Returns the number of rows updated.
+    """
+    updated = 0
+    for table in ("jobs", "job_seekers", "job_givers"):
+        last_id = 0
+        while True:
+            cursor.execute(
+                f"""
+                SELECT id, location FROM {table}
+                WHERE id > %s AND location IS NOT NULL AND location_id IS NULL
+                ORDER BY id
+                LIMIT %s
+                """,
+                (last_id, batch_size)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            values = [(row_id, place_id) for row_id, place_id in
+                      ((row_id, location_id(location)) for row_id, location in rows)
+                      if place_id is not None]
+            if values:
+                execute_values(
+                    cursor,
+                    f"""
+                    UPDATE {table} SET location_id = v.location_id
+                    FROM (VALUES %s) AS v(id, location_id)
+                    WHERE {table}.id = v.id
+                    """,
+                    values,
+                    page_size=len(values)
+                )
+                updated += len(values)
+    print(f"Backfilled location ids for {updated} rows")
+    return updated
+
+
+def backfill_pending_interest(cursor):
+    """Recount jobs.pending_interest_count (migration 15): seekers who swiped
+    right on a job and have no match for it yet. record_swipe() (migration
+    24) and the matches delete trigger (migration 20) keep the count by the
+    same rule, which tests/test_pending_interest.py checks; safe to re-run
+    to correct drift."""
+    cursor.execute("""
+        UPDATE jobs j
+        SET pending_interest_count = coalesce(pending.seekers, 0)
+        FROM jobs target
+        LEFT JOIN (
+            SELECT s.target_id AS job_id, count(DISTINCT js.id) AS seekers
+            FROM swipes s
+            JOIN job_seekers js ON js.user_id = s.user_id
+            WHERE s.target_type = 'job' AND s.direction = 'right'
+            AND NOT EXISTS (
+                SELECT 1 FROM matches m
+                WHERE m.job_id = s.target_id AND m.job_seeker_id = js.id
+            )
+            GROUP BY s.target_id
+        ) pending ON pending.job_id = target.id
+        WHERE j.id = target.id
+        AND j.pending_interest_count IS DISTINCT FROM coalesce(pending.seekers, 0)
+    """)
+    print(f"Recounted pending interest for {cursor.rowcount} jobs")
+    return cursor.rowcount
+
+
+if __name__ == "__main__":
+    from app.database.connection import checkout_connection, release_connection
+
+    conn = checkout_connection()
+    if conn is None:
+        raise SystemExit("Could not connect to the database")
+    try:
+        conn.autocommit = True
+        cursor = conn.cursor()
+        try:
+            backfill_job_salaries(cursor)
+            backfill_seen_sets(cursor)
+            backfill_pending_interest(cursor)
+            backfill_locations(cursor)
+        except psycopg2.Error as e:
+            raise SystemExit(f"Backfill failed: {e}")
+        finally:
+            cursor.close()
+    finally:
+        conn.autocommit = False
+        release_connection(conn)
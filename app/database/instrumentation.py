@@ -0,0 +1,295 @@
+import contextvars
+import hashlib
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from psycopg2 import extensions
+
+from app.database.prepared import statement_for
+
+# Statements slower than this are printed to the slow-query log
+SLOW_QUERY_MS = float(os.environ.get("DB_SLOW_QUERY_MS", 200))
+
+# Maximum number of statements a single rerun of a page is expected to issue.
+# Override per page with DB_QUERY_BUDGET_<PAGE>, e.g. DB_QUERY_BUDGET_ADMIN_DASHBOARD=40
+DEFAULT_QUERY_BUDGETS = {
+    "job_seeker_dashboard": 12,
+    "job_giver_dashboard": 15,
+    "admin_dashboard": 30,
+}
+
+# Print a per-page summary at the end of every rerun, not just reruns over budget
+PRINT_PAGE_SUMMARY = os.environ.get("DB_QUERY_SUMMARY", "false").lower() in ("1", "true", "yes")
+
+_DATABASE_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+_PROJECT_ROOT = os.path.abspath(os.path.join(_DATABASE_PACKAGE_DIR, "..", ".."))
+
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_RE = re.compile(r"%\(\w+\)s|%s|\$\d+")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+_EXECUTE_RE = re.compile(r"(?:.*;\s*)?EXECUTE\s+(ps_\w+)", re.S)
+_SAVEPOINT_PREFIX_RE = re.compile(r"^\s*(?:(?:RELEASE\s+)?SAVEPOINT\s+\w+\s*;\s*)+", re.I)
+
+
+def normalize_statement(statement):
+    """Reduce a SQL statement to its shape: literals and placeholders become ?"""
+    # Savepoints queued by the unit of work ride along with the next statement
+    text = _SAVEPOINT_PREFIX_RE.sub("", statement)
+    text = _COMMENT_RE.sub(" ", text)
+    text = _STRING_RE.sub("?", text)
+    text = _PLACEHOLDER_RE.sub("?", text)
+    text = _NUMBER_RE.sub("?", text)
+    text = _IN_LIST_RE.sub("(...)", text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def _hash(normalized):
+    return hashlib.md5(normalized.encode("utf-8")).hexdigest()[:10]
+
+
+def fingerprint(statement):
+    """Short stable identifier for the shape of a statement"""
+    return _hash(normalize_statement(statement))
+
+
+def budget_for(page):
+    env_value = os.environ.get(f"DB_QUERY_BUDGET_{page.upper()}")
+    if env_value:
+        try:
+            return int(env_value)
+        except ValueError:
+            pass
+    return DEFAULT_QUERY_BUDGETS.get(page)
+
+
+class QueryRecord:
+    __slots__ = ("fingerprint", "statement", "duration_ms", "rows", "caller")
+
+    def __init__(self, fingerprint, statement, duration_ms, rows, caller):
+        self.fingerprint = fingerprint
+        self.statement = statement
+        self.duration_ms = duration_ms
+        self.rows = rows
+        self.caller = caller
+
+
+class QueryScope:
+    """Collects every statement executed while a page renders"""
+
+    def __init__(self, name):
+        self.name = name
+        self.records = []
+        self.degraded = []  # notices from degraded-mode fallbacks
+        self.started = time.perf_counter()
+
+    @property
+    def query_count(self):
+        return len(self.records)
+
+    @property
+    def total_ms(self):
+        return sum(r.duration_ms for r in self.records)
+
+    def by_fingerprint(self):
+        """Group records by fingerprint, most expensive first"""
+        groups = {}
+        for record in self.records:
+            group = groups.setdefault(record.fingerprint, {
+                "fingerprint": record.fingerprint,
+                "statement": record.statement,
+                "calls": 0,
+                "total_ms": 0.0,
+                "rows": 0,
+                "callers": set(),
+            })
+            group["calls"] += 1
+            group["total_ms"] += record.duration_ms
+            group["rows"] += record.rows if record.rows and record.rows > 0 else 0
+            group["callers"].add(record.caller)
+        return sorted(groups.values(), key=lambda g: g["total_ms"], reverse=True)
+
+    def report(self):
+        elapsed_ms = (time.perf_counter() - self.started) * 1000
+        budget = budget_for(self.name)
+        _page_stats.add(self, elapsed_ms)
+
+        over_budget = budget is not None and self.query_count > budget
+        if not PRINT_PAGE_SUMMARY and not over_budget and not self.degraded:
+            return
+
+        print(f"QUERY SUMMARY [{self.name}]: {self.query_count} statements, "
+              f"{self.total_ms:.1f} ms in database, {elapsed_ms:.1f} ms render")
+        for group in self.by_fingerprint()[:5]:
+            callers = ", ".join(sorted(c for c in group["callers"] if c))
+            print(f"  {group['fingerprint']} x{group['calls']} {group['total_ms']:.1f} ms "
+                  f"rows={group['rows']} [{callers}] {group['statement'][:120]}")
+        for notice in self.degraded:
+            print(f"  DEGRADED: {notice}")
+        if over_budget:
+            print(f"QUERY BUDGET EXCEEDED [{self.name}]: {self.query_count} statements "
+                  f"(budget {budget})")
+
+
+class PageStats:
+    """Process-wide running totals per page, for spotting regressions over time"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pages = {}
+
+    def add(self, scope, elapsed_ms):
+        with self._lock:
+            page = self._pages.setdefault(scope.name, {
+                "reruns": 0,
+                "statements": 0,
+                "db_ms": 0.0,
+                "render_ms": 0.0,
+                "max_statements": 0,
+                "over_budget": 0,
+            })
+            page["reruns"] += 1
+            page["statements"] += scope.query_count
+            page["db_ms"] += scope.total_ms
+            page["render_ms"] += elapsed_ms
+            page["max_statements"] = max(page["max_statements"], scope.query_count)
+            budget = budget_for(scope.name)
+            if budget is not None and scope.query_count > budget:
+                page["over_budget"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {name: dict(values) for name, values in self._pages.items()}
+
+
+_page_stats = PageStats()
+_current_scope = contextvars.ContextVar("query_scope", default=None)
+
+
+def get_page_stats():
+    """Aggregated statement counts and timings per page since process start"""
+    return _page_stats.snapshot()
+
+
+def current_scope():
+    return _current_scope.get()
+
+
+@contextmanager
+def query_scope(name):
+    """Attribute every statement executed inside the block to the named page"""
+    scope = QueryScope(name)
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _current_scope.reset(token)
+        scope.report()
+
+
+def _find_caller():
+    """First frame outside app/database and psycopg2, as 'models/job.py:211 get_all_for_swiping'"""
+    frame = sys._getframe(3)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not filename.startswith(_DATABASE_PACKAGE_DIR) and "psycopg2" not in filename \
+                and not filename.endswith("contextlib.py"):
+            if filename.startswith(_PROJECT_ROOT):
+                filename = os.path.relpath(filename, os.path.join(_PROJECT_ROOT, "app"))
+            return f"{filename}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def _statement_text(cursor, query):
+    if isinstance(query, str):
+        # Report prepared statements under the SQL they were prepared from
+        match = _EXECUTE_RE.match(query)
+        if match and statement_for(match.group(1)):
+            return statement_for(match.group(1))
+        return query
+    if isinstance(query, bytes):
+        return query.decode("utf-8", "replace")
+    try:
+        return query.as_string(cursor)
+    except Exception:
+        return str(query)
+
+
+def _record(cursor, query, started):
+    duration_ms = (time.perf_counter() - started) * 1000
+    scope = _current_scope.get()
+    if scope is None and duration_ms < SLOW_QUERY_MS:
+        return
+
+    statement = normalize_statement(_statement_text(cursor, query))
+    record = QueryRecord(
+        _hash(statement),
+        statement,
+        duration_ms,
+        cursor.rowcount,
+        _find_caller(),
+    )
+    if scope is not None:
+        scope.records.append(record)
+    if duration_ms >= SLOW_QUERY_MS:
+        page = scope.name if scope is not None else "-"
+        print(f"SLOW QUERY [{page}] {duration_ms:.1f} ms rows={record.rows} "
+              f"{record.fingerprint} at {record.caller}: {statement[:300]}")
+
+
+class InstrumentedCursorMixin:
+    """Times execute()/executemany()/callproc() and records them on the current scope"""
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            _record(self, query, started)
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            _record(self, query, started)
+
+    def callproc(self, procname, parameters=None):
+        started = time.perf_counter()
+        try:
+            return super().callproc(procname, parameters)
+        finally:
+            _record(self, f"CALL {procname}", started)
+
+
+_instrumented_classes = {}
+_instrumented_classes_lock = threading.Lock()
+
+
+def _instrumented_cursor_class(cursor_factory):
+    cls = _instrumented_classes.get(cursor_factory)
+    if cls is None:
+        with _instrumented_classes_lock:
+            cls = _instrumented_classes.get(cursor_factory)
+            if cls is None:
+                cls = type(f"Instrumented{cursor_factory.__name__}",
+                           (InstrumentedCursorMixin, cursor_factory), {})
+                _instrumented_classes[cursor_factory] = cls
+    return cls
+
+
+class InstrumentedConnection(extensions.connection):
+    """Connection whose cursors (including DictCursor) are instrumented"""
+
+    def cursor(self, *args, **kwargs):
+        factory = kwargs.get("cursor_factory") or self.cursor_factory or extensions.cursor
+        if not issubclass(factory, InstrumentedCursorMixin):
+            kwargs["cursor_factory"] = _instrumented_cursor_class(factory)
+        return super().cursor(*args, **kwargs)
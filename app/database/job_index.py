@@ -0,0 +1,518 @@
+"""In-process inverted index of active jobs for resolving feed filters.
+
+The index maps title/description/requirements tokens, locations (as text and
+as gazetteer ids), company names and job types to job ids, and keeps each
+job's salary range and feed ordering key. Job.get_all_for_swiping asks it
+which jobs pass the seeker's filters and only goes to Postgres to drop jobs
+the seeker has already swiped on (and to rank keyword matches).
+
+A background thread loads the index over a dedicated connection and keeps
+it fresh: Job.create/update/set_active_status send NOTIFY job_changes with
+the job id, as does a trigger (migration 23) for each job of a company that
+is renamed, and the thread reloads just those jobs. While the index is
+loading, or the listener has lost its connection, get_job_index() returns
+None and the feed queries Postgres directly.
+"""
+import os
+import re
+import select
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+from collections.abc import Sequence
+from datetime import datetime
+
+import psycopg2
+
+from app.database.schema import has_column
+from app.utils.salary import DEFAULT_CURRENCY
+
+JOB_CHANNEL = "job_changes"
+
+# Full reload interval, as a safety net for changes that bypass the models
+JOB_INDEX_RELOAD_INTERVAL = int(os.environ.get("JOB_INDEX_RELOAD_INTERVAL", 900))
+# Keyword searches with more candidates than this are ranked by the GIN index instead
+MAX_RANKED_CANDIDATES = int(os.environ.get("JOB_INDEX_MAX_RANKED", 5000))
+# Matches pg_trgm.word_similarity_threshold's default
+WORD_SIMILARITY_THRESHOLD = 0.6
+
+_LOAD_BATCH_SIZE = 5000
+_RETRY_DELAY = 10
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_QUERY_TOKEN_RE = re.compile(r'(-?)"([^"]*)"|(\S+)')
+# Postgres' english configuration drops these from tsqueries, so they must not narrow
+_STOP_WORDS = {"a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is",
+               "it", "of", "on", "or", "the", "to", "with"}
+
+
+def job_index_enabled():
+    return os.environ.get("JOB_INDEX", "true").lower() in ("1", "true", "yes")
+
+
+def notify_job_changed(cursor, job_id):
+    """Tell every process's job index to reload a job once this transaction commits"""
+    cursor.execute("SELECT pg_notify(%s, %s)", (JOB_CHANNEL, str(job_id)))
+
+
+def _trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _word_similarity(needle, text):
+    """Close approximation of pg_trgm's word_similarity(needle, text)"""
+    needle_words = _WORD_RE.findall(needle)
+    wanted = set().union(*(_trigrams(word) for word in needle_words)) if needle_words else set()
+    if not wanted:
+        return 0.0
+    words = _WORD_RE.findall(text)
+    best = 0.0
+    for start in range(len(words)):
+        found = set()
+        for word in words[start:start + len(needle_words) + 1]:
+            found |= _trigrams(word)
+            best = max(best, len(wanted & found) / len(wanted))
+    return best
+
+
+def _keyword_prefix(word):
+    # A prefix that every word sharing a stem with this one starts with
+    # ("engineers" -> "engin"), so in-memory matching never drops a job the
+    # full-text search would accept
+    if len(word) <= 3:
+        return word
+    return word[:max(3, len(word) - 4)]
+
+
+class _Tail(Sequence):
+    """ids[start:] without copying; the index replaces, never mutates, the list"""
+
+    def __init__(self, ids, start):
+        self._ids = ids
+        self._start = start
+
+    def __len__(self):
+        return len(self._ids) - self._start
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(len(self))
+            return self._ids[self._start + start:self._start + stop:step]
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError(item)
+        return self._ids[self._start + item]
+
+
+class _ValueIndex:
+    """Job ids by lower-cased text value (a location or company name).
+
+    Values are also indexed by their one- to three-character substrings and
+    by their words' trigrams, so substring and word-similarity lookups touch
+    only the values sharing the needle's grams rather than every value.
+    """
+
+    def __init__(self):
+        self.ids = {}            # value -> job ids
+        self._grams = {}         # substring of up to 3 characters -> values
+        self._word_trigrams = {}  # trigram as in _trigrams() -> values
+
+    def add(self, value, job_id):
+        ids = self.ids.get(value)
+        if ids is None:
+            self.ids[value] = ids = set()
+            for gram in self._value_grams(value):
+                self._grams.setdefault(gram, set()).add(value)
+            for trigram in self._value_trigrams(value):
+                self._word_trigrams.setdefault(trigram, set()).add(value)
+        ids.add(job_id)
+
+    def discard(self, value, job_id):
+        ids = self.ids.get(value)
+        if ids is None:
+            return
+        ids.discard(job_id)
+        if ids:
+            return
+        del self.ids[value]
+        for mapping, keys in ((self._grams, self._value_grams(value)),
+                              (self._word_trigrams, self._value_trigrams(value))):
+            for key in keys:
+                values = mapping.get(key)
+                if values is not None:
+                    values.discard(value)
+                    if not values:
+                        del mapping[key]
+
+    def match(self, needle, typo_tolerant):
+        """Ids of jobs whose value contains needle or, with typo_tolerant, is
+        word-similar to it (as pg_trgm's <% operator)"""
+        values = self._containing(needle)
+        if typo_tolerant:
+            values |= self._similar(needle)
+        ids = set()
+        for value in values:
+            ids |= self.ids[value]
+        return ids
+
+    def _containing(self, needle):
+        if len(needle) <= 3:
+            return set(self._grams.get(needle, ()))
+        grams = sorted({needle[i:i + 3] for i in range(len(needle) - 2)},
+                       key=lambda gram: len(self._grams.get(gram, ())))
+        candidates = None
+        for gram in grams:
+            values = self._grams.get(gram)
+            if not values:
+                return set()
+            candidates = set(values) if candidates is None else candidates & values
+        return {value for value in candidates if needle in value}
+
+    def _similar(self, needle):
+        wanted = self._value_trigrams(needle)
+        if not wanted:
+            return set()
+        # word_similarity() reaches the threshold only if the value has at
+        # least that share of the needle's trigrams
+        shared = Counter()
+        for trigram in wanted:
+            shared.update(self._word_trigrams.get(trigram, ()))
+        return {value for value, count in shared.items()
+                if count / len(wanted) >= WORD_SIMILARITY_THRESHOLD
+                and _word_similarity(needle, value) >= WORD_SIMILARITY_THRESHOLD}
+
+    @staticmethod
+    def _value_grams(value):
+        return {value[i:i + size] for size in (1, 2, 3) for i in range(len(value) - size + 1)}
+
+    @staticmethod
+    def _value_trigrams(value):
+        return set().union(*(_trigrams(word) for word in _WORD_RE.findall(value)))
+
+
+class _Entry:
+    __slots__ = ("key", "tokens", "location", "location_id", "company", "job_type",
+                 "salary_min", "salary_max", "salary_currency")
+
+
+class JobIndex:
+    """Inverted index over active jobs; all methods are thread-safe"""
+
+    def __init__(self):
+        self.ready = False
+        self._lock = threading.Lock()
+        self._entries = {}        # job id -> _Entry
+        self._order = []          # (created_at, id) of every entry, ascending
+        self._newest_first = None  # ids in reverse _order, rebuilt after changes
+        self._tokens = {}         # token -> job ids
+        self._sorted_tokens = None
+        self._by_location = _ValueIndex()
+        self._by_location_id = {}  # gazetteer id -> job ids
+        self._by_company = _ValueIndex()
+        self._by_job_type = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def replace_all(self, rows):
+        """Rebuild from (id, title, description, requirements, location, job_type,
+        created_at, company_name, salary_min, salary_max, active, location_id,
+        salary_currency) rows"""
+        fresh = JobIndex()
+        for row in rows:
+            if row[10]:
+                fresh._add(row)
+        with self._lock:
+            self._entries = fresh._entries
+            self._order = fresh._order
+            self._newest_first = None
+            self._tokens = fresh._tokens
+            self._sorted_tokens = None
+            self._by_location = fresh._by_location
+            self._by_location_id = fresh._by_location_id
+            self._by_company = fresh._by_company
+            self._by_job_type = fresh._by_job_type
+
+    def apply(self, job_ids, rows):
+        """Reload the given jobs from their current rows; jobs without a row are dropped"""
+        with self._lock:
+            for job_id in job_ids:
+                self._remove(job_id)
+            for row in rows:
+                if row[10]:
+                    self._add(row)
+
+    def _add(self, row):
+        job_id, title, description, requirements, location, job_type, created_at, company, \
+            salary_min, salary_max = row[:10]
+        entry = _Entry()
+        entry.key = (created_at or datetime.min, job_id)
+        text = " ".join([title or "", description or "", " ".join(requirements or [])])
+        entry.tokens = {token.lower() for token in _WORD_RE.findall(text)}
+        entry.location = (location or "").lower()
+        entry.location_id = row[11]
+        entry.company = (company or "").lower()
+        entry.job_type = job_type
+        entry.salary_min = salary_min
+        entry.salary_max = salary_max
+        entry.salary_currency = row[12] or DEFAULT_CURRENCY
+
+        self._entries[job_id] = entry
+        insort(self._order, entry.key)
+        self._newest_first = None
+        for token in entry.tokens:
+            ids = self._tokens.get(token)
+            if ids is None:
+                self._tokens[token] = ids = set()
+                self._sorted_tokens = None
+            ids.add(job_id)
+        self._by_location.add(entry.location, job_id)
+        self._by_location_id.setdefault(entry.location_id, set()).add(job_id)
+        self._by_company.add(entry.company, job_id)
+        self._by_job_type.setdefault(entry.job_type, set()).add(job_id)
+
+    def _remove(self, job_id):
+        entry = self._entries.pop(job_id, None)
+        if entry is None:
+            return
+        position = bisect_left(self._order, entry.key)
+        if position < len(self._order) and self._order[position] == entry.key:
+            del self._order[position]
+            self._newest_first = None
+        for token in entry.tokens:
+            self._discard(self._tokens, token, job_id)
+        self._by_location.discard(entry.location, job_id)
+        self._discard(self._by_location_id, entry.location_id, job_id)
+        self._by_company.discard(entry.company, job_id)
+        self._discard(self._by_job_type, entry.job_type, job_id)
+
+    def _discard(self, mapping, value, job_id):
+        ids = mapping.get(value)
+        if ids is not None:
+            ids.discard(job_id)
+            if not ids:
+                del mapping[value]
+                if mapping is self._tokens:
+                    self._sorted_tokens = None
+
+    def match(self, keywords=None, location=None, job_type=None, company=None,
+              salary=None, typo_tolerant=False, location_ids=None):
+        """Ids of jobs passing the filters, or None if no filter narrows the set.
+
+        location and company match as substrings (or, with typo_tolerant, by
+        word similarity, like the pg_trgm filters); with location_ids,
+        gazetteer ids from app.utils.gazetteer, a job also passes the
+        location filter when its location_id is one of them; salary is a (low,
+        high, currency) triple of yearly amounts, either of which may be None,
+        and the currency the job's salary must be in. Keyword matching
+        errs on the side of including jobs: the caller applies the full-text
+        query to the result.
+        """
+        with self._lock:
+            result = None
+
+            def narrow(ids):
+                nonlocal result
+                result = set(ids) if result is None else result & ids
+
+            if job_type:
+                narrow(self._by_job_type.get(job_type, ()))
+            if location:
+                location_matches = self._by_location.match(location.lower(), typo_tolerant)
+                for location_id in location_ids or ():
+                    location_matches |= self._by_location_id.get(location_id, set())
+                narrow(location_matches)
+            if company:
+                narrow(self._by_company.match(company.lower(), typo_tolerant))
+            if keywords:
+                keyword_ids = self._match_keywords(keywords)
+                if keyword_ids is not None:
+                    narrow(keyword_ids)
+            if salary and (salary[0] is not None or salary[1] is not None):
+                candidates = self._entries if result is None else result
+                narrow({job_id for job_id in candidates
+                        if self._salary_overlaps(self._entries[job_id], *salary)})
+            return result
+
+    def ordered(self, job_ids=None, after=None):
+        """Job ids (all of them if job_ids is None) newest first, starting after
+        the (created_at, id) position `after`.
+
+        For all jobs this is a view onto a list kept between changes, so an
+        unfiltered feed page costs a bisect rather than a sort.
+        """
+        with self._lock:
+            if job_ids is None:
+                if self._newest_first is None:
+                    self._newest_first = [key[1] for key in reversed(self._order)]
+                end = bisect_left(self._order, after) if after else len(self._order)
+                return _Tail(self._newest_first, len(self._order) - end)
+            keys = [self._entries[job_id].key for job_id in job_ids if job_id in self._entries]
+        if after:
+            keys = [key for key in keys if key < after]
+        keys.sort(reverse=True)
+        return [key[1] for key in keys]
+
+    def _match_keywords(self, text):
+        # Same grammar as app.utils.search.parse_search_query: terms are ANDed
+        # and OR joins neighbouring terms into a group of alternatives. The
+        # result is a superset (the feed query applies the tsquery itself), so
+        # a group with an excluded or stop-word-only term does not narrow it.
+        groups = []       # lists of alternatives, each a list of required words
+        after_or = False
+        for token in _QUERY_TOKEN_RE.finditer(text):
+            negate, phrase, bare = token.groups()
+            if bare is not None and bare.upper() == "OR" and groups:
+                after_or = True
+                continue
+            if bare is not None:
+                negate = "-" if bare.startswith("-") else ""
+            words = _WORD_RE.findall((phrase if bare is None else bare).lower())
+            words = [word for word in words if word not in _STOP_WORDS]
+            alternative = None if negate or not words else words
+            if after_or:
+                groups[-1].append(alternative)
+            else:
+                groups.append([alternative])
+            after_or = False
+
+        result = None
+        for group in groups:
+            if None in group:
+                continue
+            group_ids = set()
+            for words in group:
+                ids = None
+                for word in words:
+                    word_ids = self._ids_with_prefix(_keyword_prefix(word))
+                    ids = word_ids if ids is None else ids & word_ids
+                    if not ids:
+                        break
+                group_ids |= ids
+            result = group_ids if result is None else result & group_ids
+        return result
+
+    def _ids_with_prefix(self, prefix):
+        if self._sorted_tokens is None:
+            self._sorted_tokens = sorted(self._tokens)
+        tokens = self._sorted_tokens
+        ids = set()
+        position = bisect_left(tokens, prefix)
+        while position < len(tokens) and tokens[position].startswith(prefix):
+            ids |= self._tokens[tokens[position]]
+            position += 1
+        return ids
+
+    @staticmethod
+    def _salary_overlaps(entry, low, high, currency):
+        if entry.salary_min is None and entry.salary_max is None:
+            return False
+        if entry.salary_currency != currency:
+            return False
+        return ((entry.salary_min is None or high is None or entry.salary_min <= high)
+                and (entry.salary_max is None or low is None or entry.salary_max >= low))
+
+
+def _select_rows(cursor, where, params):
+    salary = "j.salary_min, j.salary_max" if has_column('jobs', 'salary_min') else "NULL, NULL"
+    currency = "j.salary_currency" if has_column('jobs', 'salary_min') else "NULL"
+    location_id = "j.location_id" if has_column('jobs', 'location_id') else "NULL"
+    cursor.execute(
+        f"""
+        SELECT j.id, j.title, j.description, j.requirements, j.location, j.job_type,
+               j.created_at, jg.company_name, {salary}, j.active, {location_id},
+               {currency}
+        FROM jobs j
+        LEFT JOIN job_givers jg ON j.job_giver_id = jg.id
+        WHERE {where}
+        ORDER BY j.id
+        LIMIT %s
+        """,
+        params
+    )
+    return cursor.fetchall()
+
+
+def _load_all(cursor):
+    rows = []
+    last_id = 0
+    while True:
+        batch = _select_rows(cursor, "j.active AND j.id > %s", (last_id, _LOAD_BATCH_SIZE))
+        rows.extend(batch)
+        if len(batch) < _LOAD_BATCH_SIZE:
+            return rows
+        last_id = batch[-1][0]
+
+
+class _Listener(threading.Thread):
+    def __init__(self, index):
+        super().__init__(name="job-index", daemon=True)
+        self.index = index
+
+    def run(self):
+        # Late import: connection imports the models' dependencies
+        from app.database.connection import connect_unpooled
+        while True:
+            conn = None
+            try:
+                conn = connect_unpooled()
+                if conn is None:
+                    print("Job index disabled: DATABASE_URL is not set")
+                    return
+                conn.autocommit = True
+                cursor = conn.cursor()
+                # Listen before loading so no change slips between the two
+                cursor.execute(f"LISTEN {JOB_CHANNEL}")
+                self._reload(cursor)
+                self._listen(conn, cursor)
+            except (psycopg2.Error, OSError) as e:
+                print(f"Job index listener error: {e}; retrying in {_RETRY_DELAY}s")
+            finally:
+                self.index.ready = False
+                if conn is not None:
+                    conn.close()
+            time.sleep(_RETRY_DELAY)
+
+    def _reload(self, cursor):
+        started = time.monotonic()
+        self.index.replace_all(_load_all(cursor))
+        self.index.ready = True
+        self.loaded_at = time.monotonic()
+        print(f"Job index loaded {len(self.index)} active jobs in {self.loaded_at - started:.2f}s")
+
+    def _listen(self, conn, cursor):
+        while True:
+            if time.monotonic() - self.loaded_at > JOB_INDEX_RELOAD_INTERVAL:
+                self._reload(cursor)
+            if select.select([conn], [], [], 5) == ([], [], []):
+                continue
+            conn.poll()
+            job_ids = {int(n.payload) for n in conn.notifies if n.payload.isdigit()}
+            del conn.notifies[:]
+            if job_ids:
+                rows = _select_rows(cursor, "j.id = ANY(%s)", (list(job_ids), len(job_ids)))
+                self.index.apply(job_ids, rows)
+
+
+_index = JobIndex()
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def get_job_index():
+    """The job index once it is loaded and being kept fresh, else None.
+
+    The first call starts the background loader.
+    """
+    global _listener
+    if not job_index_enabled():
+        return None
+    if _listener is None:
+        with _listener_lock:
+            if _listener is None:
+                _listener = _Listener(_index)
+                _listener.start()
+    return _index if _index.ready else None
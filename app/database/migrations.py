@@ -0,0 +1,997 @@
+import psycopg2
+
+from app.database.backfills import (backfill_job_salaries, backfill_locations,
+                                    backfill_pending_interest, backfill_seen_sets)
+
+# Arbitrary application-wide key for pg_advisory_lock so that several worker
+# processes starting at once apply migrations one at a time.
+MIGRATION_LOCK_KEY = 7340021
+
+
+class Migration:
+    """A numbered schema change.
+
+    Statements are SQL strings or callables taking a cursor. Statements of a
+    transactional migration run in one transaction together with the
+    schema_version bookkeeping. Non-transactional migrations (e.g.
+    CREATE INDEX CONCURRENTLY) run each statement in autocommit mode, so
+    every statement in them must be idempotent.
+    """
+
+    def __init__(self, version, description, statements, transactional=True):
+        self.version = version
+        self.description = description
+        self.statements = statements
+        self.transactional = transactional
+
+
+def _extension_installed(cursor, name):
+    cursor.execute("SELECT 1 FROM pg_extension WHERE extname = %s", (name,))
+    return cursor.fetchone() is not None
+
+
+def create_extension(name):
+    """Install an extension if the database user is allowed to.
+
+    For non-transactional migrations. Managed databases often restrict
+    CREATE EXTENSION; a failure is reported rather than raised, and indexes
+    that need the extension (create_index_concurrently(requires_extension=))
+    are then skipped.
+    """
+    def statement(cursor):
+        if _extension_installed(cursor, name):
+            return
+        try:
+            cursor.execute(f"CREATE EXTENSION IF NOT EXISTS {name}")
+        except psycopg2.Error as e:
+            print(f"Could not install extension {name} ({e}); features that need it stay disabled")
+    statement.description = f"extension {name}"
+    return statement
+
+
+def create_index_concurrently(name, table, columns, unique=False, where=None, using=None,
+                              requires_extension=None):
+    """Build an index without blocking writes to the table.
+
+    A failed CREATE INDEX CONCURRENTLY leaves an INVALID index behind that
+    IF NOT EXISTS would then skip forever, so drop that first.
+    """
+    def statement(cursor):
+        if requires_extension and not _extension_installed(cursor, requires_extension):
+            print(f"Skipping index {name}: extension {requires_extension} is not installed")
+            return
+        cursor.execute(
+            """
+            SELECT i.indisvalid
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE c.relname = %s AND n.nspname = current_schema()
+            """,
+            (name,)
+        )
+        row = cursor.fetchone()
+        if row and row[0]:
+            return
+        if row:
+            print(f"Dropping invalid index {name} left by an interrupted build")
+            cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        cursor.execute(
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX CONCURRENTLY IF NOT EXISTS {name} "
+            f"ON {table} " + (f"USING {using} " if using else "") + f"({columns})"
+            + (f" WHERE {where}" if where else "")
+        )
+    statement.description = f"index {name}"
+    return statement
+
+
+MIGRATIONS = [
+    Migration(1, "Baseline schema", [
+        # Create users table
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id SERIAL PRIMARY KEY,
+            username VARCHAR(100) UNIQUE NOT NULL,
+            email VARCHAR(100) UNIQUE NOT NULL,
+            password_hash VARCHAR(255) NOT NULL,
+            user_type VARCHAR(20) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        # Create platform_settings table
+        """
+        CREATE TABLE IF NOT EXISTS platform_settings (
+            id SERIAL PRIMARY KEY,
+            key VARCHAR(100) UNIQUE NOT NULL,
+            value TEXT,
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        # Insert default platform settings if they don't exist
+        """
+        INSERT INTO platform_settings (key, value, description)
+        VALUES 
+            ('job_seeker_credits_per_match', '10', 'Number of credits a job seeker earns per match'),
+            ('job_giver_credits_per_match', '10', 'Number of credits a job giver spends per match'),
+            ('min_credits_for_redemption', '100', 'Minimum credits required for redemption'),
+            ('redemption_amount', '100', 'Amount of credits that can be redeemed at once'),
+            ('enable_credit_redemption', 'false', 'Enable or disable credit redemption feature for all users')
+        ON CONFLICT (key) DO NOTHING
+        """,
+        # Create job_givers table
+        """
+        CREATE TABLE IF NOT EXISTS job_givers (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+            company_name VARCHAR(100),
+            company_description TEXT,
+            website VARCHAR(255),
+            location VARCHAR(100),
+            credits INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        # Create job_seekers table
+        """
+        CREATE TABLE IF NOT EXISTS job_seekers (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+            full_name VARCHAR(100),
+            bio TEXT,
+            skills TEXT[],
+            experience INTEGER,
+            education VARCHAR(100),
+            location VARCHAR(100),
+            cv_path VARCHAR(255),
+            credits INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        # Create jobs table
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id SERIAL PRIMARY KEY,
+            job_giver_id INTEGER REFERENCES job_givers(id) ON DELETE CASCADE,
+            title VARCHAR(100) NOT NULL,
+            description TEXT NOT NULL,
+            requirements TEXT[],
+            location VARCHAR(100),
+            salary_range VARCHAR(100),
+            job_type VARCHAR(50),
+            active BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        # Create swipes table
+        """
+        CREATE TABLE IF NOT EXISTS swipes (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+            target_id INTEGER NOT NULL,
+            target_type VARCHAR(20) NOT NULL,
+            direction VARCHAR(10) NOT NULL,
+            job_id INTEGER REFERENCES jobs(id) ON DELETE CASCADE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        # Create matches table
+        """
+        CREATE TABLE IF NOT EXISTS matches (
+            id SERIAL PRIMARY KEY,
+            job_giver_id INTEGER REFERENCES job_givers(id) ON DELETE CASCADE,
+            job_seeker_id INTEGER REFERENCES job_seekers(id) ON DELETE CASCADE,
+            job_id INTEGER REFERENCES jobs(id) ON DELETE CASCADE,
+            status VARCHAR(20) DEFAULT 'active',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        # Create credit_packages table
+        """
+        CREATE TABLE IF NOT EXISTS credit_packages (
+            id SERIAL PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            description TEXT,
+            credits_amount INTEGER NOT NULL,
+            price_inr NUMERIC(10, 2) NOT NULL,
+            is_active BOOLEAN DEFAULT TRUE,
+            sort_order INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        # Create credit_transactions table
+        """
+        CREATE TABLE IF NOT EXISTS credit_transactions (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+            amount INTEGER NOT NULL,
+            transaction_type VARCHAR(50) NOT NULL,
+            description TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        # Create payment_transactions table
+        """
+        CREATE TABLE IF NOT EXISTS payment_transactions (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+            stripe_payment_id VARCHAR(255) NOT NULL,
+            amount NUMERIC(10, 2) NOT NULL,
+            currency VARCHAR(3) NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            package_id INTEGER REFERENCES credit_packages(id) ON DELETE SET NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        # Create redemption_requests table
+        """
+        CREATE TABLE IF NOT EXISTS redemption_requests (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+            job_seeker_id INTEGER REFERENCES job_seekers(id) ON DELETE CASCADE,
+            amount INTEGER NOT NULL,
+            upi_id VARCHAR(100) NOT NULL,
+            whatsapp_number VARCHAR(20) NOT NULL,
+            status VARCHAR(20) DEFAULT 'pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            processed_at TIMESTAMP
+        )
+        """,
+        # Create admin user if it doesn't exist
+        """
+        INSERT INTO users (username, email, password_hash, user_type)
+        SELECT 'admin', 'admin@jobmatch.com', '$2b$12$tPpS/hYvGQsXWQQ/XUvUxeQBs1VdGj9A.QQwjwwP5Ij.OQ8QrJZ0y', 'admin'
+        WHERE NOT EXISTS (SELECT 1 FROM users WHERE username = 'admin')
+        """,
+    ]),
+    Migration(2, "Profile completion and account status columns", [
+        """
+        ALTER TABLE users ADD COLUMN IF NOT EXISTS is_active BOOLEAN DEFAULT TRUE
+        """,
+        """
+        ALTER TABLE job_seekers ADD COLUMN IF NOT EXISTS profile_complete BOOLEAN DEFAULT FALSE
+        """,
+        """
+        ALTER TABLE job_givers ADD COLUMN IF NOT EXISTS profile_complete BOOLEAN DEFAULT FALSE
+        """,
+    ]),
+    Migration(3, "Job-specific swipes", [
+        # Previously added lazily by Swipe.create() on databases created before the column existed
+        """
+        ALTER TABLE swipes ADD COLUMN IF NOT EXISTS job_id INTEGER REFERENCES jobs(id) ON DELETE CASCADE
+        """,
+    ]),
+    Migration(4, "Remove duplicate matches", [
+        # Keep the oldest row so the unique index in migration 5 can be built
+        """
+        DELETE FROM matches m
+        USING matches older
+        WHERE m.job_seeker_id = older.job_seeker_id
+        AND m.job_giver_id = older.job_giver_id
+        AND m.job_id = older.job_id
+        AND m.id > older.id
+        """,
+    ]),
+    Migration(5, "Indexes for feeds, match checks and match lists", [
+        # Feed exclusion and check_for_match: swipes by swiper
+        create_index_concurrently("idx_swipes_user_target", "swipes",
+                                  "user_id, target_type, direction, target_id, job_id"),
+        # Applicants for a job and the seeker side of check_for_match: swipes by target
+        create_index_concurrently("idx_swipes_target", "swipes",
+                                  "target_type, target_id, direction"),
+        create_index_concurrently("uq_matches_seeker_giver_job", "matches",
+                                  "job_seeker_id, job_giver_id, job_id", unique=True),
+        create_index_concurrently("idx_matches_giver_created", "matches",
+                                  "job_giver_id, created_at DESC"),
+        create_index_concurrently("idx_matches_seeker_created", "matches",
+                                  "job_seeker_id, created_at DESC"),
+        create_index_concurrently("idx_matches_job", "matches", "job_id"),
+        create_index_concurrently("idx_jobs_giver_created", "jobs",
+                                  "job_giver_id, created_at DESC"),
+        create_index_concurrently("idx_jobs_active_created", "jobs",
+                                  "created_at DESC, id DESC", where="active"),
+        create_index_concurrently("idx_job_seekers_user", "job_seekers", "user_id"),
+        create_index_concurrently("idx_job_givers_user", "job_givers", "user_id"),
+        create_index_concurrently("idx_credit_transactions_user_created", "credit_transactions",
+                                  "user_id, created_at DESC"),
+    ], transactional=False),
+    Migration(6, "Full-text search vector for jobs", [
+        # array_to_string() is only STABLE, which a generated column does not
+        # accept; for text[] it cannot actually vary, so wrap it as IMMUTABLE
+        """
+        CREATE OR REPLACE FUNCTION immutable_array_to_string(TEXT[], TEXT)
+        RETURNS TEXT LANGUAGE sql IMMUTABLE PARALLEL SAFE
+        AS $$ SELECT array_to_string($1, $2) $$
+        """,
+        # Rewrites the jobs table once; title ranks above requirements above description
+        """
+        ALTER TABLE jobs ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(immutable_array_to_string(requirements, ' '), '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'C')
+        ) STORED
+        """,
+    ]),
+    Migration(7, "Full-text search index for jobs", [
+        create_index_concurrently("idx_jobs_search_vector", "jobs", "search_vector",
+                                  where="active", using="gin"),
+    ], transactional=False),
+    Migration(8, "Trigram indexes for location, education and company filters", [
+        # Serve '%term%' ILIKE filters and typo-tolerant word similarity (<%)
+        create_extension("pg_trgm"),
+        create_index_concurrently("idx_jobs_location_trgm", "jobs", "location gin_trgm_ops",
+                                  where="active", using="gin", requires_extension="pg_trgm"),
+        create_index_concurrently("idx_job_seekers_location_trgm", "job_seekers",
+                                  "location gin_trgm_ops", where="profile_complete",
+                                  using="gin", requires_extension="pg_trgm"),
+        create_index_concurrently("idx_job_seekers_education_trgm", "job_seekers",
+                                  "education gin_trgm_ops", where="profile_complete",
+                                  using="gin", requires_extension="pg_trgm"),
+        create_index_concurrently("idx_job_givers_company_trgm", "job_givers",
+                                  "company_name gin_trgm_ops", using="gin",
+                                  requires_extension="pg_trgm"),
+    ], transactional=False),
+    Migration(9, "Numeric salary columns for jobs", [
+        # Parsed from salary_range by app.utils.salary on write; amounts are yearly
+        """
+        ALTER TABLE jobs
+            ADD COLUMN IF NOT EXISTS salary_min INTEGER,
+            ADD COLUMN IF NOT EXISTS salary_max INTEGER,
+            ADD COLUMN IF NOT EXISTS salary_currency VARCHAR(3),
+            ADD COLUMN IF NOT EXISTS salary_period VARCHAR(10)
+        """,
+        # int4range() in the index below rejects inverted bounds
+        """
+        DO $$
+        BEGIN
+            ALTER TABLE jobs ADD CONSTRAINT jobs_salary_bounds CHECK (salary_min <= salary_max);
+        EXCEPTION WHEN duplicate_object THEN NULL;
+        END $$
+        """,
+    ]),
+    Migration(10, "Backfill and index numeric salaries", [
+        backfill_job_salaries,
+        # The feed's salary filter tests this range for overlap with the wanted one
+        create_index_concurrently("idx_jobs_salary_range", "jobs",
+                                  "(int4range(salary_min, salary_max, '[]'))", using="gist",
+                                  where="active AND (salary_min IS NOT NULL OR salary_max IS NOT NULL)"),
+    ], transactional=False),
+    Migration(11, "Case-normalized job seeker skills", [
+        # Kept in step with app.utils.skills.normalize_skills()
+        """
+        CREATE OR REPLACE FUNCTION normalize_skills(TEXT[])
+        RETURNS TEXT[] LANGUAGE sql IMMUTABLE PARALLEL SAFE
+        AS $$
+            SELECT coalesce(array_agg(skill ORDER BY first_position), '{}')
+            FROM (
+                SELECT lower(btrim(s)) AS skill, min(position) AS first_position
+                FROM unnest($1) WITH ORDINALITY AS u(s, position)
+                WHERE btrim(s) <> ''
+                GROUP BY lower(btrim(s))
+            ) skills
+        $$
+        """,
+        """
+        ALTER TABLE job_seekers ADD COLUMN IF NOT EXISTS skills_normalized TEXT[]
+        GENERATED ALWAYS AS (normalize_skills(skills)) STORED
+        """,
+    ]),
+    Migration(12, "Skill containment index for candidate search", [
+        create_index_concurrently("idx_job_seekers_skills_normalized", "job_seekers",
+                                  "skills_normalized", where="profile_complete", using="gin"),
+    ], transactional=False),
+    Migration(13, "Per-user seen sets for feed exclusion", [
+        # app.utils.bitmap.RoaringBitmap of the targets a user swiped right on;
+        # job_id 0 holds the set across all jobs
+        """
+        CREATE TABLE IF NOT EXISTS swipe_seen_sets (
+            user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+            target_type VARCHAR(20) NOT NULL,
+            job_id INTEGER NOT NULL DEFAULT 0,
+            bitmap BYTEA NOT NULL,
+            version BIGINT NOT NULL DEFAULT 1,
+            PRIMARY KEY (user_id, target_type, job_id)
+        )
+        """,
+    ]),
+    Migration(14, "Backfill seen sets", [
+        backfill_seen_sets,
+    ], transactional=False),
+    Migration(15, "Pending interest count per job", [
+        # Seekers who swiped right on the job and are still waiting for the
+        # job giver; kept up to date by Swipe.create
+        """
+        ALTER TABLE jobs ADD COLUMN IF NOT EXISTS pending_interest_count INTEGER NOT NULL DEFAULT 0
+        """,
+        backfill_pending_interest,
+    ]),
+    Migration(16, "Recommendation queues", [
+        # Top-ranked targets per owner: jobs for a job seeker ('job_seeker'),
+        # candidates for a job ('job'); see app.models.recommendation_queue
+        """
+        CREATE TABLE IF NOT EXISTS recommendation_queue (
+            owner_type VARCHAR(20) NOT NULL,
+            owner_id INTEGER NOT NULL,
+            target_id INTEGER NOT NULL,
+            rank_key REAL NOT NULL,
+            PRIMARY KEY (owner_type, owner_id, target_id)
+        )
+        """,
+        # Feed pages are range reads in rank order
+        """
+        CREATE INDEX IF NOT EXISTS idx_recommendation_queue_rank
+        ON recommendation_queue (owner_type, owner_id, rank_key DESC, target_id DESC)
+        """,
+        # Taking a changed job or seeker out of every queue it is in
+        """
+        CREATE INDEX IF NOT EXISTS idx_recommendation_queue_target
+        ON recommendation_queue (owner_type, target_id)
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS recommendation_owners (
+            owner_type VARCHAR(20) NOT NULL,
+            owner_id INTEGER NOT NULL,
+            size INTEGER NOT NULL DEFAULT 0,
+            cutoff REAL,
+            refreshed_at TIMESTAMP,
+            PRIMARY KEY (owner_type, owner_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS recommendation_refresh (
+            owner_type VARCHAR(20) NOT NULL,
+            owner_id INTEGER NOT NULL,
+            merge BOOLEAN NOT NULL DEFAULT FALSE,
+            requested_at TIMESTAMP NOT NULL DEFAULT clock_timestamp(),
+            PRIMARY KEY (owner_type, owner_id)
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_recommendation_refresh_requested
+        ON recommendation_refresh (requested_at)
+        """,
+    ]),
+    Migration(17, "Gazetteer location ids", [
+        # Canonical place id from app.utils.gazetteer, set on write; NULL for
+        # locations the gazetteer does not know
+        "ALTER TABLE jobs ADD COLUMN IF NOT EXISTS location_id VARCHAR(64)",
+        "ALTER TABLE job_seekers ADD COLUMN IF NOT EXISTS location_id VARCHAR(64)",
+        "ALTER TABLE job_givers ADD COLUMN IF NOT EXISTS location_id VARCHAR(64)",
+    ]),
+    Migration(18, "Backfill and index location ids", [
+        backfill_locations,
+        # Location and radius filters are location_id = ANY(...)
+        create_index_concurrently("idx_jobs_active_location", "jobs", "location_id",
+                                  where="active"),
+        create_index_concurrently("idx_job_seekers_location", "job_seekers", "location_id",
+                                  where="profile_complete"),
+    ], transactional=False),
+    Migration(19, "Server-side swipe recording", [
+        # Swipe.create in one round trip: the pair lock, the swipe, the match
+        # check and the credit transfer, plus jobs.pending_interest_count.
+        # outcome is 'none', 'match', 'exists' or 'insufficient_credits'.
+        """
+        CREATE OR REPLACE FUNCTION record_swipe(
+            p_user_id INTEGER, p_target_id INTEGER, p_target_type VARCHAR,
+            p_direction VARCHAR, p_job_id INTEGER, p_credits INTEGER,
+            OUT swipe_id INTEGER, OUT swiped_at TIMESTAMP, OUT outcome TEXT,
+            OUT match_id INTEGER, OUT match_job_id INTEGER,
+            OUT match_job_giver_id INTEGER, OUT match_job_seeker_id INTEGER)
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            v_seeker_id INTEGER;
+            v_seeker_user_id INTEGER;
+            v_giver_id INTEGER;
+            v_giver_user_id INTEGER;
+            v_job_id INTEGER;
+        BEGIN
+            outcome := 'none';
+
+            IF p_target_type = 'job' THEN
+                SELECT id INTO v_seeker_id FROM job_seekers WHERE user_id = p_user_id;
+                v_seeker_user_id := p_user_id;
+                SELECT j.id, j.job_giver_id, jg.user_id
+                INTO v_job_id, v_giver_id, v_giver_user_id
+                FROM jobs j JOIN job_givers jg ON jg.id = j.job_giver_id
+                WHERE j.id = p_target_id;
+            ELSIF p_target_type = 'job_seeker' THEN
+                SELECT id INTO v_giver_id FROM job_givers WHERE user_id = p_user_id;
+                v_giver_user_id := p_user_id;
+                SELECT id, user_id INTO v_seeker_id, v_seeker_user_id
+                FROM job_seekers WHERE id = p_target_id;
+                v_job_id := p_job_id;
+            END IF;
+
+            -- Same (job, job seeker) lock as the statement-by-statement path
+            IF p_direction = 'right' THEN
+                IF p_target_type = 'job' THEN
+                    PERFORM pg_advisory_xact_lock(p_target_id, v_seeker_id);
+                ELSIF p_job_id IS NOT NULL THEN
+                    PERFORM pg_advisory_xact_lock(p_job_id, p_target_id);
+                END IF;
+            END IF;
+
+            INSERT INTO swipes (user_id, target_id, target_type, direction, job_id)
+            VALUES (p_user_id, p_target_id, p_target_type, p_direction, p_job_id)
+            RETURNING id, created_at INTO swipe_id, swiped_at;
+
+            IF p_direction <> 'right' THEN
+                RETURN;
+            END IF;
+
+            IF v_seeker_id IS NOT NULL AND v_giver_id IS NOT NULL AND v_job_id IS NOT NULL THEN
+                -- Has the other side already swiped right on this pair?
+                IF p_target_type = 'job' THEN
+                    PERFORM 1 FROM swipes
+                    WHERE user_id = v_giver_user_id AND target_id = v_seeker_id
+                    AND target_type = 'job_seeker' AND direction = 'right'
+                    AND job_id = v_job_id;
+                ELSE
+                    PERFORM 1 FROM swipes s JOIN jobs j ON j.id = s.target_id
+                    WHERE s.user_id = v_seeker_user_id AND s.target_type = 'job'
+                    AND s.direction = 'right' AND s.target_id = v_job_id
+                    AND j.job_giver_id = v_giver_id;
+                END IF;
+
+                IF FOUND THEN
+                    PERFORM 1 FROM matches
+                    WHERE job_seeker_id = v_seeker_id AND job_giver_id = v_giver_id
+                    AND job_id = v_job_id;
+                    IF FOUND THEN
+                        outcome := 'exists';
+                    ELSE
+                        UPDATE job_givers SET credits = credits - p_credits
+                        WHERE id = v_giver_id AND credits >= p_credits;
+                        IF NOT FOUND THEN
+                            outcome := 'insufficient_credits';
+                        ELSE
+                            INSERT INTO matches (job_seeker_id, job_giver_id, job_id)
+                            VALUES (v_seeker_id, v_giver_id, v_job_id)
+                            RETURNING id INTO match_id;
+                            UPDATE job_seekers SET credits = credits + p_credits
+                            WHERE id = v_seeker_id;
+                            INSERT INTO credit_transactions
+                                (user_id, amount, transaction_type, description)
+                            VALUES
+                                (v_giver_user_id, -p_credits, 'match',
+                                 p_credits || ' credits used for match'),
+                                (v_seeker_user_id, p_credits, 'credit', 'Match credit');
+                            outcome := 'match';
+                            match_job_id := v_job_id;
+                            match_job_giver_id := v_giver_id;
+                            match_job_seeker_id := v_seeker_id;
+                        END IF;
+                    END IF;
+                END IF;
+            END IF;
+
+            -- A seeker's first right swipe on a job counts as pending interest
+            -- unless it matched; the job giver's matching swipe clears it
+            IF p_target_type = 'job' AND outcome <> 'match' THEN
+                UPDATE jobs SET pending_interest_count = pending_interest_count + 1
+                WHERE id = p_target_id AND NOT EXISTS (
+                    SELECT 1 FROM swipes
+                    WHERE user_id = p_user_id AND target_type = 'job' AND target_id = p_target_id
+                    AND direction = 'right' AND id <> swipe_id
+                );
+            ELSIF p_target_type = 'job_seeker' AND outcome = 'match' THEN
+                UPDATE jobs SET pending_interest_count = GREATEST(pending_interest_count - 1, 0)
+                WHERE id = v_job_id;
+            END IF;
+        END;
+        $$
+        """,
+    ]),
+    Migration(20, "Keep pending interest counts in step with matches", [
+        # A deleted match puts the seeker's right swipe back into the count
+        """
+        CREATE OR REPLACE FUNCTION restore_pending_interest()
+        RETURNS TRIGGER LANGUAGE plpgsql AS $$
+        BEGIN
+            UPDATE jobs SET pending_interest_count = pending_interest_count + 1
+            WHERE id = OLD.job_id
+            AND EXISTS (
+                SELECT 1 FROM swipes s JOIN job_seekers js ON js.user_id = s.user_id
+                WHERE js.id = OLD.job_seeker_id AND s.target_type = 'job'
+                AND s.target_id = OLD.job_id AND s.direction = 'right'
+            )
+            AND NOT EXISTS (
+                SELECT 1 FROM matches
+                WHERE job_id = OLD.job_id AND job_seeker_id = OLD.job_seeker_id
+            );
+            RETURN NULL;
+        END;
+        $$
+        """,
+        "DROP TRIGGER IF EXISTS matches_restore_pending_interest ON matches",
+        """
+        CREATE TRIGGER matches_restore_pending_interest
+        AFTER DELETE ON matches
+        FOR EACH ROW EXECUTE FUNCTION restore_pending_interest()
+        """,
+        # Correct the drift the old rules left behind
+        backfill_pending_interest,
+    ]),
+    Migration(21, "Reparse salaries with experience ranges or lakh amounts", [
+        # Earlier parses read "3-5 years exp, 10 LPA" as 3..5 and left lakh and
+        # crore amounts without a currency; backfill_job_salaries picks up the
+        # rows whose salary_period is NULL again
+        r"""
+        UPDATE jobs
+        SET salary_min = NULL, salary_max = NULL, salary_currency = NULL, salary_period = NULL
+        WHERE salary_range IS NOT NULL
+        AND (salary_range ~* '\d\s*\+?\s*(years?|yrs?)\M'
+             OR (salary_currency IS NULL AND salary_range ~* '\d\s*(l|lpa|lakhs?|lacs?|cr|crores?)\M'))
+        """,
+        backfill_job_salaries,
+    ], transactional=False),
+    Migration(22, "Count pending interest only for unmatched pairs", [
+        # record_swipe() from migration 19, except that a seeker's right swipe
+        # on a job they already matched no longer raises pending_interest_count
+        """
+        CREATE OR REPLACE FUNCTION record_swipe(
+            p_user_id INTEGER, p_target_id INTEGER, p_target_type VARCHAR,
+            p_direction VARCHAR, p_job_id INTEGER, p_credits INTEGER,
+            OUT swipe_id INTEGER, OUT swiped_at TIMESTAMP, OUT outcome TEXT,
+            OUT match_id INTEGER, OUT match_job_id INTEGER,
+            OUT match_job_giver_id INTEGER, OUT match_job_seeker_id INTEGER)
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            v_seeker_id INTEGER;
+            v_seeker_user_id INTEGER;
+            v_giver_id INTEGER;
+            v_giver_user_id INTEGER;
+            v_job_id INTEGER;
+        BEGIN
+            outcome := 'none';
+
+            IF p_target_type = 'job' THEN
+                SELECT id INTO v_seeker_id FROM job_seekers WHERE user_id = p_user_id;
+                v_seeker_user_id := p_user_id;
+                SELECT j.id, j.job_giver_id, jg.user_id
+                INTO v_job_id, v_giver_id, v_giver_user_id
+                FROM jobs j JOIN job_givers jg ON jg.id = j.job_giver_id
+                WHERE j.id = p_target_id;
+            ELSIF p_target_type = 'job_seeker' THEN
+                SELECT id INTO v_giver_id FROM job_givers WHERE user_id = p_user_id;
+                v_giver_user_id := p_user_id;
+                SELECT id, user_id INTO v_seeker_id, v_seeker_user_id
+                FROM job_seekers WHERE id = p_target_id;
+                v_job_id := p_job_id;
+            END IF;
+
+            -- Same (job, job seeker) lock as the statement-by-statement path
+            IF p_direction = 'right' THEN
+                IF p_target_type = 'job' THEN
+                    PERFORM pg_advisory_xact_lock(p_target_id, v_seeker_id);
+                ELSIF p_job_id IS NOT NULL THEN
+                    PERFORM pg_advisory_xact_lock(p_job_id, p_target_id);
+                END IF;
+            END IF;
+
+            INSERT INTO swipes (user_id, target_id, target_type, direction, job_id)
+            VALUES (p_user_id, p_target_id, p_target_type, p_direction, p_job_id)
+            RETURNING id, created_at INTO swipe_id, swiped_at;
+
+            IF p_direction <> 'right' THEN
+                RETURN;
+            END IF;
+
+            IF v_seeker_id IS NOT NULL AND v_giver_id IS NOT NULL AND v_job_id IS NOT NULL THEN
+                -- Has the other side already swiped right on this pair?
+                IF p_target_type = 'job' THEN
+                    PERFORM 1 FROM swipes
+                    WHERE user_id = v_giver_user_id AND target_id = v_seeker_id
+                    AND target_type = 'job_seeker' AND direction = 'right'
+                    AND job_id = v_job_id;
+                ELSE
+                    PERFORM 1 FROM swipes s JOIN jobs j ON j.id = s.target_id
+                    WHERE s.user_id = v_seeker_user_id AND s.target_type = 'job'
+                    AND s.direction = 'right' AND s.target_id = v_job_id
+                    AND j.job_giver_id = v_giver_id;
+                END IF;
+
+                IF FOUND THEN
+                    PERFORM 1 FROM matches
+                    WHERE job_seeker_id = v_seeker_id AND job_giver_id = v_giver_id
+                    AND job_id = v_job_id;
+                    IF FOUND THEN
+                        outcome := 'exists';
+                    ELSE
+                        UPDATE job_givers SET credits = credits - p_credits
+                        WHERE id = v_giver_id AND credits >= p_credits;
+                        IF NOT FOUND THEN
+                            outcome := 'insufficient_credits';
+                        ELSE
+                            INSERT INTO matches (job_seeker_id, job_giver_id, job_id)
+                            VALUES (v_seeker_id, v_giver_id, v_job_id)
+                            RETURNING id INTO match_id;
+                            UPDATE job_seekers SET credits = credits + p_credits
+                            WHERE id = v_seeker_id;
+                            INSERT INTO credit_transactions
+                                (user_id, amount, transaction_type, description)
+                            VALUES
+                                (v_giver_user_id, -p_credits, 'match',
+                                 p_credits || ' credits used for match'),
+                                (v_seeker_user_id, p_credits, 'credit', 'Match credit');
+                            outcome := 'match';
+                            match_job_id := v_job_id;
+                            match_job_giver_id := v_giver_id;
+                            match_job_seeker_id := v_seeker_id;
+                        END IF;
+                    END IF;
+                END IF;
+            END IF;
+
+            -- A seeker's first right swipe on a job counts as pending interest
+            -- while the pair has no match; the job giver's matching swipe
+            -- clears it (the same rule as backfill_pending_interest)
+            IF p_target_type = 'job' AND outcome <> 'match' AND v_seeker_id IS NOT NULL THEN
+                UPDATE jobs SET pending_interest_count = pending_interest_count + 1
+                WHERE id = p_target_id AND NOT EXISTS (
+                    SELECT 1 FROM swipes
+                    WHERE user_id = p_user_id AND target_type = 'job' AND target_id = p_target_id
+                    AND direction = 'right' AND id <> swipe_id
+                ) AND NOT EXISTS (
+                    SELECT 1 FROM matches
+                    WHERE job_id = p_target_id AND job_seeker_id = v_seeker_id
+                );
+            ELSIF p_target_type = 'job_seeker' AND outcome = 'match' THEN
+                UPDATE jobs SET pending_interest_count = GREATEST(pending_interest_count - 1, 0)
+                WHERE id = v_job_id;
+            END IF;
+        END;
+        $$
+        """,
+        # Correct the drift the old rule left behind
+        backfill_pending_interest,
+    ]),
+    Migration(23, "Reload indexed jobs when a company is renamed", [
+        # The job index keeps each job's company name; job_changes carries
+        # job ids (see app.database.job_index)
+        """
+        CREATE OR REPLACE FUNCTION notify_company_jobs_changed()
+        RETURNS TRIGGER LANGUAGE plpgsql AS $$
+        BEGIN
+            PERFORM pg_notify('job_changes', j.id::text)
+            FROM jobs j WHERE j.job_giver_id = NEW.id AND j.active;
+            RETURN NULL;
+        END;
+        $$
+        """,
+        "DROP TRIGGER IF EXISTS job_givers_notify_company_jobs ON job_givers",
+        """
+        CREATE TRIGGER job_givers_notify_company_jobs
+        AFTER UPDATE OF company_name ON job_givers
+        FOR EACH ROW WHEN (OLD.company_name IS DISTINCT FROM NEW.company_name)
+        EXECUTE FUNCTION notify_company_jobs_changed()
+        """,
+    ]),
+    Migration(24, "Clear pending interest when a repeat swipe makes the match", [
+        # record_swipe() from migration 22, except that a seeker's right swipe
+        # that makes a match takes back the interest counted for their earlier
+        # right swipe on the job (re-counted when the pair's last match was deleted)
+        """
+        CREATE OR REPLACE FUNCTION record_swipe(
+            p_user_id INTEGER, p_target_id INTEGER, p_target_type VARCHAR,
+            p_direction VARCHAR, p_job_id INTEGER, p_credits INTEGER,
+            OUT swipe_id INTEGER, OUT swiped_at TIMESTAMP, OUT outcome TEXT,
+            OUT match_id INTEGER, OUT match_job_id INTEGER,
+            OUT match_job_giver_id INTEGER, OUT match_job_seeker_id INTEGER)
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            v_seeker_id INTEGER;
+            v_seeker_user_id INTEGER;
+            v_giver_id INTEGER;
+            v_giver_user_id INTEGER;
+            v_job_id INTEGER;
+        BEGIN
+            outcome := 'none';
+
+            IF p_target_type = 'job' THEN
+                SELECT id INTO v_seeker_id FROM job_seekers WHERE user_id = p_user_id;
+                v_seeker_user_id := p_user_id;
+                SELECT j.id, j.job_giver_id, jg.user_id
+                INTO v_job_id, v_giver_id, v_giver_user_id
+                FROM jobs j JOIN job_givers jg ON jg.id = j.job_giver_id
+                WHERE j.id = p_target_id;
+            ELSIF p_target_type = 'job_seeker' THEN
+                SELECT id INTO v_giver_id FROM job_givers WHERE user_id = p_user_id;
+                v_giver_user_id := p_user_id;
+                SELECT id, user_id INTO v_seeker_id, v_seeker_user_id
+                FROM job_seekers WHERE id = p_target_id;
+                v_job_id := p_job_id;
+            END IF;
+
+            -- Same (job, job seeker) lock as the statement-by-statement path
+            IF p_direction = 'right' THEN
+                IF p_target_type = 'job' THEN
+                    PERFORM pg_advisory_xact_lock(p_target_id, v_seeker_id);
+                ELSIF p_job_id IS NOT NULL THEN
+                    PERFORM pg_advisory_xact_lock(p_job_id, p_target_id);
+                END IF;
+            END IF;
+
+            INSERT INTO swipes (user_id, target_id, target_type, direction, job_id)
+            VALUES (p_user_id, p_target_id, p_target_type, p_direction, p_job_id)
+            RETURNING id, created_at INTO swipe_id, swiped_at;
+
+            IF p_direction <> 'right' THEN
+                RETURN;
+            END IF;
+
+            IF v_seeker_id IS NOT NULL AND v_giver_id IS NOT NULL AND v_job_id IS NOT NULL THEN
+                -- Has the other side already swiped right on this pair?
+                IF p_target_type = 'job' THEN
+                    PERFORM 1 FROM swipes
+                    WHERE user_id = v_giver_user_id AND target_id = v_seeker_id
+                    AND target_type = 'job_seeker' AND direction = 'right'
+                    AND job_id = v_job_id;
+                ELSE
+                    PERFORM 1 FROM swipes s JOIN jobs j ON j.id = s.target_id
+                    WHERE s.user_id = v_seeker_user_id AND s.target_type = 'job'
+                    AND s.direction = 'right' AND s.target_id = v_job_id
+                    AND j.job_giver_id = v_giver_id;
+                END IF;
+
+                IF FOUND THEN
+                    PERFORM 1 FROM matches
+                    WHERE job_seeker_id = v_seeker_id AND job_giver_id = v_giver_id
+                    AND job_id = v_job_id;
+                    IF FOUND THEN
+                        outcome := 'exists';
+                    ELSE
+                        UPDATE job_givers SET credits = credits - p_credits
+                        WHERE id = v_giver_id AND credits >= p_credits;
+                        IF NOT FOUND THEN
+                            outcome := 'insufficient_credits';
+                        ELSE
+                            INSERT INTO matches (job_seeker_id, job_giver_id, job_id)
+                            VALUES (v_seeker_id, v_giver_id, v_job_id)
+                            RETURNING id INTO match_id;
+                            UPDATE job_seekers SET credits = credits + p_credits
+                            WHERE id = v_seeker_id;
+                            INSERT INTO credit_transactions
+                                (user_id, amount, transaction_type, description)
+                            VALUES
+                                (v_giver_user_id, -p_credits, 'match',
+                                 p_credits || ' credits used for match'),
+                                (v_seeker_user_id, p_credits, 'credit', 'Match credit');
+                            outcome := 'match';
+                            match_job_id := v_job_id;
+                            match_job_giver_id := v_giver_id;
+                            match_job_seeker_id := v_seeker_id;
+                        END IF;
+                    END IF;
+                END IF;
+            END IF;
+
+            -- A seeker's first right swipe on a job counts as pending interest
+            -- while the pair has no match; a match clears it, including one
+            -- made by the seeker's own repeat swipe after the pair's earlier
+            -- match was deleted (the same rule as backfill_pending_interest)
+            IF p_target_type = 'job' AND outcome <> 'match' AND v_seeker_id IS NOT NULL THEN
+                UPDATE jobs SET pending_interest_count = pending_interest_count + 1
+                WHERE id = p_target_id AND NOT EXISTS (
+                    SELECT 1 FROM swipes
+                    WHERE user_id = p_user_id AND target_type = 'job' AND target_id = p_target_id
+                    AND direction = 'right' AND id <> swipe_id
+                ) AND NOT EXISTS (
+                    SELECT 1 FROM matches
+                    WHERE job_id = p_target_id AND job_seeker_id = v_seeker_id
+                );
+            ELSIF outcome = 'match' AND (p_target_type = 'job_seeker' OR EXISTS (
+                SELECT 1 FROM swipes
+                WHERE user_id = p_user_id AND target_type = 'job' AND target_id = p_target_id
+                AND direction = 'right' AND id <> swipe_id
+            )) THEN
+                UPDATE jobs SET pending_interest_count = GREATEST(pending_interest_count - 1, 0)
+                WHERE id = v_job_id;
+            END IF;
+        END;
+        $$
+        """,
+        # Correct the drift the old rule left behind
+        backfill_pending_interest,
+    ]),
+]
+
+
+def _ensure_version_table(cursor):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+
+def _applied_versions(cursor):
+    cursor.execute("SELECT version FROM schema_version")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def pending_migrations(applied, target_version=None):
+    return [m for m in sorted(MIGRATIONS, key=lambda m: m.version)
+            if m.version not in applied
+            and (target_version is None or m.version <= target_version)]
+
+
+def _execute(cursor, statement):
+    if callable(statement):
+        statement(cursor)
+    else:
+        cursor.execute(statement)
+
+
+def _apply(conn, migration):
+    cursor = conn.cursor()
+    try:
+        if migration.transactional:
+            for statement in migration.statements:
+                _execute(cursor, statement)
+        else:
+            conn.autocommit = True
+            try:
+                for statement in migration.statements:
+                    _execute(cursor, statement)
+            finally:
+                conn.autocommit = False
+
+        cursor.execute(
+            "INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+            (migration.version, migration.description)
+        )
+        conn.commit()
+    finally:
+        cursor.close()
+
+
+def run_migrations(conn, target_version=None):
+    """Apply pending migrations (up to target_version, if given) on the given connection.
+
+    Returns the number of migrations applied. The advisory lock makes
+    concurrent callers wait for each other; whoever gets the lock second
+    re-reads schema_version and finds nothing left to do.
+    """
+    cursor = conn.cursor()
+    applied_count = 0
+    try:
+        _ensure_version_table(cursor)
+        conn.commit()
+
+        if not pending_migrations(_applied_versions(cursor), target_version):
+            conn.commit()
+            return 0
+
+        # Index builds and waiting for another process's migrations can easily
+        # outlast the pool's default statement_timeout
+        cursor.execute("SET statement_timeout = 0")
+        cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_KEY,))
+        conn.commit()
+        try:
+            for migration in pending_migrations(_applied_versions(cursor), target_version):
+                print(f"Applying migration {migration.version}: {migration.description}")
+                _apply(conn, migration)
+                applied_count += 1
+        finally:
+            conn.rollback()
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_KEY,))
+            cursor.execute("RESET statement_timeout")
+            conn.commit()
+    except psycopg2.Error as e:
+        conn.rollback()
+        print(f"Error applying migrations: {e}")
+        raise
+    finally:
+        cursor.close()
+    return applied_count
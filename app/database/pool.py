@@ -0,0 +1,211 @@
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from psycopg2 import extensions
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the checkout timeout"""
+
+
+class ConnectionPool:
+    """Thread-safe PostgreSQL connection pool.
+
+    Connections are handed out by getconn() and returned with putconn().
+    Idle connections are health-checked before reuse, reaped once they have
+    been idle longer than max_idle, and retired once they are older than
+    max_lifetime so the server can rebalance.
+    """
+
+    def __init__(self, dsn, min_size=1, max_size=10, max_idle=300, max_lifetime=3600,
+                 timeout=30, check_after=30, connect_kwargs=None, name="primary"):
+        self.dsn = dsn
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size, self.min_size)
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.check_after = check_after
+        self.connect_kwargs = connect_kwargs or {}
+        self.name = name
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (conn, created_at, last_used), most recently used on the right
+        self._in_use = {}     # id(conn) -> (conn, created_at)
+        self._opening = 0     # connections being opened outside the lock
+        self._closed = False
+        self._last_reap = time.monotonic()
+
+        for _ in range(self.min_size):
+            try:
+                conn = self._connect()
+            except psycopg2.Error as e:
+                print(f"Pool '{self.name}': could not pre-open connection: {e}")
+                break
+            now = time.monotonic()
+            self._idle.append((conn, now, now))
+
+    def _connect(self):
+        return psycopg2.connect(self.dsn, **self.connect_kwargs)
+
+    @property
+    def size(self):
+        with self._cond:
+            return len(self._idle) + len(self._in_use) + self._opening
+
+    def stats(self):
+        """Return a snapshot of the pool state for diagnostics"""
+        with self._cond:
+            return {
+                "name": self.name,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "max_size": self.max_size,
+            }
+
+    def getconn(self):
+        """Check out a connection, opening a new one if the pool has room"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            candidate = None
+            open_new = False
+            with self._cond:
+                if self._closed:
+                    raise psycopg2.InterfaceError("connection pool is closed")
+                self._reap_locked()
+                if self._idle:
+                    candidate = self._idle.pop()
+                    # Reserve the slot while the health check runs outside the lock
+                    self._in_use[id(candidate[0])] = (candidate[0], candidate[1])
+                elif len(self._in_use) + self._opening < self.max_size:
+                    open_new = True
+                    self._opening += 1
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeout(
+                            f"Pool '{self.name}' exhausted ({self.max_size} connections in use)"
+                        )
+                    self._cond.wait(remaining)
+                    continue
+
+            if open_new:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._opening -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._opening -= 1
+                    self._in_use[id(conn)] = (conn, time.monotonic())
+                return conn
+
+            conn, created_at, last_used = candidate
+            if self._is_usable(conn, created_at, last_used):
+                return conn
+            self._discard(conn)
+
+    def putconn(self, conn, discard=False):
+        """Return a connection to the pool, resetting any open transaction"""
+        with self._cond:
+            entry = self._in_use.get(id(conn))
+        if entry is None:
+            # Not one of ours (or already returned); just make sure it is closed.
+            if not conn.closed:
+                conn.close()
+            return
+
+        created_at = entry[1]
+        if not discard and not conn.closed:
+            try:
+                status = conn.get_transaction_status()
+                if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                    discard = True
+                elif status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                if conn.autocommit:
+                    conn.autocommit = False
+            except psycopg2.Error:
+                discard = True
+
+        if discard or conn.closed or self._expired(created_at):
+            self._discard(conn)
+            return
+
+        with self._cond:
+            self._in_use.pop(id(conn), None)
+            if self._closed:
+                conn.close()
+            else:
+                self._idle.append((conn, created_at, time.monotonic()))
+            self._cond.notify()
+
+    def owns(self, conn):
+        with self._cond:
+            return id(conn) in self._in_use
+
+    def closeall(self):
+        """Close every idle connection and refuse further checkouts"""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn = self._idle.popleft()[0]
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._cond.notify_all()
+
+    def _expired(self, created_at):
+        return self.max_lifetime and time.monotonic() - created_at > self.max_lifetime
+
+    def _is_usable(self, conn, created_at, last_used):
+        if conn.closed or self._expired(created_at):
+            return False
+        if time.monotonic() - last_used < self.check_after:
+            return True
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error as e:
+            print(f"Pool '{self.name}': dropping stale connection: {e}")
+            return False
+
+    def _discard(self, conn):
+        with self._cond:
+            self._in_use.pop(id(conn), None)
+            self._cond.notify()
+        try:
+            if not conn.closed:
+                conn.close()
+        except Exception:
+            pass
+
+    def _reap_locked(self):
+        """Close connections that sat idle too long, keeping min_size around"""
+        now = time.monotonic()
+        if now - self._last_reap < 5:
+            return
+        self._last_reap = now
+        kept = deque()
+        total = len(self._idle) + len(self._in_use)
+        # Oldest-used connections are on the left
+        while self._idle:
+            conn, created_at, last_used = self._idle.popleft()
+            stale = (self.max_idle and now - last_used > self.max_idle and total > self.min_size)
+            if stale or self._expired(created_at) or conn.closed:
+                total -= 1
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            else:
+                kept.append((conn, created_at, last_used))
+        self._idle = kept
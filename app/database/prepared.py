@@ -0,0 +1,128 @@
+import hashlib
+import os
+import re
+import threading
+import weakref
+
+import psycopg2
+
+# Server-side prepared statements are per backend session. Behind PgBouncer in
+# transaction-pooling mode consecutive transactions may land on different
+# backends, so set DB_PREPARED_STATEMENTS=false there.
+_enabled = os.environ.get("DB_PREPARED_STATEMENTS", "true").lower() in ("1", "true", "yes")
+
+# Upper bound on statements prepared per connection (each one holds a plan)
+MAX_PREPARED_PER_CONNECTION = int(os.environ.get("DB_PREPARED_MAX", 200))
+
+_PLACEHOLDER_RE = re.compile(r"%%|%s|%")
+
+_lock = threading.Lock()
+_parsed = {}                               # query text -> (name, server text, param count) or None
+_prepared = weakref.WeakKeyDictionary()    # connection -> names prepared on it
+_statements = {}                           # name -> original query text, for instrumentation
+
+
+def prepared_statements_enabled():
+    return _enabled
+
+
+def disable_prepared_statements(reason):
+    global _enabled
+    if _enabled:
+        print(f"Disabling server-side prepared statements: {reason}")
+    _enabled = False
+
+
+def statement_for(name):
+    """Original SQL behind a prepared statement name, if known"""
+    return _statements.get(name)
+
+
+def _parse(query):
+    """Turn a %s-style query into (name, $n-style text, param count)"""
+    if query in _parsed:
+        return _parsed[query]
+
+    count = 0
+    supported = True
+
+    def replace(match):
+        nonlocal count, supported
+        token = match.group(0)
+        if token == "%%":
+            return "%"
+        if token == "%s":
+            count += 1
+            return f"${count}"
+        # %(name)s and other formats are not supported
+        supported = False
+        return token
+
+    text = _PLACEHOLDER_RE.sub(replace, query).strip().rstrip(";")
+    if supported:
+        name = "ps_" + hashlib.md5(query.encode("utf-8")).hexdigest()[:16]
+        result = (name, text, count)
+        _statements[name] = query
+    else:
+        result = None
+    with _lock:
+        _parsed[query] = result
+    return result
+
+
+def _prepare(cursor, conn, name, text):
+    # PREPARE inside the caller's transaction is guarded by a savepoint so a
+    # failure does not abort the transaction; the extra round trip happens
+    # once per statement per connection.
+    try:
+        if conn.autocommit:
+            cursor.execute(f"PREPARE {name} AS {text}\n")
+        else:
+            cursor.execute(f"SAVEPOINT prepare_statement; PREPARE {name} AS {text}\n; "
+                           "RELEASE SAVEPOINT prepare_statement")
+        return True
+    except psycopg2.Error as e:
+        if not conn.autocommit:
+            cursor.execute("ROLLBACK TO SAVEPOINT prepare_statement; RELEASE SAVEPOINT prepare_statement")
+        if e.pgcode == "42P05":
+            # Already prepared in this session; names are derived from the SQL text
+            return True
+        print(f"Could not prepare statement {name}: {e}")
+        return False
+
+
+def execute_prepared(cursor, query, params=None):
+    """Execute a %s-style query as a named server-side prepared statement.
+
+    The statement is prepared the first time it runs on a connection and
+    executed by name afterwards, skipping parse and (once Postgres settles on
+    a generic plan) planning. Falls back to a plain execute when prepared
+    statements are disabled or the query cannot be converted.
+    """
+    if not _enabled or not isinstance(query, str):
+        return cursor.execute(query, params)
+
+    parsed = _parse(query)
+    if parsed is None:
+        return cursor.execute(query, params)
+    name, text, count = parsed
+
+    conn = cursor.connection
+    with _lock:
+        names = _prepared.setdefault(conn, set())
+    if name not in names:
+        if len(names) >= MAX_PREPARED_PER_CONNECTION or not _prepare(cursor, conn, name, text):
+            return cursor.execute(query, params)
+        names.add(name)
+
+    statement = f"EXECUTE {name}"
+    if count:
+        statement += " (" + ", ".join(["%s"] * count) + ")"
+    try:
+        return cursor.execute(statement, params)
+    except psycopg2.Error as e:
+        if e.pgcode == "26000":
+            # Prepared on a different backend than this transaction is using
+            names.discard(name)
+            disable_prepared_statements("statement missing on server (PgBouncer transaction pooling?)")
+        raise
@@ -0,0 +1,102 @@
+import threading
+
+import psycopg2
+
+# Tables whose columns the models need to know about
+TRACKED_TABLES = ["users", "job_seekers", "job_givers", "jobs", "swipes", "matches",
+                  "swipe_seen_sets", "recommendation_queue"]
+# Server-side functions the models call when they exist
+TRACKED_FUNCTIONS = ["record_swipe"]
+
+_columns = None
+_extensions = None
+_functions = None
+_lock = threading.Lock()
+
+
+def refresh_capabilities(conn):
+    """Read the tracked tables' columns, the installed extensions and the
+    tracked functions into the registry.
+
+    Called once after migrations have run; models then answer has_column(),
+    has_extension() and has_function() from memory instead of querying the
+    catalogs on every request.
+    """
+    global _columns, _extensions, _functions
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            """
+            SELECT table_name, column_name
+            FROM information_schema.columns
+            WHERE table_schema = current_schema()
+            AND table_name = ANY(%s)
+            """,
+            (TRACKED_TABLES,)
+        )
+        columns = {}
+        for table_name, column_name in cursor.fetchall():
+            columns.setdefault(table_name, set()).add(column_name)
+        cursor.execute("SELECT extname FROM pg_extension")
+        extensions = {row[0] for row in cursor.fetchall()}
+        cursor.execute(
+            """
+            SELECT p.proname
+            FROM pg_proc p
+            JOIN pg_namespace n ON n.oid = p.pronamespace
+            WHERE n.nspname = current_schema()
+            AND p.proname = ANY(%s)
+            """,
+            (TRACKED_FUNCTIONS,)
+        )
+        functions = {row[0] for row in cursor.fetchall()}
+        conn.commit()
+        with _lock:
+            _columns = columns
+            _extensions = extensions
+            _functions = functions
+        return True
+    except psycopg2.Error as e:
+        conn.rollback()
+        print(f"Error loading schema capabilities: {e}")
+        return False
+    finally:
+        cursor.close()
+
+
+def _ensure_loaded():
+    if _columns is not None:
+        return True
+    # Late import: connection imports this module during start-up
+    from app.database.connection import checkout_connection, release_connection
+    with _lock:
+        if _columns is not None:
+            return True
+    conn = checkout_connection()
+    if conn is None:
+        return False
+    try:
+        return refresh_capabilities(conn)
+    finally:
+        release_connection(conn)
+
+
+def has_column(table, column):
+    """True if the live schema has table.column (as of the last refresh)"""
+    if not _ensure_loaded():
+        return False
+    return column in _columns.get(table, ())
+
+
+def has_extension(name):
+    """True if the extension is installed in the database (as of the last refresh)"""
+    if not _ensure_loaded():
+        return False
+    return name in _extensions
+
+
+def has_function(name):
+    """True if the current schema has the tracked function (as of the last refresh)"""
+    if not _ensure_loaded():
+        return False
+    return name in _functions
@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from app.database.instrumentation import current_scope
+
+# Per-call-site statement time budgets in milliseconds. Statements that run
+# longer are cancelled by the server (SQLSTATE 57014). Override a budget with
+# DB_TIMEOUT_<NAME>_MS, e.g. DB_TIMEOUT_FEED_MS=1500.
+DEFAULT_BUDGETS_MS = {
+    "feed": 3000,
+    "match_list": 2000,
+    "admin_aggregate": 5000,
+}
+
+# How long a last-good result may be served in degraded mode
+LAST_GOOD_MAX_AGE = int(os.environ.get("DB_LAST_GOOD_MAX_AGE", 900))
+LAST_GOOD_MAX_ENTRIES = int(os.environ.get("DB_LAST_GOOD_MAX_ENTRIES", 2000))
+
+
+def budget_ms(name):
+    env_value = os.environ.get(f"DB_TIMEOUT_{name.upper()}_MS")
+    if env_value:
+        try:
+            return int(env_value)
+        except ValueError:
+            pass
+    return DEFAULT_BUDGETS_MS[name]
+
+
+def is_timeout(error):
+    """True if a psycopg2 error is a statement cancelled by statement_timeout"""
+    return getattr(error, "pgcode", None) == "57014"
+
+
+@contextmanager
+def statement_budget(cursor, name):
+    """Cancel statements run in the block once they exceed the named budget.
+
+    Uses SET LOCAL, so the budget ends with the transaction. Inside a unit of
+    work the transaction carries on after the block, so the session default
+    is restored along with the unit's next statement.
+    """
+    cursor.execute(f"SET LOCAL statement_timeout = {int(budget_ms(name))}")
+    try:
+        yield
+    finally:
+        queue = getattr(cursor, "queue_statement", None)
+        if queue is not None:
+            queue("SET LOCAL statement_timeout = DEFAULT")
+
+
+class LastGoodCache:
+    """Bounded process-wide cache of the last successful result per key"""
+
+    def __init__(self, max_entries, max_age):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        """Return (value, age in seconds), or (None, None) if missing or too old"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None, None
+        value, stored_at = entry
+        age = time.time() - stored_at
+        if age > self.max_age:
+            return None, None
+        return value, age
+
+
+_last_good = LastGoodCache(LAST_GOOD_MAX_ENTRIES, LAST_GOOD_MAX_AGE)
+
+
+def remember(key, value):
+    """Record a successful result for degraded mode and return it"""
+    _last_good.put(key, value)
+    return value
+
+
+def fallback(key, label, default):
+    """Serve the last good result for key after a timeout or lost connection"""
+    value, age = _last_good.get(key)
+    if value is None:
+        notice = f"{label} is temporarily unavailable"
+        value = default
+    else:
+        notice = f"Showing {label} from {int(age)}s ago"
+        if isinstance(value, list):
+            value = list(value)
+    print(f"DEGRADED: {notice} ({key[0]})")
+    scope = current_scope()
+    if scope is not None:
+        scope.degraded.append(notice)
+    return value
+
+
+def degraded_notices():
+    """Degraded-mode notices raised so far while rendering the current page"""
+    scope = current_scope()
+    return list(scope.degraded) if scope is not None else []
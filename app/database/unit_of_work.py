@@ -0,0 +1,334 @@
+import contextvars
+import functools
+import itertools
+import re
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+
+from app.database.prepared import statement_for
+
+try:
+    from streamlit.runtime.scriptrunner import RerunException, StopException
+    # Streamlit's st.rerun()/st.stop() end the script by raising these
+    _CONTROL_FLOW = (RerunException, StopException)
+except ImportError:
+    _CONTROL_FLOW = ()
+
+_current_unit = contextvars.ContextVar("unit_of_work", default=None)
+# (read_from_primary, on_write) for units started without explicit settings
+_session = contextvars.ContextVar("unit_of_work_session", default=(False, None))
+
+# Database functions that write (e.g. record_swipe(), migration 19)
+_WRITE_RE = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE|TRUNCATE|CREATE|ALTER|DROP)\b"
+                       r"|\brecord_swipe\s*\(", re.I)
+_EXECUTE_RE = re.compile(r"\bEXECUTE\s+(ps_\w+)")
+
+
+def _is_write(query):
+    match = _EXECUTE_RE.search(query)
+    if match and statement_for(match.group(1)):
+        query = statement_for(match.group(1))
+    return _WRITE_RE.search(query) is not None
+
+
+def current_unit_of_work():
+    return _current_unit.get()
+
+
+def reads_from_primary():
+    """Whether the current session scope keeps read-only reads off the replicas"""
+    return _session.get()[0]
+
+
+def keep_reads_on_primary():
+    """Serve the rest of the current session scope's reads from the primary.
+
+    For an on_write callback: the reads that follow a write in the same
+    session scope (the rest of the rerun that wrote) must not go to a
+    replica that has not replayed it yet.
+    """
+    _, on_write = _session.get()
+    _session.set((True, on_write))
+
+
+def run_detached(func, *args):
+    """Call func outside any enclosing unit of work.
+
+    For work handed to another thread in a copy of the caller's context: the
+    session scope and query scope carry over, but the caller's unit (and its
+    connection) stays with the caller.
+    """
+    token = _current_unit.set(None)
+    try:
+        return func(*args)
+    finally:
+        _current_unit.reset(token)
+
+
+@contextmanager
+def session_scope(read_from_primary=False, on_write=None):
+    """Settings for the units of work started inside the block.
+
+    Opens no connection or transaction itself: each write action still runs
+    as its own unit. read_from_primary also applies to read-only reads made
+    outside any unit.
+    """
+    token = _session.set((read_from_primary, on_write))
+    try:
+        yield
+    finally:
+        _session.reset(token)
+
+
+class UnitOfWork:
+    """One pooled connection and one transaction shared by everything in a block.
+
+    While a unit is active, get_connection() hands out SharedConnection
+    handles onto the same physical connection instead of checking out new
+    ones. Each handle gets its own savepoint, so a model that calls
+    conn.rollback() after a failure only undoes its own statements, and
+    conn.commit() on a handle is deferred until the unit itself commits.
+
+    Savepoint bookkeeping costs no extra round trips: SAVEPOINT and RELEASE
+    SAVEPOINT are queued and sent in front of the next statement.
+
+    Read-only reads (get_connection(read_only=True)) may go to a replica
+    until the unit first needs the primary; after that they share the
+    unit's connection so the unit reads its own writes.
+    """
+
+    def __init__(self, checkout, checkin, read_from_primary=False, on_write=None):
+        self._checkout = checkout
+        self._checkin = checkin
+        self.read_from_primary = read_from_primary
+        self._on_write = on_write
+        self.conn = None
+        self.failed = False
+        self.wrote = False
+        self._handles = []   # active SharedConnection handles, outermost first
+        self._prefix = []    # statements to send ahead of the next execute
+        self._names = itertools.count(1)
+
+    def can_read_from_replica(self):
+        return not self.read_from_primary and self.conn is None
+
+    def connection(self):
+        """Return a new handle, checking out the physical connection on first use"""
+        if self.conn is None:
+            self.conn = self._checkout()
+            if self.conn is None:
+                return None
+        elif self.conn.closed:
+            self.failed = True
+            return None
+        handle = SharedConnection(self, f"uow_{next(self._names)}")
+        self._handles.append(handle)
+        return handle
+
+    def _establish(self, handle):
+        """Queue savepoints for this handle and any enclosing handle still pending"""
+        for active in self._handles:
+            if active._savepoint is None and not active._released:
+                self._prefix.append(f"SAVEPOINT {active.name}")
+                active._savepoint = active.name
+            if active is handle:
+                break
+
+    def _take_prefix(self):
+        if not self._prefix:
+            return ""
+        prefix = "; ".join(self._prefix) + "; "
+        self._prefix = []
+        return prefix
+
+    def _flush_prefix(self, cursor):
+        prefix = self._take_prefix()
+        if prefix:
+            cursor.execute(prefix)
+
+    def _release(self, handle):
+        if handle in self._handles:
+            self._handles.remove(handle)
+        if handle._savepoint is not None and not self.failed:
+            self._prefix.append(f"RELEASE SAVEPOINT {handle._savepoint}")
+
+    def _rollback_to(self, handle):
+        if handle._savepoint is None:
+            # Nothing was executed through this handle (or anything nested in it)
+            return
+        # Pending RELEASEs all belong to savepoints nested inside this one,
+        # which ROLLBACK TO destroys anyway.
+        self._prefix = []
+        if handle in self._handles:
+            for nested in self._handles[self._handles.index(handle) + 1:]:
+                nested._savepoint = None
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(f"ROLLBACK TO SAVEPOINT {handle._savepoint}")
+            cursor.close()
+        except psycopg2.Error as e:
+            print(f"Error rolling back to savepoint {handle._savepoint}: {e}")
+            self.failed = True
+
+    def finish(self, commit):
+        """Commit (or roll back) the shared transaction and return the connection"""
+        if self.conn is None:
+            return
+        conn = self.conn
+        self.conn = None
+        self._handles = []
+        self._prefix = []
+        try:
+            if conn.closed:
+                return
+            status = conn.get_transaction_status()
+            if status == extensions.TRANSACTION_STATUS_INERROR:
+                if commit:
+                    print("Unit of work left in a failed transaction; rolling back")
+                conn.rollback()
+            elif commit and not self.failed:
+                conn.commit()
+                if self.wrote and self._on_write is not None:
+                    self._on_write()
+            else:
+                conn.rollback()
+        except psycopg2.Error as e:
+            print(f"Error finishing unit of work: {e}")
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                pass
+        finally:
+            self._checkin(conn)
+
+
+class SharedConnection:
+    """A model's view of the unit-of-work connection (see UnitOfWork)"""
+
+    def __init__(self, unit, name):
+        self._unit = unit
+        self.name = name
+        self._savepoint = None
+        self._released = False
+
+    @property
+    def closed(self):
+        conn = self._unit.conn
+        return conn is None or conn.closed
+
+    def cursor(self, *args, **kwargs):
+        return SharedCursor(self, self._unit.conn.cursor(*args, **kwargs))
+
+    def commit(self):
+        # The unit commits once when it finishes
+        pass
+
+    def rollback(self):
+        self._unit._rollback_to(self)
+
+    def close(self):
+        self.release()
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._unit._release(self)
+
+    def __getattr__(self, name):
+        return getattr(self._unit.conn, name)
+
+
+class SharedCursor:
+    """Cursor wrapper that sends queued savepoint statements with the next query"""
+
+    def __init__(self, handle, cursor):
+        self._handle = handle
+        self._cursor = cursor
+
+    def _prepare(self, query):
+        unit = self._handle._unit
+        unit._establish(self._handle)
+        if isinstance(query, str):
+            return unit._take_prefix() + query
+        unit._flush_prefix(self._cursor)
+        return query
+
+    def execute(self, query, vars=None):
+        if isinstance(query, str) and not self._handle._unit.wrote and _is_write(query):
+            self._handle._unit.wrote = True
+        return self._cursor.execute(self._prepare(query), vars)
+
+    def executemany(self, query, vars_list):
+        unit = self._handle._unit
+        unit.wrote = True
+        unit._establish(self._handle)
+        unit._flush_prefix(self._cursor)
+        return self._cursor.executemany(query, vars_list)
+
+    def queue_statement(self, statement):
+        """Send a statement along with the unit's next query"""
+        self._handle._unit._prefix.append(statement)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._cursor.close()
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+@contextmanager
+def unit_of_work(read_from_primary=None, on_write=None):
+    """Run the block as one write action: one connection, one commit.
+
+    Nested blocks join the outermost unit. The unit commits when the block
+    exits normally or through Streamlit's rerun/stop control flow, and rolls
+    back on anything else, KeyboardInterrupt and SystemExit included.
+
+    read_from_primary keeps read-only reads off the replicas for the whole
+    unit; on_write is called after a commit that included writes. Both
+    default to the enclosing session_scope().
+    """
+    unit = _current_unit.get()
+    if unit is not None:
+        yield unit
+        return
+
+    session_primary, session_on_write = _session.get()
+    if read_from_primary is None:
+        read_from_primary = session_primary
+    if on_write is None:
+        on_write = session_on_write
+
+    # Late import: connection imports this module
+    from app.database.connection import checkout_connection, release_connection
+    unit = UnitOfWork(checkout_connection, release_connection, read_from_primary, on_write)
+    token = _current_unit.set(unit)
+    commit = False
+    try:
+        yield unit
+        commit = True
+    except _CONTROL_FLOW:
+        commit = True
+        raise
+    finally:
+        _current_unit.reset(token)
+        unit.finish(commit)
+
+
+def write_action(func):
+    """Run a model write method as its own unit of work (or as part of the
+    caller's, if one is active)"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with unit_of_work():
+            return func(*args, **kwargs)
+    return wrapper
@@ -1,10 +1,14 @@
 import streamlit as st
 import pandas as pd
-from app.database.connection import get_connection
+import psycopg2
+from app.database.connection import get_connection, release_connection
+from app.database.timeouts import degraded_notices, fallback, is_timeout, remember, statement_budget
+from app.models.async_repository import fetch_concurrently
 from app.models.job_giver import JobGiver
 from app.models.credit_package import CreditPackage # Import the new model
 from app.models.user import User
 from app.models.job import Job
+from app.models.match import Match
 
 def admin_dashboard():
     """Admin dashboard for managing the platform"""
@@ -32,128 +36,135 @@ def admin_dashboard():
     elif admin_menu == "System Settings":
         system_settings()
 
-def show_admin_dashboard():
-    """Show admin dashboard with key metrics"""
-    st.header("Platform Overview")
+OVERVIEW_CACHE_KEY = ("admin_overview",)
+
+def _load_overview_metrics(cursor):
+    """Platform-wide counts for the admin overview"""
+    # Get user counts
+    cursor.execute("""
+        SELECT 
+            COUNT(*) FILTER (WHERE user_type = 'job_seeker') AS job_seekers,
+            COUNT(*) FILTER (WHERE user_type = 'job_giver') AS job_givers
+        FROM users
+        WHERE user_type != 'admin'
+    """)
     
-    # Get database connection
-    conn = get_connection()
+    job_seekers_count, job_givers_count = cursor.fetchone()
+    
+    # Get job counts
+    cursor.execute("SELECT COUNT(*) FROM jobs")
+    jobs_count = cursor.fetchone()[0]
+    
+    # Get match counts
+    cursor.execute("SELECT COUNT(*) FROM matches")
+    matches_count = cursor.fetchone()[0]
+    
+    # Get credit transaction sum
+    cursor.execute("""
+        SELECT 
+            SUM(amount) FILTER (WHERE transaction_type = 'purchase') AS purchased,
+            SUM(amount) FILTER (WHERE transaction_type = 'redemption') AS redeemed
+        FROM credit_transactions
+    """)
+    
+    credit_sums = cursor.fetchone()
+    
+    # Get pending redemption requests count
+    cursor.execute("""
+        SELECT COUNT(*) FROM redemption_requests WHERE status = 'pending'
+    """)
+    pending_redemptions = cursor.fetchone()[0]
+    
+    return {
+        "job_seekers": job_seekers_count,
+        "job_givers": job_givers_count,
+        "jobs": jobs_count,
+        "matches": matches_count,
+        "credits_purchased": credit_sums[0] or 0,
+        "credits_redeemed": abs(credit_sums[1] or 0),
+        "pending_redemptions": pending_redemptions,
+    }
+
+def _overview_metrics():
+    """Overview counts under the admin aggregate budget; the last good numbers
+    if they overrun, None if there are none"""
+    conn = get_connection(read_only=True)
     if conn is None:
         st.error("Could not connect to database")
-        return
+        return None
     
     try:
         cursor = conn.cursor()
-        
-        # Get user counts
-        cursor.execute("""
-            SELECT 
-                COUNT(*) FILTER (WHERE user_type = 'job_seeker') AS job_seekers,
-                COUNT(*) FILTER (WHERE user_type = 'job_giver') AS job_givers
-            FROM users
-            WHERE user_type != 'admin'
-        """)
-        
-        user_counts = cursor.fetchone()
-        job_seekers_count, job_givers_count = user_counts
-        
-        # Get job counts
-        cursor.execute("SELECT COUNT(*) FROM jobs")
-        jobs_count = cursor.fetchone()[0]
-        
-        # Get match counts
-        cursor.execute("SELECT COUNT(*) FROM matches")
-        matches_count = cursor.fetchone()[0]
-        
-        # Get credit transaction sum
-        cursor.execute("""
-            SELECT 
-                SUM(amount) FILTER (WHERE transaction_type = 'purchase') AS purchased,
-                SUM(amount) FILTER (WHERE transaction_type = 'redemption') AS redeemed
-            FROM credit_transactions
-        """)
-        
-        credit_sums = cursor.fetchone()
-        credits_purchased = credit_sums[0] or 0
-        credits_redeemed = abs(credit_sums[1] or 0)
-        
-        # Get pending redemption requests count
-        cursor.execute("""
-            SELECT COUNT(*) FROM redemption_requests WHERE status = 'pending'
-        """)
-        pending_redemptions = cursor.fetchone()[0]
-        
-        # Display metrics
-        col1, col2, col3 = st.columns(3)
-        col1.metric("Job Seekers", job_seekers_count)
-        col2.metric("Job Givers", job_givers_count)
-        col3.metric("Total Jobs", jobs_count)
-        
-        col1, col2, col3 = st.columns(3)
-        col1.metric("Total Matches", matches_count)
-        col2.metric("Credits Purchased", credits_purchased)
-        col3.metric("Credits Redeemed", credits_redeemed)
-        
-        # Show pending redemption requests with a warning color if there are any
-        if pending_redemptions > 0:
-            st.warning(f"⚠️ **{pending_redemptions} Pending Redemption Requests** - [View Requests](/?admin_menu=Redemption%20Requests)")
-            if st.button("Go to Redemption Requests"):
-                st.session_state.admin_menu = "Redemption Requests"
-                st.rerun()
-        
-        # Recent activity
-        st.subheader("Recent Activity")
-        
-        # Recent registrations
-        cursor.execute("""
-            SELECT username, user_type, created_at
-            FROM users
-            WHERE user_type != 'admin'
-            ORDER BY created_at DESC
-            LIMIT 5
-        """)
-        
-        recent_users = cursor.fetchall()
-        if recent_users:
-            st.write("Recent Registrations:")
-            user_df = pd.DataFrame(
-                recent_users,
-                columns=["Username", "User Type", "Registered At"]
-            )
-            user_df["User Type"] = user_df["User Type"].apply(
-                lambda x: "Candidate" if x == "job_seeker" else "Recruiter"
-            )
-            st.dataframe(user_df)
-        
-        # Recent matches
-        cursor.execute("""
-            SELECT 
-                m.created_at,
-                js.full_name AS job_seeker,
-                jg.company_name AS company,
-                j.title AS job_title
-            FROM matches m
-            JOIN job_seekers js ON m.job_seeker_id = js.id
-            JOIN job_givers jg ON m.job_giver_id = jg.id
-            JOIN jobs j ON m.job_id = j.id
-            ORDER BY m.created_at DESC
-            LIMIT 5
-        """)
-        
-        recent_matches = cursor.fetchall()
-        if recent_matches:
-            st.write("Recent Matches:")
-            match_df = pd.DataFrame(
-                recent_matches,
-                columns=["Matched At", "Candidate", "Company", "Job Title"]
-            )
-            st.dataframe(match_df)
-        
-    except Exception as e:
-        st.error(f"Error retrieving dashboard data: {e}")
+        with statement_budget(cursor, "admin_aggregate"):
+            return remember(OVERVIEW_CACHE_KEY, _load_overview_metrics(cursor))
+    except psycopg2.Error as e:
+        conn.rollback()
+        if not is_timeout(e):
+            st.error(f"Error retrieving dashboard data: {e}")
+            return None
+        return fallback(OVERVIEW_CACHE_KEY, "platform metrics", None)
     finally:
         cursor.close()
-        conn.close()
+        release_connection(conn)
+
+def show_admin_dashboard():
+    """Show admin dashboard with key metrics"""
+    st.header("Platform Overview")
+    
+    # The counts and the recent activity lists are independent reads
+    metrics, recent_users, recent_matches = fetch_concurrently(
+        (_overview_metrics,),
+        (User.get_recent_registrations, 5),
+        (Match.get_recent, 5),
+    )
+    for notice in degraded_notices():
+        st.warning(notice)
+    if metrics is None:
+        return
+    
+    pending_redemptions = metrics["pending_redemptions"]
+    
+    # Display metrics
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Job Seekers", metrics["job_seekers"])
+    col2.metric("Job Givers", metrics["job_givers"])
+    col3.metric("Total Jobs", metrics["jobs"])
+    
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Total Matches", metrics["matches"])
+    col2.metric("Credits Purchased", metrics["credits_purchased"])
+    col3.metric("Credits Redeemed", metrics["credits_redeemed"])
+    
+    # Show pending redemption requests with a warning color if there are any
+    if pending_redemptions > 0:
+        st.warning(f"⚠️ **{pending_redemptions} Pending Redemption Requests** - [View Requests](/?admin_menu=Redemption%20Requests)")
+        if st.button("Go to Redemption Requests"):
+            st.session_state.admin_menu = "Redemption Requests"
+            st.rerun()
+    
+    # Recent activity
+    st.subheader("Recent Activity")
+    
+    # Recent registrations
+    if recent_users:
+        st.write("Recent Registrations:")
+        user_df = pd.DataFrame(
+            recent_users,
+            columns=["Username", "User Type", "Registered At"]
+        )
+        user_df["User Type"] = user_df["User Type"].apply(
+            lambda x: "Candidate" if x == "job_seeker" else "Recruiter"
+        )
+        st.dataframe(user_df)
+    
+    # Recent matches
+    if recent_matches:
+        st.write("Recent Matches:")
+        match_df = pd.DataFrame(
+            recent_matches,
+            columns=["Matched At", "Candidate", "Company", "Job Title"]
+        )
+        st.dataframe(match_df)
 
 def manage_users():
     """Manage users section"""
@@ -492,7 +503,7 @@ def show_user_details(user_id):
         st.error(f"Error retrieving user details: {e}")
     finally:
         cursor.close()
-        conn.close()
+        release_connection(conn)
 
 def redemption_requests():
     """View and process redemption requests"""
@@ -616,14 +627,14 @@ def redemption_requests():
         st.error(f"Error retrieving redemption requests: {e}")
     finally:
         cursor.close()
-        conn.close()
+        release_connection(conn)
 
 def credit_transactions():
     """View credit transactions"""
     st.header("Credit Transactions")
     
     # Get database connection
-    conn = get_connection()
+    conn = get_connection(read_only=True)
     if conn is None:
         st.error("Could not connect to database")
         return
@@ -685,7 +696,7 @@ def credit_transactions():
         st.error(f"Error retrieving transactions: {e}")
     finally:
         cursor.close()
-        conn.close()
+        release_connection(conn)
 
 def system_settings():
     """System settings section"""
@@ -796,7 +807,7 @@ def system_settings():
                 if 'cursor_settings' in locals() and cursor_settings:
                     cursor_settings.close()
                 if conn_settings:
-                    conn_settings.close()
+                    release_connection(conn_settings)
     
     with settings_tab2_credit_packages:
         manage_credit_packages()
@@ -813,7 +824,7 @@ def system_settings():
         
         # System stats
         st.write("### System Statistics")
-        conn = get_connection()
+        conn = get_connection(read_only=True)
         if conn:
             try:
                 cursor = conn.cursor()
@@ -841,7 +852,7 @@ def system_settings():
                 st.error(f"Error retrieving system stats: {e}")
             finally:
                 cursor.close()
-                conn.close()
+                release_connection(conn)
 
 def manage_jobs():
     """Manage jobs section"""
@@ -910,7 +921,7 @@ def manage_jobs():
         st.error(f"Error retrieving jobs: {e}")
     finally:
         cursor.close()
-        conn.close()
+        release_connection(conn)
 
 def manage_credit_packages():
     """Manage credit packages section"""
@@ -1154,7 +1165,7 @@ def show_job_details(job_id):
         st.error(f"Error retrieving job details: {e}")
     finally:
         cursor.close()
-        conn.close()
+        release_connection(conn)
 
 def manage_admin_users():
     """Manage admin users section"""
@@ -1228,7 +1239,7 @@ def manage_admin_users():
         st.error(f"Error managing admin users: {e}")
     finally:
         cursor.close()
-        conn.close()
+        release_connection(conn)
 
 def manage_user_credits():
     """Manage user credits section"""
@@ -1473,4 +1484,4 @@ def manage_user_credits():
         st.error(f"Error managing user credits: {e}")
     finally:
         cursor.close()
-        conn.close()
\ No newline at end of file
+        release_connection(conn)
\ No newline at end of file
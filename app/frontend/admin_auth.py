@@ -1,6 +1,6 @@
 import streamlit as st
 from app.models.user import User
-from app.database.connection import get_connection
+from app.database.connection import get_connection, release_connection
 
 def admin_login_page():
     """Admin login page"""
@@ -181,7 +181,7 @@ def check_admin_exists():
                 except:
                     pass
             try:
-                conn.close()
+                release_connection(conn)
             except:
                 pass
 
@@ -200,7 +200,7 @@ def create_admin_user(username, email, password):
         return False, "Database connection error. Please check your connection settings."
     
     try:
-        conn.close()  # Just testing connection, close it right away
+        release_connection(conn)  # Just testing connection, hand it back right away
     except Exception:
         pass
     
@@ -1,6 +1,6 @@
 import streamlit as st
 from app.models.user import User
-from app.database.connection import get_connection
+from app.database.connection import get_connection, release_connection
 
 def handle_auth_flow():
     """Manages and displays the current authentication view."""
@@ -125,7 +125,7 @@ def login_page():
                     st.error(f"Error creating admin account: {str(e)}")
                 finally:
                     cursor.close()
-                    conn.close()
+                    release_connection(conn)
 
     # Add JavaScript for admin creation access (Ctrl+Alt+A)
     st.markdown("""
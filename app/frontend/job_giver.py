@@ -6,7 +6,11 @@ from app.models.job import Job
 from app.models.job_seeker import JobSeeker
 from app.models.swipe import Swipe
 from app.models.match import Match
-from app.database.connection import get_connection
+from app.models.async_repository import fetch_concurrently
+from app.database.connection import get_connection, release_connection
+from app.database.timeouts import degraded_notices
+from app.utils.feed_buffer import FeedBuffer
+from app.utils.gazetteer import RADIUS_OPTIONS_KM, format_radius
 from app.models.credit_package import CreditPackage
 from app.models.payment import Payment
 import stripe
@@ -536,6 +540,45 @@ def jobs_section(job_giver):
                 #     st.info("No candidates have expressed interest in this job yet.")
     print("JOBS_SECTION_DEBUG: Finished rendering tabs in jobs_section.")
 
+# Candidates fetched per feed batch, and how few may remain before the next
+# batch is prefetched in the background
+FEED_BATCH_SIZE = 50
+FEED_LOW_WATER = 10
+
+
+def _candidate_feed(job_giver, job):
+    """The session's candidate buffer for the selected job and search filters,
+    best-fitting candidates first"""
+    search = dict(st.session_state.candidate_search_params)
+    key = (job_giver.id, job.id, tuple(sorted(search.items())))
+    feed = st.session_state.get("candidate_feed")
+    if feed is None or feed.key != key:
+        # Runs on a refill thread, so the filters are captured here rather
+        # than read from session state
+        def fetch(after):
+            return JobSeeker.get_ranked_for_job(
+                job_giver.id,
+                job,
+                limit=FEED_BATCH_SIZE,
+                skills=search["skills"],
+                min_experience=search["min_experience"],
+                location=search["location"],
+                radius_km=search.get("radius_km"),
+                education=search["education"],
+                after=after,
+                match_any_skill=search.get("match_any_skill", False)
+            )
+        feed = FeedBuffer(key, fetch, JobSeeker.ranked_cursor,
+                          batch_size=FEED_BATCH_SIZE, low_water=FEED_LOW_WATER)
+        st.session_state.candidate_feed = feed
+    return feed
+
+
+def _reset_candidate_feed():
+    """Drop the buffered candidates so the next rerun starts from the beginning"""
+    st.session_state.pop("candidate_feed", None)
+
+
 def candidates_section(job_giver):
     """Candidate swiping section for job givers"""
     user_id_in_section = st.session_state.get('user_id')
@@ -607,8 +650,13 @@ def candidates_section(job_giver):
     if "selected_job_for_candidates" not in st.session_state:
         st.session_state.selected_job_for_candidates = None
     
-    # Create job selection options
-    job_options = [f"{job.title} (ID: {job.id})" for job in active_jobs]
+    # Create job selection options, flagging jobs with candidates waiting on a reply
+    pending_interest = Job.get_pending_interest_counts(job_giver.id)
+    job_options = [
+        f"{job.title} (ID: {job.id})"
+        + (f" - {pending_interest[job.id]} interested" if pending_interest.get(job.id) else "")
+        for job in active_jobs
+    ]
     selected_job_option = st.selectbox(
         "Select a job to find candidates for:",
         job_options,
@@ -628,6 +676,8 @@ def candidates_section(job_giver):
         st.write(f"**Selected Job:** {selected_job.title}")
         st.write(f"**Location:** {selected_job.location}")
         st.write(f"**Job Type:** {selected_job.job_type}")
+        if pending_interest.get(selected_job.id):
+            st.info(f"{pending_interest[selected_job.id]} candidates have already shown interest in this job; they are shown first.")
         
         if selected_job.requirements:
             st.write("**Requirements:**")
@@ -644,10 +694,13 @@ def candidates_section(job_giver):
         
         with col1:
             skills = st.text_input("Skills (comma-separated)", key="candidate_search_skills")
+            match_any_skill = st.checkbox("Match any of these skills (instead of all)", key="candidate_search_any_skill")
             min_experience = st.number_input("Minimum Years of Experience", min_value=0, value=0, key="candidate_search_experience")
         
         with col2:
             location = st.text_input("Location", key="candidate_search_location")
+            radius_km = st.selectbox("Distance", RADIUS_OPTIONS_KM, format_func=format_radius,
+                                     key="candidate_search_radius")
             education = st.text_input("Education", key="candidate_search_education")
         
         # Button row for search and reset
@@ -660,10 +713,12 @@ def candidates_section(job_giver):
                     "skills": skills if skills.strip() else None,
                     "min_experience": min_experience if min_experience > 0 else None,
                     "location": location if location.strip() else None,
-                    "education": education if education.strip() else None
+                    "radius_km": radius_km if location.strip() else None,
+                    "education": education if education.strip() else None,
+                    "match_any_skill": match_any_skill
                 }
-                # Reset candidate index when search parameters change
-                st.session_state.candidate_index = 0
+                # Start the feed over when search parameters change
+                _reset_candidate_feed()
                 st.success("Search filters applied!")
         
         with col2:
@@ -674,10 +729,12 @@ def candidates_section(job_giver):
                     "skills": None,
                     "min_experience": None,
                     "location": None,
-                    "education": None
+                    "radius_km": None,
+                    "education": None,
+                    "match_any_skill": False
                 }
-                # Reset candidate index
-                st.session_state.candidate_index = 0
+                # Start the feed over
+                _reset_candidate_feed()
                 
                 # Reset left swipes to make previously swiped candidates available again
                 job_id = st.session_state.selected_job_for_candidates.id if st.session_state.selected_job_for_candidates else None
@@ -695,7 +752,9 @@ def candidates_section(job_giver):
             "skills": None,
             "min_experience": None,
             "location": None,
-            "education": None
+            "radius_km": None,
+            "education": None,
+            "match_any_skill": False
         }
     
     # Ensure all parameters are properly set to None if they're empty strings
@@ -711,18 +770,17 @@ def candidates_section(job_giver):
         st.warning("Please select a job first to find candidates.")
         return
         
-    # Get candidates for swiping with search parameters
-    candidates = JobSeeker.get_all_for_swiping(
-        job_giver.id, 
-        limit=50,  # Increased limit to show more candidates
-        skills=st.session_state.candidate_search_params["skills"],
-        min_experience=st.session_state.candidate_search_params["min_experience"],
-        location=st.session_state.candidate_search_params["location"],
-        education=st.session_state.candidate_search_params["education"],
-        job_id=st.session_state.selected_job_for_candidates.id  # Pass the specific job ID
-    )
+    # Cards come from a per-session buffer that prefetches the next batch in
+    # the background, so a swipe does not cost a candidate query
+    feed = _candidate_feed(job_giver, st.session_state.selected_job_for_candidates)
+    current_candidate = feed.current()
     
-    if not candidates:
+    # The candidate query overran its time budget (or no connection was available)
+    for notice in degraded_notices():
+        st.warning(notice)
+    
+    if current_candidate is None and feed.delivered == 0:
+        _reset_candidate_feed()
         st.info("No candidates match your search criteria. Try adjusting your filters or reset to see previously skipped candidates.")
         
         # Add a button to reset left swipes
@@ -737,18 +795,16 @@ def candidates_section(job_giver):
                 print(f"Error resetting swipes: {message}")
         return
     
-    # Initialize candidate index in session state if not present
-    if "candidate_index" not in st.session_state:
-        st.session_state.candidate_index = 0
-    
-    # Get current candidate
-    if st.session_state.candidate_index < len(candidates):
-        current_candidate = candidates[st.session_state.candidate_index]
-        
+    # Show the current candidate
+    if current_candidate is not None:
         # Display candidate card
         with st.container():
             st.subheader(current_candidate.full_name)
             st.write(f"**Considering for:** {st.session_state.selected_job_for_candidates.title}")
+            if getattr(current_candidate, "interested", False):
+                st.success("Interested in this job - swipe right to match")
+            if getattr(current_candidate, "relevance", None) is not None:
+                st.write(f"**Job Fit:** {current_candidate.relevance:.0%}")
             st.write(f"**Location:** {current_candidate.location}")
             st.write(f"**Experience:** {current_candidate.experience} years")
             
@@ -786,7 +842,7 @@ def candidates_section(job_giver):
                 success, message = swipe.create()
                 
                 # Move to next candidate
-                st.session_state.candidate_index += 1
+                feed.advance()
                 st.rerun()
         
         with col2:
@@ -802,34 +858,18 @@ def candidates_section(job_giver):
                 success, message = swipe.create()
                 
                 # Move to next candidate
-                st.session_state.candidate_index += 1
+                feed.advance()
                 
                 if success and "match" in message.lower():
                     st.balloons()
                     job_title = st.session_state.selected_job_for_candidates.title
                     st.success(f"It's a match for '{job_title}'! 🎉 Check your matches tab.")
                 
-                # Get the next set of candidates if we've reached the end
-                if st.session_state.candidate_index >= len(candidates):
-                    # Get a fresh set of candidates
-                    new_candidates = JobSeeker.get_all_for_swiping(
-                        job_giver.id, 
-                        limit=50,  # Increased limit to show more candidates
-                        skills=st.session_state.candidate_search_params["skills"],
-                        min_experience=st.session_state.candidate_search_params["min_experience"],
-                        location=st.session_state.candidate_search_params["location"],
-                        education=st.session_state.candidate_search_params["education"],
-                        job_id=st.session_state.selected_job_for_candidates.id  # Pass the specific job ID
-                    )
-                    
-                    if not new_candidates:
-                        st.session_state.candidate_index = 0
-                    
                 st.rerun()
     else:
         st.info("You've seen all available candidates matching your current filters.")
-        # Reset index for next time
-        st.session_state.candidate_index = 0
+        # Start from the beginning again next time
+        _reset_candidate_feed()
         
         # Add a button to reset left swipes
         if st.button("Show Previously Skipped Candidates", key="end_reset_skipped_candidates"):
@@ -876,6 +916,8 @@ def matches_section(job_giver):
     
     # Get matches for job giver
     matches = Match.get_for_job_giver(job_giver.id)
+    for notice in degraded_notices():
+        st.warning(notice)
     
     # More debug info
     print(f"Retrieved {len(matches)} matches for job giver")
@@ -884,68 +926,55 @@ def matches_section(job_giver):
         st.info("You don't have any matches yet. Start swiping to find candidates!")
         return
     
+    # Get candidate details for every match up front (concurrently when async reads are enabled)
+    match_details = fetch_concurrently(*[(JobSeeker.get_contact_details, match.job_seeker_id)
+                                         for match in matches])
+    
     # Display matches
-    for match in matches:
+    for match, seeker_data in zip(matches, match_details):
         with st.expander(f"{match.job_seeker_name} - {match.job_title}"):
             st.write(f"**Matched on:** {match.created_at.strftime('%Y-%m-%d')}")
             st.write(f"**Status:** {match.status.capitalize()}")
             
-            # Get job seeker details (full profile now visible)
-            conn = get_connection()
-            if conn:
-                try:
-                    cursor = conn.cursor()
-                    cursor.execute("""
-                        SELECT js.full_name, js.bio, js.skills, js.experience, 
-                               js.education, js.location, js.cv_path,
-                               u.email
-                        FROM job_seekers js
-                        JOIN users u ON js.user_id = u.id
-                        WHERE js.id = %s
-                    """, (match.job_seeker_id,))
-                    
-                    seeker_data = cursor.fetchone()
-                    if seeker_data:
-                        name, bio, skills, experience, education, location, cv_path, email = seeker_data
-                        
-                        st.write(f"**Name:** {name}")
-                        st.write(f"**Email:** {email}")
-                        st.write(f"**Location:** {location}")
-                        st.write(f"**Experience:** {experience} years")
-                        
-                        if education:
-                            st.write(f"**Education:** {education}")
-                        
-                        if skills:
-                            st.write("**Skills:**")
-                            st.write(", ".join(skills))
-                        
-                        if bio:
-                            st.write("**Bio:**")
-                            st.write(bio)
-                        
-                        if cv_path:
-                            st.write("**CV is available**")
-                            # Create a download button for the CV
-                            try:
-                                if os.path.exists(cv_path):
-                                    with open(cv_path, "rb") as file:
-                                        cv_filename = os.path.basename(cv_path)
-                                        st.download_button(
-                                            label="Download CV",
-                                            data=file,
-                                            file_name=cv_filename,
-                                            mime="application/pdf"
-                                        )
-                                else:
-                                    st.error(f"CV file not found at {cv_path}")
-                            except Exception as e:
-                                st.error(f"Error loading CV file: {e}")
-                except Exception as e:
-                    st.error(f"Error retrieving candidate details: {e}")
-                finally:
-                    cursor.close()
-                    conn.close()
+            # Job seeker details (full profile now visible)
+            if seeker_data:
+                name, bio, skills, experience, education, location, cv_path, email = seeker_data
+                
+                st.write(f"**Name:** {name}")
+                st.write(f"**Email:** {email}")
+                st.write(f"**Location:** {location}")
+                st.write(f"**Experience:** {experience} years")
+                
+                if education:
+                    st.write(f"**Education:** {education}")
+                
+                if skills:
+                    st.write("**Skills:**")
+                    st.write(", ".join(skills))
+                
+                if bio:
+                    st.write("**Bio:**")
+                    st.write(bio)
+                
+                if cv_path:
+                    st.write("**CV is available**")
+                    # Create a download button for the CV
+                    try:
+                        if os.path.exists(cv_path):
+                            with open(cv_path, "rb") as file:
+                                cv_filename = os.path.basename(cv_path)
+                                st.download_button(
+                                    label="Download CV",
+                                    data=file,
+                                    file_name=cv_filename,
+                                    mime="application/pdf"
+                                )
+                        else:
+                            st.error(f"CV file not found at {cv_path}")
+                    except Exception as e:
+                        st.error(f"Error loading CV file: {e}")
+            else:
+                st.error("Error retrieving candidate details")
 
 def credits_section(job_giver):
     """Credits section for job givers"""
@@ -1032,7 +1061,7 @@ def credits_section(job_giver):
                                         st.error(f"Error adding free credits: {e}")
                                     finally:
                                         cursor.close()
-                                        conn.close()
+                                        release_connection(conn)
                         else:
                             st.markdown(f"### ₹{package.price_inr:.2f}")
                             if st.button(f"Buy {package.name}", key=f"buy_package_{package.id}"):
@@ -1112,6 +1141,6 @@ def credits_section(job_giver):
             st.error(f"Error retrieving transaction history: {e}")
         finally:
             cursor.close()
-            conn.close()
+            release_connection(conn)
     else:
         st.error("Could not connect to database")
\ No newline at end of file
@@ -5,8 +5,14 @@ from app.models.job_seeker import JobSeeker
 from app.models.job import Job
 from app.models.swipe import Swipe
 from app.models.match import Match
-from app.database.connection import get_connection
+from app.models.async_repository import fetch_concurrently
+from app.database.connection import get_connection, release_connection
+from app.database.timeouts import degraded_notices
 from app.utils.settings import get_platform_setting # Import the new utility
+from app.utils.feed_buffer import FeedBuffer
+from app.utils.gazetteer import RADIUS_OPTIONS_KM, format_radius
+from app.utils.ranking import rank_jobs
+from app.utils.similarity import get_similarity_model
 
 # --- New: Define upload paths more flexibly ---
 # Determine the project root dynamically.
@@ -155,6 +161,55 @@ def profile_section(job_seeker):
         if job_seeker.cv_path:
             st.write("**CV:** Uploaded ✓")
 
+# Jobs fetched per feed batch, and how few may remain before the next batch
+# is prefetched in the background
+FEED_BATCH_SIZE = 50
+FEED_LOW_WATER = 10
+
+
+def _job_feed(job_seeker):
+    """The session's feed buffer for the current search filters"""
+    search = dict(st.session_state.job_search_params)
+    key = (job_seeker.id, tuple(sorted(search.items())))
+    feed = st.session_state.get("job_feed")
+    if feed is None or feed.key != key:
+        # Runs on a refill thread, so the filters are captured here rather
+        # than read from session state
+        def fetch(after):
+            return Job.get_all_for_swiping(
+                job_seeker.id,
+                limit=FEED_BATCH_SIZE,
+                keywords=search["keywords"],
+                location=search["location"],
+                radius_km=search.get("radius_km"),
+                job_type=search["job_type"],
+                min_salary=search["min_salary"],
+                company=search.get("company"),
+                after=after
+            )
+        feed = FeedBuffer(key, fetch, Job.feed_cursor,
+                          batch_size=FEED_BATCH_SIZE, low_water=FEED_LOW_WATER,
+                          rank=lambda jobs: _rank_jobs(job_seeker, jobs))
+        st.session_state.job_feed = feed
+    return feed
+
+
+def _rank_jobs(job_seeker, jobs):
+    """Order a feed batch by fit, including bio/description similarity once
+    the similarity model has been built"""
+    model = get_similarity_model()
+    text_similarity = None
+    if model is not None:
+        text_similarity = model.similarities("seeker", job_seeker.id, "job",
+                                             [job.id for job in jobs])
+    return rank_jobs(job_seeker, jobs, text_similarity)
+
+
+def _reset_job_feed():
+    """Drop the buffered feed so the next rerun starts from the newest job"""
+    st.session_state.pop("job_feed", None)
+
+
 def swipe_section(job_seeker):
     """Job swiping section for job seekers"""
     st.title("Find Jobs")
@@ -168,6 +223,9 @@ def swipe_section(job_seeker):
         with col1:
             keywords = st.text_input("Keywords (job title, skills, etc.)", key="job_search_keywords")
             location = st.text_input("Location", key="job_search_location")
+            radius_km = st.selectbox("Distance", RADIUS_OPTIONS_KM, format_func=format_radius,
+                                     key="job_search_radius")
+            company = st.text_input("Company", key="job_search_company")
         
         with col2:
             job_type = st.selectbox(
@@ -175,7 +233,7 @@ def swipe_section(job_seeker):
                 ["", "Full-time", "Part-time", "Contract", "Internship", "Remote"],
                 key="job_search_type"
             )
-            salary_range = st.text_input("Minimum Salary (e.g., 50000)", key="job_search_salary")
+            salary_range = st.text_input("Minimum Yearly Salary (e.g., 50000 or 8 LPA)", key="job_search_salary")
         
         # Button row for search and reset
         col1, col2 = st.columns(2)
@@ -186,11 +244,13 @@ def swipe_section(job_seeker):
                 st.session_state.job_search_params = {
                     "keywords": keywords if keywords.strip() else None,
                     "location": location if location.strip() else None,
+                    "radius_km": radius_km if location.strip() else None,
                     "job_type": job_type if job_type else None,
-                    "min_salary": salary_range if salary_range.strip() else None
+                    "min_salary": salary_range if salary_range.strip() else None,
+                    "company": company if company.strip() else None
                 }
-                # Reset job index when search parameters change
-                st.session_state.job_index = 0
+                # Start the feed over when search parameters change
+                _reset_job_feed()
                 st.success("Search filters applied!")
         
         with col2:
@@ -200,11 +260,13 @@ def swipe_section(job_seeker):
                 st.session_state.job_search_params = {
                     "keywords": None,
                     "location": None,
+                    "radius_km": None,
                     "job_type": None,
-                    "min_salary": None
+                    "min_salary": None,
+                    "company": None
                 }
-                # Reset job index
-                st.session_state.job_index = 0
+                # Start the feed over
+                _reset_job_feed()
                 
                 # Reset left swipes to make previously swiped jobs available again
                 success, message = Swipe.reset_left_swipes(st.session_state.user_id, 'job')
@@ -220,8 +282,10 @@ def swipe_section(job_seeker):
         st.session_state.job_search_params = {
             "keywords": None,
             "location": None,
+            "radius_km": None,
             "job_type": None,
-            "min_salary": None
+            "min_salary": None,
+            "company": None
         }
     
     # Ensure all parameters are properly set to None if they're empty strings
@@ -232,17 +296,17 @@ def swipe_section(job_seeker):
     if st.session_state.job_search_params["min_salary"] == "":
         st.session_state.job_search_params["min_salary"] = None
     
-    # Get jobs for swiping with search parameters
-    jobs = Job.get_all_for_swiping(
-        job_seeker.id, 
-        limit=50,  # Increased limit to show more jobs
-        keywords=st.session_state.job_search_params["keywords"],
-        location=st.session_state.job_search_params["location"],
-        job_type=st.session_state.job_search_params["job_type"],
-        min_salary=st.session_state.job_search_params["min_salary"]
-    )
+    # Cards come from a per-session buffer that prefetches the next batch in
+    # the background, so a swipe does not cost a feed query
+    feed = _job_feed(job_seeker)
+    current_job = feed.current()
+    
+    # The feed query overran its time budget (or no connection was available)
+    for notice in degraded_notices():
+        st.warning(notice)
     
-    if not jobs:
+    if current_job is None and feed.delivered == 0:
+        _reset_job_feed()
         st.info("No jobs match your search criteria. Try adjusting your filters or reset to see previously skipped jobs.")
         
         # Add a button to reset left swipes
@@ -256,20 +320,17 @@ def swipe_section(job_seeker):
                 print(f"Error resetting swipes: {message}")
         return
     
-    # Initialize job index in session state if not present
-    if "job_index" not in st.session_state:
-        st.session_state.job_index = 0
-    
-    # Get current job
-    if st.session_state.job_index < len(jobs):
-        current_job = jobs[st.session_state.job_index]
-        
+    # Show the current job
+    if current_job is not None:
         # Display job card
         with st.container():
             st.subheader(current_job.title)
             st.write(f"**Company:** {current_job.company_name}")
             st.write(f"**Location:** {current_job.location}")
             
+            if getattr(current_job, "relevance", None) is not None:
+                st.write(f"**Profile Match:** {current_job.relevance:.0%}")
+            
             if current_job.salary_range:
                 st.write(f"**Salary Range:** {current_job.salary_range}")
             
@@ -299,7 +360,7 @@ def swipe_section(job_seeker):
                 success, message = swipe.create()
                 
                 # Move to next job
-                st.session_state.job_index += 1
+                feed.advance()
                 st.rerun()
         
         with col2:
@@ -314,32 +375,17 @@ def swipe_section(job_seeker):
                 success, message = swipe.create()
                 
                 # Move to next job
-                st.session_state.job_index += 1
+                feed.advance()
                 
                 if success and "match" in message.lower():
                     st.balloons()
                     st.success("It's a match! 🎉 Check your matches tab.")
                 
-                # Get the next set of jobs if we've reached the end
-                if st.session_state.job_index >= len(jobs):
-                    # Get a fresh set of jobs
-                    new_jobs = Job.get_all_for_swiping(
-                        job_seeker.id, 
-                        limit=50,  # Increased limit to show more jobs
-                        keywords=st.session_state.job_search_params["keywords"],
-                        location=st.session_state.job_search_params["location"],
-                        job_type=st.session_state.job_search_params["job_type"],
-                        min_salary=st.session_state.job_search_params["min_salary"]
-                    )
-                    
-                    if not new_jobs:
-                        st.session_state.job_index = 0
-                
                 st.rerun()
     else:
         st.info("You've seen all available jobs matching your current filters.")
-        # Reset index for next time
-        st.session_state.job_index = 0
+        # Start from the newest job again next time
+        _reset_job_feed()
         
         # Add a button to reset left swipes
         if st.button("Show Previously Skipped Jobs", key="end_reset_skipped_jobs"):
@@ -360,6 +406,8 @@ def matches_section(job_seeker):
     
     # Get matches for job seeker
     matches = Match.get_for_job_seeker(job_seeker.id)
+    for notice in degraded_notices():
+        st.warning(notice)
     
     # More debug info
     print(f"Retrieved {len(matches)} matches for job seeker")
@@ -368,14 +416,15 @@ def matches_section(job_seeker):
         st.info("You don't have any matches yet. Start swiping to find jobs!")
         return
     
+    # Get job details for every match up front (concurrently when async reads are enabled)
+    match_jobs = fetch_concurrently(*[(Job.get_by_id, match.job_id) for match in matches])
+    
     # Display matches
-    for match in matches:
+    for match, job in zip(matches, match_jobs):
         with st.expander(f"{match.job_title} at {match.company_name}"):
             st.write(f"**Matched on:** {match.created_at.strftime('%Y-%m-%d')}")
             st.write(f"**Status:** {match.status.capitalize()}")
             
-            # Get job details
-            job = Job.get_by_id(match.job_id)
             if job:
                 st.write(f"**Location:** {job.location}")
                 
@@ -492,6 +541,6 @@ def credits_section(job_seeker):
             st.error(f"Error retrieving transaction history: {e}")
         finally:
             cursor.close()
-            conn.close()
+            release_connection(conn)
     else:
         st.error("Could not connect to database")
\ No newline at end of file
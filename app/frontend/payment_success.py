@@ -4,7 +4,7 @@ import os
 from app.models.payment import Payment
 from app.models.job_giver import JobGiver
 from app.models.credit_package import CreditPackage
-from app.database.connection import get_connection
+from app.database.connection import get_connection, release_connection
 
 def payment_success_page():
     st.title("Payment Status")
@@ -58,7 +58,7 @@ def payment_success_page():
                         st.error(f"Error adding credits: {e}")
                     finally:
                         cursor.close()
-                        conn.close()
+                        release_connection(conn)
             else:
                 st.error("Payment record not found. Please contact support.")
         else:
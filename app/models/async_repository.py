@@ -0,0 +1,129 @@
+"""Asyncio versions of the read-only model methods.
+
+Each method mirrors the synchronous model method of the same name, runs the
+same SQL and returns the same model objects, but through the psycopg 3 async
+pool in app.database.async_connection. Awaiting several of them together
+lets independent reads run concurrently:
+
+    jobs, matches = await asyncio.gather(
+        AsyncJob.get_by_job_giver_id(job_giver_id),
+        AsyncMatch.get_for_job_giver(job_giver_id),
+    )
+
+Synchronous pages use fetch_concurrently(), which picks the async path when
+DB_ASYNC_READS is enabled and psycopg 3 is installed, and falls back to
+calling the sync methods one after another otherwise.
+
+Only plain reads are mirrored. The feeds (get_all_for_swiping and friends)
+go through the job index, seen sets and recommendation queues, so they stay
+sync-only rather than keep a second copy of that logic here.
+"""
+import asyncio
+
+from app.database.async_connection import async_enabled, fetchall, fetchone, submit
+from app.models import job, job_giver, job_seeker, match, user
+from app.models.job import Job
+from app.models.job_giver import JobGiver
+from app.models.job_seeker import JobSeeker
+from app.models.match import Match
+from app.models.user import User
+
+
+class AsyncUser:
+    @staticmethod
+    async def get_by_username(username):
+        row = await fetchone(user.SELECT_BY_USERNAME, (username,))
+        return User._from_row(row) if row else None
+
+    @staticmethod
+    async def get_recent_registrations(limit=5):
+        return await fetchall(user.SELECT_RECENT_REGISTRATIONS, (limit,))
+
+
+class AsyncJobSeeker:
+    @staticmethod
+    async def get_by_user_id(user_id):
+        row = await fetchone(job_seeker.SELECT_BY_USER_ID, (user_id,))
+        return JobSeeker._from_row(row) if row else None
+
+    @staticmethod
+    async def get_contact_details(job_seeker_id):
+        return await fetchone(job_seeker.SELECT_CONTACT_DETAILS, (job_seeker_id,))
+
+
+class AsyncJobGiver:
+    @staticmethod
+    async def get_by_user_id(user_id):
+        row = await fetchone(job_giver.SELECT_BY_USER_ID, (user_id,))
+        return JobGiver._from_row(row) if row else None
+
+
+class AsyncJob:
+    @staticmethod
+    async def get_by_id(job_id):
+        row = await fetchone(job.SELECT_BY_ID, (job_id,))
+        return Job._from_row(row) if row else None
+
+    @staticmethod
+    async def get_by_job_giver_id(job_giver_id):
+        return [Job._from_row(row) for row in await fetchall(job.SELECT_BY_JOB_GIVER_ID, (job_giver_id,))]
+
+
+class AsyncMatch:
+    @staticmethod
+    async def get_for_job_seeker(job_seeker_id):
+        rows = await fetchall(match.SELECT_FOR_JOB_SEEKER, (job_seeker_id,))
+        return [Match._from_job_seeker_row(row) for row in rows]
+
+    @staticmethod
+    async def get_for_job_giver(job_giver_id):
+        rows = await fetchall(match.SELECT_FOR_JOB_GIVER, (job_giver_id,))
+        return [Match._from_job_giver_row(row) for row in rows]
+
+    @staticmethod
+    async def get_recent(limit=5):
+        return await fetchall(match.SELECT_RECENT, (limit,))
+
+
+# Sync model method -> async equivalent, for fetch_concurrently()
+ASYNC_EQUIVALENTS = {
+    User.get_by_username: AsyncUser.get_by_username,
+    User.get_recent_registrations: AsyncUser.get_recent_registrations,
+    JobSeeker.get_by_user_id: AsyncJobSeeker.get_by_user_id,
+    JobSeeker.get_contact_details: AsyncJobSeeker.get_contact_details,
+    JobGiver.get_by_user_id: AsyncJobGiver.get_by_user_id,
+    Job.get_by_id: AsyncJob.get_by_id,
+    Job.get_by_job_giver_id: AsyncJob.get_by_job_giver_id,
+    Match.get_for_job_seeker: AsyncMatch.get_for_job_seeker,
+    Match.get_for_job_giver: AsyncMatch.get_for_job_giver,
+    Match.get_recent: AsyncMatch.get_recent,
+}
+
+
+def fetch_concurrently(*calls):
+    """Run independent model reads, concurrently when the async path is enabled.
+
+    Each call is a tuple of a function and its positional arguments, e.g.
+    (Job.get_by_id, 42). Results come back in the same order. Calls to model
+    methods with an async equivalent run together on the async pool while
+    the rest (any other function, such as a read under a statement budget)
+    run one after another in the calling thread.
+    """
+    if not async_enabled():
+        return [call[0](*call[1:]) for call in calls]
+
+    concurrent = [i for i, call in enumerate(calls) if call[0] in ASYNC_EQUIVALENTS]
+
+    async def _gather():
+        return await asyncio.gather(*(ASYNC_EQUIVALENTS[calls[i][0]](*calls[i][1:])
+                                      for i in concurrent))
+
+    future = submit(_gather()) if concurrent else None
+    results = [None] * len(calls)
+    for i, call in enumerate(calls):
+        if call[0] not in ASYNC_EQUIVALENTS:
+            results[i] = call[0](*call[1:])
+    if future is not None:
+        for i, result in zip(concurrent, future.result()):
+            results[i] = result
+    return results
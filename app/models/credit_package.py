@@ -1,6 +1,7 @@
 import psycopg2
 from psycopg2.extras import DictCursor # For easier row access
-from app.database.connection import get_connection
+from app.database.connection import get_connection, release_connection
+from app.database.unit_of_work import write_action
 import streamlit as st
 from decimal import Decimal
 
@@ -41,7 +42,7 @@ class CreditPackage:
         finally:
             if conn:
                 cursor.close()
-                conn.close()
+                release_connection(conn)
         return packages
 
     @staticmethod
@@ -66,7 +67,7 @@ class CreditPackage:
         finally:
             if conn:
                 cursor.close()
-                conn.close()
+                release_connection(conn)
         return packages
 
     @staticmethod
@@ -87,9 +88,10 @@ class CreditPackage:
         finally:
             if conn:
                 cursor.close()
-                conn.close()
+                release_connection(conn)
 
     @staticmethod
+    @write_action
     def create(name, description, credits_amount, price_inr, is_active=True, sort_order=0):
         conn = get_connection()
         if conn is None:
@@ -112,9 +114,10 @@ class CreditPackage:
         finally:
             if conn:
                 cursor.close()
-                conn.close()
+                release_connection(conn)
 
     @staticmethod
+    @write_action
     def update(package_id, name, description, credits_amount, price_inr, is_active, sort_order):
         conn = get_connection()
         if conn is None:
@@ -137,9 +140,10 @@ class CreditPackage:
         finally:
             if conn:
                 cursor.close()
-                conn.close()
+                release_connection(conn)
 
     @staticmethod
+    @write_action
     def delete(package_id):
         conn = get_connection()
         if conn is None:
@@ -160,7 +164,7 @@ class CreditPackage:
         finally:
             if conn:
                 cursor.close()
-                conn.close()
+                release_connection(conn)
 
     @staticmethod
     def clear_all_caches():
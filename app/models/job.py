@@ -1,8 +1,55 @@
 import psycopg2
 import psycopg2.extras
-from app.database.connection import get_connection
+from app.database.connection import get_connection, release_connection
+from app.database.job_index import MAX_RANKED_CANDIDATES, get_job_index, notify_job_changed
+from app.database.prepared import execute_prepared
+from app.database.timeouts import fallback, is_timeout, remember, statement_budget
+from app.database.schema import has_column, has_extension
+from app.database.unit_of_work import write_action
+from app.models.recommendation_queue import JOB_QUEUE, SEEKER_QUEUE, RecommendationQueue
+from app.utils.gazetteer import location_filter_ids, location_id
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.salary import DEFAULT_CURRENCY, Salary, parse_salary
+from app.utils.search import parse_search_query, substring_filter
+from app.models.seen_set import SeenSet
 from .match import Match # If needed for direct Match object creation, but not for this version
 
+# Statements shared by the sync model and app.models.async_repository
+SELECT_COLUMNS = """
+    SELECT id, job_giver_id, title, description, requirements, 
+           location, salary_range, job_type, created_at, active
+    FROM jobs
+"""
+
+SELECT_BY_ID = SELECT_COLUMNS + " WHERE id = %s"
+
+SELECT_BY_JOB_GIVER_ID = SELECT_COLUMNS + """
+    WHERE job_giver_id = %s
+    ORDER BY created_at DESC
+"""
+
+SALARY_COLUMNS = ["salary_min", "salary_max", "salary_currency", "salary_period"]
+
+
+def _salary_bound(value):
+    """Yearly amount for a salary filter value such as "50000" or "8 LPA", or None"""
+    if not value:
+        return None
+    salary = parse_salary(str(value))
+    if salary is None:
+        return None
+    return salary.min_amount if salary.min_amount is not None else salary.max_amount
+
+
+def _salary_currency(*values):
+    """Currency of salary filter values ("$80k" is USD), DEFAULT_CURRENCY if none states one"""
+    for value in values:
+        salary = parse_salary(str(value)) if value else None
+        if salary is not None and salary.currency:
+            return salary.currency
+    return DEFAULT_CURRENCY
+
+
 class Job:
     def __init__(self, id=None, job_giver_id=None, title=None, description=None, 
                  requirements=None, location=None, salary_range=None, job_type=None, 
@@ -17,7 +64,45 @@ class Job:
         self.job_type = job_type
         self.created_at = created_at
         self.active = active
+
+    @staticmethod
+    def _from_row(row):
+        """Build a Job from a row of SELECT_COLUMNS"""
+        return Job(
+            id=row[0],
+            job_giver_id=row[1],
+            title=row[2],
+            description=row[3],
+            requirements=row[4],
+            location=row[5],
+            salary_range=row[6],
+            job_type=row[7],
+            created_at=row[8],
+            active=row[9]
+        )
+
+    @staticmethod
+    def _from_swiping_row(row):
+        job = Job._from_row(row)
+        job.company_name = row[10]  # Add company name for display
+        # Relevance to the keyword search, when there was one
+        job.search_rank = row[11] if len(row) > 11 else None
+        return job
+    
+    def _salary_values(self):
+        """Structured salary columns and values parsed from salary_range"""
+        if not has_column('jobs', 'salary_min'):
+            return [], []
+        salary = parse_salary(self.salary_range) or Salary(None, None, None, None)
+        return SALARY_COLUMNS, list(salary)
+    
+    def _location_values(self):
+        """Canonical gazetteer id for the free-text location"""
+        if not has_column('jobs', 'location_id'):
+            return [], []
+        return ["location_id"], [location_id(self.location)]
     
+    @write_action
     def create(self):
         """Create a new job listing"""
         conn = get_connection()
@@ -26,19 +111,25 @@ class Job:
         
         try:
             cursor = conn.cursor()
+            salary_columns, salary_values = self._salary_values()
+            location_columns, location_values = self._location_values()
+            columns = ["job_giver_id", "title", "description", "requirements", "location",
+                       "salary_range", "job_type", "active"] + salary_columns + location_columns
             cursor.execute(
-                """
-                INSERT INTO jobs 
-                (job_giver_id, title, description, requirements, location, 
-                 salary_range, job_type, active)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                f"""
+                INSERT INTO jobs ({", ".join(columns)})
+                VALUES ({", ".join(["%s"] * len(columns))})
                 RETURNING id, created_at
                 """,
-                (self.job_giver_id, self.title, self.description, self.requirements, 
-                 self.location, self.salary_range, self.job_type, self.active)
+                [self.job_giver_id, self.title, self.description, self.requirements, 
+                 self.location, self.salary_range, self.job_type, self.active]
+                + salary_values + location_values
             )
             
             job_id, created_at = cursor.fetchone()
+            notify_job_changed(cursor, job_id)
+            if RecommendationQueue.available():
+                RecommendationQueue.request_refresh(cursor, JOB_QUEUE, job_id, merge=True)
             conn.commit()
             
             self.id = job_id
@@ -50,87 +141,44 @@ class Job:
             return False
         finally:
             cursor.close()
-            conn.close()
+            release_connection(conn)
     
     @staticmethod
     def get_by_id(job_id):
         """Get a job by ID"""
-        conn = get_connection()
+        conn = get_connection(read_only=True)
         if conn is None:
             return None
         
         try:
             cursor = conn.cursor()
-            cursor.execute(
-                """
-                SELECT id, job_giver_id, title, description, requirements, 
-                       location, salary_range, job_type, created_at, active
-                FROM jobs
-                WHERE id = %s
-                """,
-                (job_id,)
-            )
+            cursor.execute(SELECT_BY_ID, (job_id,))
             
             job_data = cursor.fetchone()
             if job_data:
-                return Job(
-                    id=job_data[0],
-                    job_giver_id=job_data[1],
-                    title=job_data[2],
-                    description=job_data[3],
-                    requirements=job_data[4],
-                    location=job_data[5],
-                    salary_range=job_data[6],
-                    job_type=job_data[7],
-                    created_at=job_data[8],
-                    active=job_data[9]
-                )
+                return Job._from_row(job_data)
             return None
         except psycopg2.Error as e:
             print(f"Error getting job: {e}")
             return None
         finally:
             cursor.close()
-            conn.close()
+            release_connection(conn)
     
     @staticmethod
     def get_by_job_giver_id(job_giver_id):
         """Get all jobs for a job giver"""
         conn = None
         try:
-            conn = get_connection()
+            conn = get_connection(read_only=True)
             if conn is None:
                 print("Failed to get database connection")
                 return []
 
             cursor = conn.cursor()
-            cursor.execute(
-                """
-                SELECT id, job_giver_id, title, description, requirements, 
-                       location, salary_range, job_type, created_at, active
-                FROM jobs
-                WHERE job_giver_id = %s
-                ORDER BY created_at DESC
-                """,
-                (job_giver_id,)
-            )
-            
-            jobs = []
-            for row in cursor.fetchall():
-                jobs.append(Job(
-                    id=row[0],
-                    job_giver_id=row[1],
-                    title=row[2],
-                    description=row[3],
-                    requirements=row[4],
-                    location=row[5],
-                    salary_range=row[6],
-                    job_type=row[7],
-                    created_at=row[8],
-                    active=row[9]
-                ))
+            cursor.execute(SELECT_BY_JOB_GIVER_ID, (job_giver_id,))
             
-            return jobs
+            return [Job._from_row(row) for row in cursor.fetchall()]
         except Exception as e:
             print(f"Error getting jobs for job giver {job_giver_id}: {e}")
             return []
@@ -138,103 +186,420 @@ class Job:
             if cursor:
                 cursor.close()
             if conn:
-                conn.close()
+                release_connection(conn)
+    
+    @staticmethod
+    def get_pending_interest_counts(job_giver_id):
+        """Map of job id -> job seekers who swiped right on it and are still
+        waiting for this job giver, for each of the giver's jobs"""
+        if not has_column('jobs', 'pending_interest_count'):
+            return {}
+        conn = get_connection(read_only=True)
+        if conn is None:
+            return {}
+        
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT id, pending_interest_count FROM jobs WHERE job_giver_id = %s",
+                (job_giver_id,)
+            )
+            return dict(cursor.fetchall())
+        except psycopg2.Error as e:
+            print(f"Error getting pending interest for job giver {job_giver_id}: {e}")
+            return {}
+        finally:
+            cursor.close()
+            release_connection(conn)
     
     @staticmethod
-    def get_all_for_swiping(job_seeker_id, limit=10, keywords=None, location=None, job_type=None, min_salary=None, max_salary=None):
+    def get_all_for_swiping(job_seeker_id, limit=10, keywords=None, location=None, job_type=None, min_salary=None, max_salary=None, company=None, after=None, radius_km=None):
         """
         Get jobs for swiping, excluding those already swiped, with optional search filters
         
+        Jobs come newest first, or best match first when searching by keywords.
+        Pass Job.feed_cursor() of the last job on a page as `after` to fetch
+        the next page.
+        
         Args:
             job_seeker_id: ID of the job seeker
             limit: Maximum number of jobs to return
-            keywords: Search terms for job title or description
+            keywords: Search terms for job title, requirements or description
+                (see app.utils.search.parse_search_query for the syntax)
             location: Job location to filter by
             job_type: Type of job (Full-time, Part-time, etc.)
             min_salary: Minimum salary (extracted from salary_range)
             max_salary: Maximum salary (extracted from salary_range)
+            company: Company name to filter by
+            after: Cursor of the last job already shown, or None for the first page
+            radius_km: With a location the gazetteer knows, also include jobs
+                in known places up to this many km away
+        
+        Without search filters, pages come from the seeker's recommendation
+        queue (best match first) where one has been built; see
+        app.models.recommendation_queue.
         """
-        conn = get_connection()
+        filtered = keywords or location or job_type or min_salary or max_salary or company
+        exclude_queued = False
+        if not filtered and RecommendationQueue.available():
+            queued = Job._get_queued_for_swiping(job_seeker_id, limit, after)
+            if queued is not None:
+                return queued
+            # Past the end of the queue: the live feed continues without the
+            # jobs the queue has already served
+            exclude_queued = True
+        return Job._get_live_for_swiping(job_seeker_id, limit, keywords, location, job_type,
+                                         min_salary, max_salary, company, after, radius_km,
+                                         exclude_queued)
+
+    @staticmethod
+    def _get_queued_for_swiping(job_seeker_id, limit, after):
+        """A page of the seeker's recommendation queue, or None to use the live query.
+        
+        Jobs the seeker has swiped right on are skipped even if a rebuild that
+        started before the swipe put them back. When the queue runs out, the
+        page is topped up from the newest live jobs that are not in the queue,
+        and the live cursor takes over from there. A queue that is missing or
+        short when a feed starts is rebuilt for the next one.
+        """
+        seek = RecommendationQueue.seek(after)
+        if seek is None:
+            return None
+        condition, params = seek
+        
+        conn = get_connection(read_only=True)
         if conn is None:
-            return []
+            return None
         
         try:
-            # Build the query with optional filters
-            query = """
-                SELECT j.id, j.job_giver_id, j.title, j.description, j.requirements, 
-                       j.location, j.salary_range, j.job_type, j.created_at, j.active,
-                       jg.company_name
-                FROM jobs j
-                JOIN job_givers jg ON j.job_giver_id = jg.id
-                WHERE j.active = TRUE
-                AND j.id NOT IN (
-                    SELECT target_id::integer FROM swipes 
-                    WHERE user_id = (SELECT user_id FROM job_seekers WHERE id = %s)
-                    AND target_type = 'job'
-                    AND direction = 'right'
-                )
-            """
-            
-            params = [job_seeker_id]
-            
-            # Add keyword search (title or description)
-            if keywords:
-                query += " AND (j.title ILIKE %s OR j.description ILIKE %s)"
-                keywords_param = f"%{keywords}%"
-                params.extend([keywords_param, keywords_param])
-            
-            # Add location filter
-            if location:
-                query += " AND j.location ILIKE %s"
-                params.append(f"%{location}%")
-            
-            # Add job type filter
-            if job_type:
-                query += " AND j.job_type = %s"
-                params.append(job_type)
-            
-            # Add salary range filters (this is approximate since salary is stored as text)
-            # In a production app, you'd store min and max salary as separate numeric fields
-            if min_salary:
-                query += " AND j.salary_range LIKE %s"
-                params.append(f"%{min_salary}%")
-            
-            if max_salary:
-                query += " AND j.salary_range LIKE %s"
-                params.append(f"%{max_salary}%")
-            
-            # Add limit
-            query += " LIMIT %s"
-            params.append(limit)
-            
             cursor = conn.cursor()
-            cursor.execute(query, params)
-            
-            jobs = []
-            for row in cursor.fetchall():
-                job = Job(
-                    id=row[0],
-                    job_giver_id=row[1],
-                    title=row[2],
-                    description=row[3],
-                    requirements=row[4],
-                    location=row[5],
-                    salary_range=row[6],
-                    job_type=row[7],
-                    created_at=row[8],
-                    active=row[9]
+            with statement_budget(cursor, "feed"):
+                execute_prepared(
+                    cursor,
+                    f"""
+                    SELECT j.id, j.job_giver_id, j.title, j.description, j.requirements,
+                           j.location, j.salary_range, j.job_type, j.created_at, j.active,
+                           jg.company_name, q.rank_key
+                    FROM recommendation_queue q
+                    JOIN jobs j ON j.id = q.target_id
+                    JOIN job_givers jg ON j.job_giver_id = jg.id
+                    WHERE q.owner_type = %s AND q.owner_id = %s AND j.active = TRUE
+                    AND NOT EXISTS (
+                        SELECT 1 FROM swipes s
+                        WHERE s.user_id = (SELECT user_id FROM job_seekers WHERE id = %s)
+                        AND s.target_type = 'job'
+                        AND s.direction = 'right'
+                        AND s.target_id = q.target_id
+                    ){condition}
+                    ORDER BY q.rank_key DESC, q.target_id DESC
+                    LIMIT %s
+                    """,
+                    [SEEKER_QUEUE, job_seeker_id, job_seeker_id] + params + [limit]
                 )
-                job.company_name = row[10]  # Add company name for display
-                jobs.append(job)
+                rows = cursor.fetchall()
+        except psycopg2.Error as e:
+            print(f"Error reading the recommendation queue for job seeker {job_seeker_id}: {e}")
+            conn.rollback()
+            return None
+        finally:
+            cursor.close()
+            release_connection(conn)
+        
+        jobs = []
+        for row in rows:
+            job = Job._from_swiping_row(row[:11])
+            job.queue_rank = row[11]
+            jobs.append(job)
+        if len(jobs) < limit:
+            # Rebuilding mid-feed would change which jobs the live part leaves out
+            if after is None:
+                RecommendationQueue.request_refresh_now(SEEKER_QUEUE, job_seeker_id)
+            jobs += Job._get_live_for_swiping(job_seeker_id, limit - len(jobs),
+                                              exclude_queued=True)
+        return jobs
+
+    @staticmethod
+    def _get_live_for_swiping(job_seeker_id, limit=10, keywords=None, location=None, job_type=None,
+                              min_salary=None, max_salary=None, company=None, after=None,
+                              radius_km=None, exclude_queued=False):
+        """get_all_for_swiping() computed from the jobs table.
+
+        exclude_queued leaves out the jobs in the seeker's recommendation
+        queue, for the part of an unfiltered feed that follows it.
+        """
+        query, params = Job._swiping_query(job_seeker_id, limit, keywords, location,
+                                           job_type, min_salary, max_salary, company, after,
+                                           radius_km=radius_km, exclude_queued=exclude_queued)
+        cache_key = ("Job.get_all_for_swiping", query, tuple(params))
+        candidates = Job._index_candidates(keywords, location, job_type, min_salary,
+                                           max_salary, company, after, radius_km)
+        
+        conn = get_connection(read_only=True)
+        if conn is None:
+            return fallback(cache_key, "jobs", [])
+        
+        try:
+            cursor = conn.cursor()
+            with statement_budget(cursor, "feed"):
+                if candidates is None:
+                    execute_prepared(cursor, query, params)
+                    rows = cursor.fetchall()
+                else:
+                    # Drop swiped jobs with the seen-set bitmap when there is one;
+                    # the candidate query then skips the anti-join on swipes
+                    seen = SeenSet.for_job_seeker(cursor, job_seeker_id)
+                    rows = Job._fetch_unswiped(cursor, candidates, job_seeker_id, limit,
+                                               keywords, after, seen=seen,
+                                               exclude_queued=exclude_queued)
             
-            return jobs
+            return remember(cache_key, [Job._from_swiping_row(row) for row in rows])
         except psycopg2.Error as e:
             print(f"Error getting jobs for swiping: {e}")
+            conn.rollback()
+            if is_timeout(e):
+                return fallback(cache_key, "jobs", [])
             return []
         finally:
             cursor.close()
-            conn.close()
+            release_connection(conn)
+
+    @staticmethod
+    def _index_candidates(keywords, location, job_type, min_salary, max_salary, company, after,
+                          radius_km=None):
+        """Ids of active jobs passing the filters, resolved by the in-memory job index.
+
+        Newest first after the cursor, except for ranked keyword searches,
+        whose order is left to Postgres. None when the index is not loaded, a
+        keyword search matches too many jobs to rank outside the GIN index, or
+        keywords are matched as substrings (before migration 6, or with no
+        searchable words), which the index's word prefixes cannot reproduce.
+        """
+        index = get_job_index()
+        if index is None:
+            return None
+        full_text = bool(keywords) and parse_search_query(keywords) is not None \
+            and has_column('jobs', 'search_vector')
+        if keywords and not full_text:
+            return None
+        
+        salary = None
+        if min_salary or max_salary:
+            if not has_column('jobs', 'salary_min'):
+                return None
+            salary = (_salary_bound(min_salary), _salary_bound(max_salary),
+                      _salary_currency(min_salary, max_salary))
+        location_ids = Job._location_ids(location, radius_km)
+        job_ids = index.match(keywords=keywords, location=location,
+                              location_ids=location_ids, job_type=job_type,
+                              company=company, salary=salary,
+                              typo_tolerant=has_extension('pg_trgm'))
+        
+        if full_text:
+            if job_ids is None or len(job_ids) > MAX_RANKED_CANDIDATES:
+                return None
+            return list(job_ids)
+        
+        position = None
+        if after:
+            try:
+                position = decode_cursor(after)
+            except ValueError:
+                pass
+        if position is not None and len(position) != 2:
+            position = None
+        return index.ordered(job_ids, after=position)
+
+    @staticmethod
+    def _fetch_unswiped(cursor, candidates, job_seeker_id, limit, keywords=None, after=None,
+                        seen=None, exclude_queued=False):
+        """Swiping rows for the first `limit` candidates the seeker has not swiped on.
+
+        Recency-ordered candidates are checked in growing chunks so a page
+        usually costs one short statement; ranked keyword candidates go in
+        one statement, since the rank decides their order. With the seeker's
+        seen set, each chunk is filtered in memory instead of by the
+        anti-join on swipes.
+        """
+        ranked = bool(keywords) and parse_search_query(keywords) is not None \
+            and has_column('jobs', 'search_vector')
+        chunk_size = len(candidates) if ranked else limit * 4
+        rows = []
+        position = 0
+        while position < len(candidates) and len(rows) < limit:
+            chunk = candidates[position:position + chunk_size]
+            position += len(chunk)
+            chunk_size *= 2
+            if seen is not None:
+                chunk = [job_id for job_id in chunk if job_id not in seen]
+                if not chunk:
+                    continue
+            query, params = Job._swiping_query(job_seeker_id, limit - len(rows), keywords,
+                                               after=after, candidate_ids=chunk,
+                                               exclude_swiped=seen is None,
+                                               exclude_queued=exclude_queued)
+            execute_prepared(cursor, query, params)
+            rows.extend(cursor.fetchall())
+        return rows
+
+    @staticmethod
+    def feed_cursor(job):
+        """Cursor that continues the swiping feed after this job"""
+        if getattr(job, "queue_rank", None) is not None:
+            return RecommendationQueue.cursor_for(job.queue_rank, job.id)
+        if getattr(job, "search_rank", None) is not None:
+            return encode_cursor(job.search_rank, job.created_at, job.id)
+        return encode_cursor(job.created_at, job.id)
+
+    @staticmethod
+    def _location_ids(location, radius_km=None):
+        """Gazetteer ids a location filter stands for, or None to match it as text"""
+        if not location or not has_column('jobs', 'location_id'):
+            return None
+        return location_filter_ids(location, radius_km)
+
+    @staticmethod
+    def _swiping_query(job_seeker_id, limit=10, keywords=None, location=None, job_type=None,
+                       min_salary=None, max_salary=None, company=None, after=None,
+                       candidate_ids=None, exclude_swiped=True, radius_km=None,
+                       exclude_queued=False):
+        """Build the get_all_for_swiping query; shared with the async repository.
+
+        With candidate_ids (already filtered by the job index) the location,
+        company, type and salary filters are replaced by a lookup of those ids.
+        exclude_swiped=False leaves out the anti-join on swipes, for candidates
+        already checked against the seeker's seen set. exclude_queued adds one
+        on the seeker's recommendation queue.
+        """
+        tsquery = parse_search_query(keywords) if keywords else None
+        full_text = tsquery is not None and has_column('jobs', 'search_vector')
+        
+        # Right swipes are excluded with an anti-join probing idx_swipes_user_target
+        # per candidate job, rather than materializing the seeker's whole swipe set.
+        query = """
+            SELECT j.id, j.job_giver_id, j.title, j.description, j.requirements, 
+                   j.location, j.salary_range, j.job_type, j.created_at, j.active,
+                   jg.company_name
+        """
+        params = []
+        if full_text:
+            query += """, ts_rank(j.search_vector, q, 1) AS search_rank
+            FROM jobs j
+            JOIN job_givers jg ON j.job_giver_id = jg.id
+            CROSS JOIN to_tsquery('english', %s) q
+            """
+            params.append(tsquery)
+        else:
+            query += """
+            FROM jobs j
+            JOIN job_givers jg ON j.job_giver_id = jg.id
+            """
+        query += " WHERE j.active = TRUE"
+        if exclude_swiped:
+            query += """
+                AND NOT EXISTS (
+                    SELECT 1 FROM swipes s
+                    WHERE s.user_id = (SELECT user_id FROM job_seekers WHERE id = %s)
+                    AND s.target_type = 'job'
+                    AND s.direction = 'right'
+                    AND s.target_id = j.id
+                )
+            """
+            params.append(job_seeker_id)
+        if exclude_queued:
+            query += """
+                AND NOT EXISTS (
+                    SELECT 1 FROM recommendation_queue rq
+                    WHERE rq.owner_type = %s AND rq.owner_id = %s AND rq.target_id = j.id
+                )
+            """
+            params.extend([SEEKER_QUEUE, job_seeker_id])
+        
+        if candidate_ids is not None:
+            query += " AND j.id = ANY(%s)"
+            params.append(list(candidate_ids))
+        
+        # Add keyword search: full-text against the GIN-indexed search_vector,
+        # or substring matching until migration 6 has added the column
+        if full_text:
+            query += " AND j.search_vector @@ q"
+        elif keywords and candidate_ids is None:
+            query += " AND (j.title ILIKE %s OR j.description ILIKE %s)"
+            keywords_param = f"%{keywords}%"
+            params.extend([keywords_param, keywords_param])
+        
+        if candidate_ids is not None:
+            location = company = job_type = min_salary = max_salary = None
+        
+        # Add location and company filters as substrings (typo-tolerant where
+        # pg_trgm is installed); places the gazetteer knows also match by their
+        # canonical ids (idx_jobs_active_location), which covers other names
+        # for them and, with a radius, places nearby
+        typo_tolerant = has_extension('pg_trgm')
+        if location:
+            condition, condition_params = substring_filter("j.location", location, typo_tolerant)
+            location_ids = Job._location_ids(location, radius_km)
+            if location_ids is not None:
+                condition = f"(j.location_id = ANY(%s) OR {condition})"
+                condition_params = [location_ids] + list(condition_params)
+            query += " AND " + condition
+            params.extend(condition_params)
+        
+        if company:
+            condition, condition_params = substring_filter("jg.company_name", company, typo_tolerant)
+            query += " AND " + condition
+            params.extend(condition_params)
+        
+        # Add job type filter
+        if job_type:
+            query += " AND j.job_type = %s"
+            params.append(job_type)
+        
+        # Add salary range filters: jobs in the same currency whose parsed
+        # yearly range overlaps the wanted one, served by idx_jobs_salary_range.
+        # Jobs without a parseable salary are left out, as are bounds that do
+        # not parse; salaries that state no currency count as DEFAULT_CURRENCY.
+        if min_salary or max_salary:
+            if has_column('jobs', 'salary_min'):
+                low, high = _salary_bound(min_salary), _salary_bound(max_salary)
+                if low is not None or high is not None:
+                    query += """
+                        AND (j.salary_min IS NOT NULL OR j.salary_max IS NOT NULL)
+                        AND int4range(j.salary_min, j.salary_max, '[]') && int4range(%s, %s, '[]')
+                        AND coalesce(j.salary_currency, %s) = %s
+                    """
+                    params.extend([low, high, DEFAULT_CURRENCY,
+                                   _salary_currency(min_salary, max_salary)])
+            else:
+                # Text matching until migration 9 has added the numeric columns
+                if min_salary:
+                    query += " AND j.salary_range LIKE %s"
+                    params.append(f"%{min_salary}%")
+                if max_salary:
+                    query += " AND j.salary_range LIKE %s"
+                    params.append(f"%{max_salary}%")
+        
+        # Seek past the previous page. Without keywords the ordering matches
+        # idx_jobs_active_created; with them the best matches come first.
+        # ts_rank() is a real; the cursor's copy is cast back so it compares exactly
+        sort_key = [("j.created_at", "%s"), ("j.id", "%s")]
+        if full_text:
+            sort_key.insert(0, ("ts_rank(j.search_vector, q, 1)", "%s::real"))
+        if after:
+            try:
+                position = decode_cursor(after)
+                if len(position) != len(sort_key):
+                    raise ValueError(f"cursor does not match the feed ordering: {after!r}")
+                query += (" AND (" + ", ".join(column for column, _ in sort_key) + ") < ("
+                          + ", ".join(placeholder for _, placeholder in sort_key) + ")")
+                params.extend(position)
+            except ValueError as e:
+                print(f"Ignoring feed cursor: {e}")
+        
+        query += " ORDER BY " + ", ".join(f"{column} DESC" for column, _ in sort_key) + " LIMIT %s"
+        params.append(limit)
+        return query, params
     
+    @write_action
     def update(self):
         """Update job details"""
         conn = get_connection()
@@ -243,17 +608,24 @@ class Job:
         
         try:
             cursor = conn.cursor()
+            salary_columns, salary_values = self._salary_values()
+            location_columns, location_values = self._location_values()
+            assignments = "".join(f", {column} = %s" for column in salary_columns + location_columns)
             cursor.execute(
-                """
+                f"""
                 UPDATE jobs
                 SET title = %s, description = %s, requirements = %s, 
-                    location = %s, salary_range = %s, job_type = %s, active = %s
+                    location = %s, salary_range = %s, job_type = %s, active = %s{assignments},
+                    updated_at = CURRENT_TIMESTAMP
                 WHERE id = %s
                 """,
-                (self.title, self.description, self.requirements, 
+                [self.title, self.description, self.requirements, 
                  self.location, self.salary_range, self.job_type, 
-                 self.active, self.id)
+                 self.active] + salary_values + location_values + [self.id]
             )
+            notify_job_changed(cursor, self.id)
+            if RecommendationQueue.available():
+                RecommendationQueue.request_refresh(cursor, JOB_QUEUE, self.id, merge=True)
             
             conn.commit()
             return True
@@ -263,14 +635,14 @@ class Job:
             return False
         finally:
             cursor.close()
-            conn.close()
+            release_connection(conn)
     @classmethod
     def get_potential_applicants(cls, job_id, job_giver_id):
         """
         Gets all job seekers who swiped right on a job, along with their match status
         with the given job_giver.
         """
-        conn = get_connection()
+        conn = get_connection(read_only=True)
         applicants_data = []
         if not conn:
             print("Failed to get database connection in get_potential_applicants.")
@@ -347,7 +719,7 @@ class Job:
             if conn:
                 if 'cursor' in locals() and cursor:
                     cursor.close()
-                conn.close()
+                release_connection(conn)
         return applicants_data
     
     def deactivate(self):
@@ -361,6 +733,7 @@ class Job:
         return self.update()
         
     @staticmethod
+    @write_action
     def set_active_status(job_id, active_status):
         """Set the active status of a job"""
         conn = get_connection()
@@ -372,11 +745,14 @@ class Job:
             cursor.execute(
                 """
                 UPDATE jobs
-                SET active = %s
+                SET active = %s, updated_at = CURRENT_TIMESTAMP
                 WHERE id = %s
                 """,
                 (active_status, job_id)
             )
+            notify_job_changed(cursor, job_id)
+            if RecommendationQueue.available():
+                RecommendationQueue.request_refresh(cursor, JOB_QUEUE, job_id, merge=True)
             
             conn.commit()
             return True
@@ -386,4 +762,4 @@ class Job:
             return False
         finally:
             cursor.close()
-            conn.close()
\ No newline at end of file
+            release_connection(conn)
\ No newline at end of file
@@ -1,5 +1,17 @@
 import psycopg2
-from app.database.connection import get_connection
+from app.database.connection import get_connection, release_connection
+from app.database.prepared import execute_prepared
+from app.database.schema import has_column
+from app.database.unit_of_work import write_action
+from app.utils.gazetteer import location_id
+
+# Statements shared by the sync model and app.models.async_repository
+SELECT_BY_USER_ID = """
+    SELECT id, user_id, company_name, company_description, website, 
+           location, credits, profile_complete
+    FROM job_givers
+    WHERE user_id = %s
+"""
 
 class JobGiver:
     def __init__(self, id=None, user_id=None, company_name=None, company_description=None, 
@@ -12,6 +24,19 @@ class JobGiver:
         self.location = location
         self.credits = credits
         self.profile_complete = profile_complete
+
+    @staticmethod
+    def _from_row(row):
+        return JobGiver(
+            id=row[0],
+            user_id=row[1],
+            company_name=row[2],
+            company_description=row[3],
+            website=row[4],
+            location=row[5],
+            credits=row[6],
+            profile_complete=row[7]
+        )
     
     @staticmethod
     def get_by_user_id(user_id):
@@ -25,27 +50,12 @@ class JobGiver:
                 return None
 
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT id, user_id, company_name, company_description, website, 
-                       location, credits, profile_complete
-                FROM job_givers
-                WHERE user_id = %s
-            """, (user_id,))
+            execute_prepared(cursor, SELECT_BY_USER_ID, (user_id,))
             
             result = cursor.fetchone()
             
             if result:
-                job_giver = JobGiver(
-                    id=result[0],
-                    user_id=result[1],
-                    company_name=result[2],
-                    company_description=result[3],
-                    website=result[4],
-                    location=result[5],
-                    credits=result[6],
-                    profile_complete=result[7]
-                )
-                return job_giver
+                return JobGiver._from_row(result)
             return None
         except Exception as e:
             print(f"Error getting job giver by user ID {user_id}: {e}")
@@ -58,10 +68,11 @@ class JobGiver:
                     print(f"Error closing cursor: {e}")
             if conn:
                 try:
-                    conn.close()
+                    release_connection(conn)
                 except Exception as e:
                     print(f"Error closing connection: {e}")
     
+    @write_action
     def update_profile(self):
         """Update job giver profile"""
         conn = get_connection()
@@ -70,16 +81,21 @@ class JobGiver:
         
         try:
             cursor = conn.cursor()
+            # Canonical gazetteer id for the location, once migration 17 has added the column
+            location_columns, location_values = [], []
+            if has_column('job_givers', 'location_id'):
+                location_columns, location_values = ["location_id"], [location_id(self.location)]
+            assignments = "".join(f", {column} = %s" for column in location_columns)
             cursor.execute(
-                """
+                f"""
                 UPDATE job_givers
                 SET company_name = %s, company_description = %s, website = %s, 
-                    location = %s, profile_complete = %s
+                    location = %s, profile_complete = %s{assignments}
                 WHERE user_id = %s
                 RETURNING id
                 """,
-                (self.company_name, self.company_description, self.website, 
-                 self.location, True, self.user_id)
+                [self.company_name, self.company_description, self.website, 
+                 self.location, True] + location_values + [self.user_id]
             )
             
             updated_id = cursor.fetchone()[0]
@@ -93,8 +109,9 @@ class JobGiver:
             return False
         finally:
             cursor.close()
-            conn.close()
+            release_connection(conn)
     
+    @write_action
     def add_credits(self, amount):
         """Add credits to job giver account"""
         conn = get_connection()
@@ -135,8 +152,9 @@ class JobGiver:
             return False
         finally:
             cursor.close()
-            conn.close()
+            release_connection(conn)
     
+    @write_action
     def use_credit(self, amount=10):
         """Use credits for a match"""
         if self.credits < amount:
@@ -184,4 +202,4 @@ class JobGiver:
             return False, f"Error: {str(e)}"
         finally:
             cursor.close()
-            conn.close()
\ No newline at end of file
+            release_connection(conn)
\ No newline at end of file
@@ -1,5 +1,60 @@
+import os
+from bisect import bisect_right
+from itertools import groupby
+from operator import itemgetter
+
 import psycopg2
-from app.database.connection import get_connection
+from app.database.connection import get_connection, release_connection
+from app.database.prepared import execute_prepared
+from app.database.timeouts import (LastGoodCache, fallback, is_timeout, remember,
+                                   statement_budget)
+from app.database.schema import has_column, has_extension
+from app.database.unit_of_work import write_action
+from app.models.recommendation_queue import (INTERESTED_BOOST, JOB_QUEUE, SEEKER_QUEUE,
+                                             RecommendationQueue)
+from app.models.seen_set import SeenSet
+from app.utils.gazetteer import location_filter_ids, location_id
+from app.utils.pagination import decode_cursor, encode_cursor
+from app.utils.ranking import CANDIDATE_SCORE_CACHE_JOBS, candidate_scores, score_candidates
+from app.utils.similarity import get_similarity_model
+from app.utils.search import substring_filter
+from app.utils.skills import normalize_skills
+
+# Statements shared by the sync model and app.models.async_repository
+SELECT_BY_USER_ID = """
+    SELECT id, user_id, full_name, bio, skills, experience, education, 
+           location, cv_path, credits, profile_complete
+    FROM job_seekers
+    WHERE user_id = %s
+"""
+
+SELECT_CONTACT_DETAILS = """
+    SELECT js.full_name, js.bio, js.skills, js.experience,
+           js.education, js.location, js.cv_path,
+           u.email
+    FROM job_seekers js
+    JOIN users u ON js.user_id = u.id
+    WHERE js.id = %s
+"""
+
+SWIPING_COLUMNS = """
+    js.id, js.user_id, js.full_name, js.bio, js.skills,
+    js.experience, js.education, js.location, js.credits
+"""
+
+# Whether the candidate swiped right on the job (%s), read through
+# idx_swipes_user_target; the live ranked deck sorts on it first
+INTERESTED_COLUMN = """
+    EXISTS (
+        SELECT 1 FROM swipes s
+        WHERE s.user_id = js.user_id AND s.target_type = 'job'
+        AND s.direction = 'right' AND s.target_id = %s
+    )
+"""
+
+# How long a ranked recruiter deck is reused for its later pages
+CANDIDATE_RANKING_TTL = int(os.environ.get("CANDIDATE_RANKING_TTL", 120))
+_ranked_decks = LastGoodCache(CANDIDATE_SCORE_CACHE_JOBS, CANDIDATE_RANKING_TTL)
 
 class JobSeeker:
     def __init__(self, id=None, user_id=None, full_name=None, bio=None, skills=None, 
@@ -16,6 +71,38 @@ class JobSeeker:
         self.cv_path = cv_path
         self.credits = credits
         self.profile_complete = profile_complete
+
+    @staticmethod
+    def _from_row(row):
+        """Build a JobSeeker from a row of SELECT_BY_USER_ID"""
+        return JobSeeker(
+            id=row[0],
+            user_id=row[1],
+            full_name=row[2],
+            bio=row[3],
+            skills=row[4],
+            experience=row[5],
+            education=row[6],
+            location=row[7],
+            cv_path=row[8],
+            credits=row[9],
+            profile_complete=row[10]
+        )
+
+    @staticmethod
+    def _from_swiping_row(row):
+        return JobSeeker(
+            id=row[0],
+            user_id=row[1],
+            full_name=row[2],
+            bio=row[3],
+            skills=row[4],
+            experience=row[5],
+            education=row[6],
+            location=row[7],
+            credits=row[8],
+            profile_complete=True
+        )
     
     @staticmethod
     def get_by_user_id(user_id):
@@ -26,39 +113,40 @@ class JobSeeker:
         
         try:
             cursor = conn.cursor()
-            cursor.execute(
-                """
-                SELECT id, user_id, full_name, bio, skills, experience, education, 
-                       location, cv_path, credits, profile_complete
-                FROM job_seekers
-                WHERE user_id = %s
-                """,
-                (user_id,)
-            )
+            execute_prepared(cursor, SELECT_BY_USER_ID, (user_id,))
             
             seeker_data = cursor.fetchone()
             if seeker_data:
-                return JobSeeker(
-                    id=seeker_data[0],
-                    user_id=seeker_data[1],
-                    full_name=seeker_data[2],
-                    bio=seeker_data[3],
-                    skills=seeker_data[4],
-                    experience=seeker_data[5],
-                    education=seeker_data[6],
-                    location=seeker_data[7],
-                    cv_path=seeker_data[8],
-                    credits=seeker_data[9],
-                    profile_complete=seeker_data[10]
-                )
+                return JobSeeker._from_row(seeker_data)
             return None
         except psycopg2.Error as e:
             print(f"Error getting job seeker: {e}")
             return None
         finally:
             cursor.close()
-            conn.close()
+            release_connection(conn)
     
+    @staticmethod
+    def get_contact_details(job_seeker_id):
+        """(full_name, bio, skills, experience, education, location, cv_path,
+        email) for a matched seeker's full profile, or None"""
+        conn = get_connection(read_only=True)
+        if conn is None:
+            return None
+        
+        try:
+            cursor = conn.cursor()
+            cursor.execute(SELECT_CONTACT_DETAILS, (job_seeker_id,))
+            return cursor.fetchone()
+        except psycopg2.Error as e:
+            print(f"Error getting job seeker details: {e}")
+            conn.rollback()
+            return None
+        finally:
+            cursor.close()
+            release_connection(conn)
+    
+    @write_action
     def update_profile(self):
         """Update job seeker profile"""
         conn = get_connection()
@@ -67,20 +155,28 @@ class JobSeeker:
         
         try:
             cursor = conn.cursor()
+            # Canonical gazetteer id for the location, once migration 17 has added the column
+            location_columns, location_values = [], []
+            if has_column('job_seekers', 'location_id'):
+                location_columns, location_values = ["location_id"], [location_id(self.location)]
+            assignments = "".join(f", {column} = %s" for column in location_columns)
             cursor.execute(
-                """
+                f"""
                 UPDATE job_seekers
                 SET full_name = %s, bio = %s, skills = %s, experience = %s, 
-                    education = %s, location = %s, cv_path = %s, profile_complete = %s
+                    education = %s, location = %s, cv_path = %s, profile_complete = %s,
+                    updated_at = CURRENT_TIMESTAMP{assignments}
                 WHERE user_id = %s
                 RETURNING id
                 """,
-                (self.full_name, self.bio, self.skills, self.experience, 
+                [self.full_name, self.bio, self.skills, self.experience, 
                  self.education, self.location, self.cv_path, 
-                 True, self.user_id)
+                 True] + location_values + [self.user_id]
             )
             
             updated_id = cursor.fetchone()[0]
+            if RecommendationQueue.available():
+                RecommendationQueue.request_refresh(cursor, SEEKER_QUEUE, updated_id, merge=True)
             conn.commit()
             self.id = updated_id
             self.profile_complete = True
@@ -91,13 +187,16 @@ class JobSeeker:
             return False
         finally:
             cursor.close()
-            conn.close()
+            release_connection(conn)
     
     @staticmethod
-    def get_all_for_swiping(job_giver_id, limit=10, skills=None, min_experience=None, location=None, education=None, job_id=None):
+    def get_all_for_swiping(job_giver_id, limit=10, skills=None, min_experience=None, location=None, education=None, job_id=None, after=None, match_any_skill=False, radius_km=None):
         """
         Get job seekers for swiping, excluding those already swiped, with optional search filters
         
+        Candidates come in ID order. Pass JobSeeker.feed_cursor() of the last
+        candidate on a page as `after` to fetch the next page.
+        
         Args:
             job_giver_id: ID of the job giver
             limit: Maximum number of job seekers to return
@@ -106,142 +205,462 @@ class JobSeeker:
             location: Location to filter by
             education: Education level or institution to filter by
             job_id: Optional specific job ID to filter candidates for
+            after: Cursor of the last candidate already shown, or None for the first page
+            match_any_skill: Accept candidates with any of the skills instead of all of them
+            radius_km: With a location the gazetteer knows, also include
+                candidates in known places up to this many km away
         """
-        conn = get_connection()
+        query, params = JobSeeker._swiping_query(job_giver_id, limit, skills, min_experience,
+                                                 location, education, job_id, after,
+                                                 match_any_skill, radius_km=radius_km)
+        cache_key = ("JobSeeker.get_all_for_swiping", query, tuple(params))
+        
+        conn = get_connection(read_only=True)
         if conn is None:
-            return []
+            return fallback(cache_key, "candidates", [])
         
         try:
-            # Build the query with optional filters
-            query = """
-                SELECT js.id, js.user_id, js.full_name, js.bio, js.skills, 
-                       js.experience, js.education, js.location, js.credits
-                FROM job_seekers js
-                JOIN users u ON js.user_id = u.id
-                WHERE js.profile_complete = TRUE
-            """
-            
-            params = []
-            
-            # First, check if the job_id column exists in the swipes table
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name='swipes' AND column_name='job_id'
-            """)
-            
-            job_id_column_exists = cursor.fetchone() is not None
-            
-            # If a specific job ID is provided, only exclude candidates already swiped for this job
-            if job_id and job_id_column_exists:
-                query += """
-                    AND js.id NOT IN (
-                        SELECT target_id::integer FROM swipes 
-                        WHERE user_id = (SELECT user_id FROM job_givers WHERE id = %s)
-                        AND target_type = 'job_seeker'
-                        AND direction = 'right'
-                        AND job_id = %s
-                    )
-                """
-                params.extend([job_giver_id, job_id])
-            elif job_id:
-                # If job_id is provided but the column doesn't exist yet, use a simpler query
-                print("job_id column doesn't exist yet, using simpler query")
-                query += """
-                    AND js.id NOT IN (
-                        SELECT target_id::integer FROM swipes 
-                        WHERE user_id = (SELECT user_id FROM job_givers WHERE id = %s)
-                        AND target_type = 'job_seeker'
-                        AND direction = 'right'
-                    )
-                """
-                params.append(job_giver_id)
-            else:
-                # No job_id provided: exclude all candidates swiped right on for any job
-                query += """
-                    AND js.id NOT IN (
-                        SELECT target_id::integer FROM swipes 
-                        WHERE user_id = (SELECT user_id FROM job_givers WHERE id = %s)
-                        AND target_type = 'job_seeker'
-                        AND direction = 'right'
-                    )
-                """
-                params.append(job_giver_id)
-            
-            # Also exclude candidates that are already matched with this job giver for this job
-            if job_id:
-                query += """
-                    AND js.id NOT IN (
-                        SELECT job_seeker_id FROM matches
-                        WHERE job_giver_id = %s
-                        AND job_id = %s
-                    )
-                """
-                params.extend([job_giver_id, job_id])
-            
-            # This line was causing the error - we don't need to add job_giver_id again
-            # params.append(job_giver_id)
-            
-            # Add skills filter
-            if skills:
-                # Convert string to list if needed
-                if isinstance(skills, str):
-                    skills_list = [s.strip() for s in skills.split(',')]
+            with statement_budget(cursor, "feed"):
+                # With the job giver's seen-set bitmap, swiped candidates are
+                # skipped in memory instead of by the NOT IN over swipes
+                seen_job_id = job_id if job_id and has_column('swipes', 'job_id') else 0
+                seen = SeenSet.for_job_giver(cursor, job_giver_id, seen_job_id)
+                if seen is None:
+                    cursor.execute(query, params)
+                    rows = cursor.fetchall()
                 else:
-                    skills_list = skills
-                
-                # For each skill, check if it's in the skills array
-                for skill in skills_list:
-                    query += " AND %s = ANY(js.skills)"
-                    params.append(skill)
+                    rows = JobSeeker._fetch_unseen(cursor, seen, job_giver_id, limit, skills,
+                                                   min_experience, location, education,
+                                                   job_id, after, match_any_skill, radius_km)
             
-            # Add minimum experience filter
-            if min_experience is not None:
-                query += " AND js.experience >= %s"
-                params.append(min_experience)
-            
-            # Add location filter
-            if location:
-                query += " AND js.location ILIKE %s"
-                params.append(f"%{location}%")
-            
-            # Add education filter
-            if education:
-                query += " AND js.education ILIKE %s"
-                params.append(f"%{education}%")
-            
-            # Add limit
-            query += " LIMIT %s"
-            params.append(limit)
-            
-            # We already created a cursor above, so we don't need to create it again
-            # cursor = conn.cursor()
-            cursor.execute(query, params)
-            
-            seekers = []
-            for row in cursor.fetchall():
-                seekers.append(JobSeeker(
-                    id=row[0],
-                    user_id=row[1],
-                    full_name=row[2],
-                    bio=row[3],
-                    skills=row[4],
-                    experience=row[5],
-                    education=row[6],
-                    location=row[7],
-                    credits=row[8],
-                    profile_complete=True
-                ))
-            
-            return seekers
+            return remember(cache_key, [JobSeeker._from_swiping_row(row) for row in rows])
         except psycopg2.Error as e:
             print(f"Error getting job seekers for swiping: {e}")
+            conn.rollback()
+            if is_timeout(e):
+                return fallback(cache_key, "candidates", [])
+            return []
+        finally:
+            cursor.close()
+            release_connection(conn)
+
+    @staticmethod
+    def get_ranked_for_job(job_giver_id, job, limit=10, skills=None, min_experience=None,
+                           location=None, education=None, after=None, match_any_skill=False,
+                           radius_km=None):
+        """
+        Get job seekers for swiping on a job, best fit first
+        
+        Every eligible candidate (same filters and exclusions as
+        get_all_for_swiping) is scored against the job in one vectorized pass;
+        scores are cached per job and profile version, so later pages only
+        score profiles that are new or have changed. Candidates who already
+        swiped right on the job come first, since a right swipe from the job
+        giver turns them straight into a match. Pass
+        JobSeeker.ranked_cursor() of the last candidate on a page as `after`
+        to fetch the next page. Each returned seeker has a `relevance` score
+        and an `interested` flag.
+        
+        Without search filters, pages come from the job's recommendation
+        queue where one has been built (see app.models.recommendation_queue).
+        """
+        exclude_queued = False
+        if not (skills or min_experience or location or education) and RecommendationQueue.available():
+            queued = JobSeeker._get_queued_for_job(job_giver_id, job, limit, after)
+            if queued is not None:
+                return queued
+            # Past the end of the queue: the live ranking continues without
+            # the candidates the queue has already served
+            exclude_queued = True
+        return JobSeeker._get_live_ranked_for_job(job_giver_id, job, limit, skills, min_experience,
+                                                  location, education, after, match_any_skill,
+                                                  radius_km, exclude_queued)
+
+    @staticmethod
+    def _get_queued_for_job(job_giver_id, job, limit, after):
+        """A page of the job's recommendation queue, or None to rank live.
+        
+        Candidates the job giver has swiped right on for the job are skipped
+        even if a rebuild that started before the swipe put them back. When
+        the queue runs out, the page is topped up from the top of the live
+        ranking without the queued candidates, and the live cursor takes over
+        from there. A queue that is missing or short when a feed starts is
+        rebuilt for the next one.
+        """
+        seek = RecommendationQueue.seek(after)
+        if seek is None:
+            return None
+        condition, params = seek
+        
+        conn = get_connection(read_only=True)
+        if conn is None:
+            return None
+        
+        try:
+            cursor = conn.cursor()
+            with statement_budget(cursor, "feed"):
+                execute_prepared(
+                    cursor,
+                    f"""
+                    SELECT {SWIPING_COLUMNS}, q.rank_key
+                    FROM recommendation_queue q
+                    JOIN job_seekers js ON js.id = q.target_id
+                    WHERE q.owner_type = %s AND q.owner_id = %s
+                    AND js.profile_complete = TRUE
+                    AND NOT EXISTS (
+                        SELECT 1 FROM swipes s
+                        WHERE s.user_id = (SELECT user_id FROM job_givers WHERE id = %s)
+                        AND s.target_type = 'job_seeker'
+                        AND s.direction = 'right'
+                        AND s.job_id = %s
+                        AND s.target_id = q.target_id
+                    ){condition}
+                    ORDER BY q.rank_key DESC, q.target_id DESC
+                    LIMIT %s
+                    """,
+                    [JOB_QUEUE, job.id, job_giver_id, job.id] + params + [limit]
+                )
+                rows = cursor.fetchall()
+        except psycopg2.Error as e:
+            print(f"Error reading the recommendation queue for job {job.id}: {e}")
+            conn.rollback()
+            return None
+        finally:
+            cursor.close()
+            release_connection(conn)
+        
+        seekers = []
+        for row in rows:
+            seeker = JobSeeker._from_swiping_row(row)
+            seeker.queue_rank = row[-1]
+            seeker.interested = seeker.queue_rank >= INTERESTED_BOOST
+            seeker.relevance = seeker.queue_rank - (INTERESTED_BOOST if seeker.interested else 0.0)
+            seekers.append(seeker)
+        if len(seekers) < limit:
+            # Rebuilding mid-feed would change which candidates the live part leaves out
+            if after is None:
+                RecommendationQueue.request_refresh_now(JOB_QUEUE, job.id)
+            seekers += JobSeeker._get_live_ranked_for_job(job_giver_id, job, limit - len(seekers),
+                                                          exclude_queued=True)
+        return seekers
+
+    @staticmethod
+    def _get_live_ranked_for_job(job_giver_id, job, limit=10, skills=None, min_experience=None,
+                                 location=None, education=None, after=None, match_any_skill=False,
+                                 radius_km=None, exclude_queued=False):
+        """get_ranked_for_job() computed from the job_seekers table.
+
+        The first page ranks every eligible candidate and keeps the order for
+        CANDIDATE_RANKING_TTL seconds; later pages of the same deck seek into
+        it and only recheck their own candidates against the filters and the
+        job giver's swipes. exclude_queued leaves out the candidates in the
+        job's recommendation queue, for the part of an unfiltered feed that
+        follows it.
+        """
+        deck_key = ("JobSeeker.get_ranked_for_job", job_giver_id, job.id,
+                    tuple(normalize_skills(skills)), min_experience, location, education,
+                    match_any_skill, radius_km, exclude_queued)
+        cache_key = deck_key + (limit, after)
+        
+        conn = get_connection(read_only=True)
+        if conn is None:
+            return fallback(cache_key, "candidates", [])
+        
+        try:
+            cursor = conn.cursor()
+            with statement_budget(cursor, "feed"):
+                seen_job_id = job.id if has_column('swipes', 'job_id') else 0
+                seen = SeenSet.for_job_giver(cursor, job_giver_id, seen_job_id)
+
+                def eligible(columns):
+                    return JobSeeker._eligible_query(
+                        columns, job_giver_id, skills, min_experience, location, education,
+                        job.id, match_any_skill, exclude_swiped=seen is None, radius_km=radius_km
+                    )
+
+                ranked = _ranked_decks.get(deck_key)[0] if after else None
+                if ranked is None:
+                    ranked = JobSeeker._rank_candidates(cursor, job, eligible, seen,
+                                                        exclude_queued)
+                    _ranked_decks.put(deck_key, ranked)
+                start = 0
+                if after:
+                    try:
+                        last_tier, last_score, last_id = decode_cursor(after)
+                        start = bisect_right(ranked, (bool(last_tier), -last_score, last_id))
+                    except (TypeError, ValueError) as e:
+                        print(f"Ignoring candidate cursor: {e}")
+                
+                # Candidates swiped on, matched or changed since the deck was
+                # ranked drop out here; the next ones take their place
+                seekers = []
+                while len(seekers) < limit and start < len(ranked):
+                    page = ranked[start:start + limit - len(seekers)]
+                    start += len(page)
+                    query, params = eligible(SWIPING_COLUMNS)
+                    cursor.execute(query + " AND js.id = ANY(%s)",
+                                   params + [[seeker_id for _, _, seeker_id in page]])
+                    rows = {row[0]: row for row in cursor.fetchall()
+                            if seen is None or row[0] not in seen}
+                    for not_interested, negative_score, seeker_id in page:
+                        if seeker_id in rows:
+                            seeker = JobSeeker._from_swiping_row(rows[seeker_id])
+                            seeker.relevance = -negative_score
+                            seeker.interested = not not_interested
+                            seekers.append(seeker)
+            return remember(cache_key, seekers)
+        except psycopg2.Error as e:
+            print(f"Error ranking job seekers for job {job.id}: {e}")
+            conn.rollback()
+            if is_timeout(e):
+                return fallback(cache_key, "candidates", [])
             return []
         finally:
             cursor.close()
-            conn.close()
+            release_connection(conn)
+
+    @staticmethod
+    def _rank_candidates(cursor, job, eligible, seen, exclude_queued):
+        """Sort keys (tier, -score, id) of every eligible candidate, best first;
+        tier 0 holds the candidates who swiped right on the job, whom Postgres
+        sorts first"""
+        query, params = eligible(f"js.id, js.updated_at, {INTERESTED_COLUMN} AS interested")
+        cursor.execute(query + " ORDER BY interested DESC", [job.id] + params)
+        candidates = [row for row in cursor.fetchall() if seen is None or row[0] not in seen]
+        if exclude_queued:
+            cursor.execute(
+                """
+                SELECT target_id FROM recommendation_queue
+                WHERE owner_type = %s AND owner_id = %s
+                """,
+                (JOB_QUEUE, job.id)
+            )
+            queued = {row[0] for row in cursor.fetchall()}
+            candidates = [row for row in candidates if row[0] not in queued]
+        
+        scores = candidate_scores.scores_for(job)
+        stale = [seeker_id for seeker_id, version, _ in candidates
+                 if scores.get(seeker_id, (None,))[0] != version]
+        if stale:
+            JobSeeker._score_candidates(cursor, job, stale, scores)
+        ranked = []
+        for interested, tier in groupby(candidates, key=itemgetter(2)):
+            ranked += sorted((not interested, -scores[seeker_id][1], seeker_id)
+                             for seeker_id, _, _ in tier if seeker_id in scores)
+        return ranked
+
+    @staticmethod
+    def _score_candidates(cursor, job, seeker_ids, scores):
+        """Score these candidates for the job and store them in `scores`"""
+        cursor.execute(
+            """
+            SELECT id, skills, experience, location, education, updated_at
+            FROM job_seekers WHERE id = ANY(%s)
+            """,
+            (seeker_ids,)
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            return
+        profiles = [JobSeeker(id=row[0], skills=row[1], experience=row[2], location=row[3],
+                              education=row[4]) for row in rows]
+        model = get_similarity_model()
+        text_similarity = None
+        if model is not None:
+            text_similarity = model.similarities("job", job.id, "seeker",
+                                                 [profile.id for profile in profiles])
+        for row, score in zip(rows, score_candidates(job, profiles, text_similarity)):
+            scores[row[0]] = (row[5], float(score))
+
+    @staticmethod
+    def _interested_in_job(cursor, job_id):
+        """Ids of job seekers who swiped right on the job, matched ones included.
+        
+        Read through idx_swipes_target (target_type, target_id, direction), so
+        the cost follows the job's own right swipes rather than the candidate
+        pool. Ranking uses INTERESTED_COLUMN instead.
+        """
+        cursor.execute(
+            """
+            SELECT DISTINCT js.id
+            FROM swipes s
+            JOIN job_seekers js ON js.user_id = s.user_id
+            WHERE s.target_type = 'job' AND s.target_id = %s AND s.direction = 'right'
+            """,
+            (job_id,)
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+    @staticmethod
+    def ranked_cursor(job_seeker):
+        """Cursor that continues get_ranked_for_job after this job seeker"""
+        if getattr(job_seeker, "queue_rank", None) is not None:
+            return RecommendationQueue.cursor_for(job_seeker.queue_rank, job_seeker.id)
+        return encode_cursor(0 if getattr(job_seeker, "interested", False) else 1,
+                             job_seeker.relevance, job_seeker.id)
+
+    @staticmethod
+    def _fetch_unseen(cursor, seen, job_giver_id, limit, skills, min_experience, location,
+                      education, job_id, after, match_any_skill, radius_km=None):
+        """Swiping rows for the first `limit` candidates not in the seen set,
+        scanning forward in growing id-ordered chunks"""
+        rows = []
+        chunk_size = limit * 2
+        while len(rows) < limit:
+            query, params = JobSeeker._swiping_query(job_giver_id, chunk_size, skills,
+                                                     min_experience, location, education,
+                                                     job_id, after, match_any_skill,
+                                                     exclude_swiped=False, radius_km=radius_km)
+            cursor.execute(query, params)
+            batch = cursor.fetchall()
+            rows.extend(row for row in batch if row[0] not in seen)
+            if len(batch) < chunk_size:
+                break
+            after = batch[-1][0]
+            chunk_size *= 2
+        return rows[:limit]
+
+    @staticmethod
+    def feed_cursor(job_seeker):
+        """Cursor that continues the candidate feed after this job seeker"""
+        return job_seeker.id
+
+    @staticmethod
+    def _swiping_query(job_giver_id, limit=10, skills=None, min_experience=None, location=None,
+                       education=None, job_id=None, after=None, match_any_skill=False,
+                       exclude_swiped=True, radius_km=None):
+        """Build the get_all_for_swiping query; shared with the async repository.
+
+        exclude_swiped=False leaves out the NOT IN over swipes, for callers
+        that check candidates against the job giver's seen set.
+        """
+        query, params = JobSeeker._eligible_query(SWIPING_COLUMNS, job_giver_id, skills,
+                                                  min_experience, location, education, job_id,
+                                                  match_any_skill, exclude_swiped, radius_km)
+        
+        # Seek past the previous page
+        if after is not None:
+            query += " AND js.id > %s"
+            params.append(after)
+        
+        query += " ORDER BY js.id LIMIT %s"
+        params.append(limit)
+        return query, params
+
+    @staticmethod
+    def _eligible_query(columns, job_giver_id, skills=None, min_experience=None, location=None,
+                        education=None, job_id=None, match_any_skill=False, exclude_swiped=True,
+                        radius_km=None):
+        """SELECT `columns` of the candidates the job giver may swipe on, with the search filters"""
+        # Build the query with optional filters
+        query = f"""
+            SELECT {columns}
+            FROM job_seekers js
+            JOIN users u ON js.user_id = u.id
+            WHERE js.profile_complete = TRUE
+        """
+        
+        params = []
+        
+        job_id_column_exists = has_column('swipes', 'job_id')
+        
+        # If a specific job ID is provided, only exclude candidates already swiped for this job
+        if not exclude_swiped:
+            pass  # Checked against the seen set by the caller
+        elif job_id and job_id_column_exists:
+            query += """
+                AND js.id NOT IN (
+                    SELECT target_id::integer FROM swipes 
+                    WHERE user_id = (SELECT user_id FROM job_givers WHERE id = %s)
+                    AND target_type = 'job_seeker'
+                    AND direction = 'right'
+                    AND job_id = %s
+                )
+            """
+            params.extend([job_giver_id, job_id])
+        elif job_id:
+            # If job_id is provided but the column doesn't exist yet, use a simpler query
+            print("job_id column doesn't exist yet, using simpler query")
+            query += """
+                AND js.id NOT IN (
+                    SELECT target_id::integer FROM swipes 
+                    WHERE user_id = (SELECT user_id FROM job_givers WHERE id = %s)
+                    AND target_type = 'job_seeker'
+                    AND direction = 'right'
+                )
+            """
+            params.append(job_giver_id)
+        else:
+            # No job_id provided: exclude all candidates swiped right on for any job
+            query += """
+                AND js.id NOT IN (
+                    SELECT target_id::integer FROM swipes 
+                    WHERE user_id = (SELECT user_id FROM job_givers WHERE id = %s)
+                    AND target_type = 'job_seeker'
+                    AND direction = 'right'
+                )
+            """
+            params.append(job_giver_id)
+        
+        # Also exclude candidates that are already matched with this job giver for this job
+        if job_id:
+            query += """
+                AND js.id NOT IN (
+                    SELECT job_seeker_id FROM matches
+                    WHERE job_giver_id = %s
+                    AND job_id = %s
+                )
+            """
+            params.extend([job_giver_id, job_id])
+        
+        # Add skills filter: candidates with all of the skills (or any of them),
+        # compared case-insensitively through the GIN-indexed skills_normalized
+        skills_list = normalize_skills(skills)
+        if skills_list and has_column('job_seekers', 'skills_normalized'):
+            query += " AND js.skills_normalized " + ("&&" if match_any_skill else "@>") + " %s::text[]"
+            params.append(skills_list)
+        elif skills:
+            # Until migration 11 has added skills_normalized
+            if isinstance(skills, str):
+                skills_list = [s.strip() for s in skills.split(',')]
+            else:
+                skills_list = skills
+            if match_any_skill:
+                query += " AND js.skills && %s::text[]"
+                params.append(list(skills_list))
+            else:
+                for skill in skills_list:
+                    query += " AND %s = ANY(js.skills)"
+                    params.append(skill)
+        
+        # Add minimum experience filter
+        if min_experience is not None:
+            query += " AND js.experience >= %s"
+            params.append(min_experience)
+        
+        # Add location and education filters as substrings (typo-tolerant where
+        # pg_trgm is installed); places the gazetteer knows also match by their
+        # canonical ids (idx_job_seekers_location)
+        typo_tolerant = has_extension('pg_trgm')
+        if location:
+            condition, condition_params = substring_filter("js.location", location, typo_tolerant)
+            location_ids = None
+            if has_column('job_seekers', 'location_id'):
+                location_ids = location_filter_ids(location, radius_km)
+            if location_ids is not None:
+                condition = f"(js.location_id = ANY(%s) OR {condition})"
+                condition_params = [location_ids] + list(condition_params)
+            query += " AND " + condition
+            params.extend(condition_params)
+        
+        if education:
+            condition, condition_params = substring_filter("js.education", education, typo_tolerant)
+            query += " AND " + condition
+            params.extend(condition_params)
+        return query, params
     
+    @write_action
     def add_credits(self, amount):
         """Add credits to job seeker account"""
         conn = get_connection()
@@ -282,7 +701,7 @@ class JobSeeker:
             return False
         finally:
             cursor.close()
-            conn.close()
+            release_connection(conn)
     
     def redeem_credits(self, amount_to_redeem: int = 100, upi_id: str = None, whatsapp_number: str = None):
         """
@@ -303,6 +722,7 @@ class JobSeeker:
         
         return True, "Please provide your UPI ID and WhatsApp number to complete the redemption."
     
+    @write_action
     def create_redemption_request(self, amount_to_redeem: int, upi_id: str, whatsapp_number: str):
         """
         Create a redemption request with UPI ID and WhatsApp number.
@@ -391,4 +811,4 @@ class JobSeeker:
             return False, f"Error: {str(e)}"
         finally:
             cursor.close()
-            conn.close()
\ No newline at end of file
+            release_connection(conn)
\ No newline at end of file
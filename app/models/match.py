@@ -1,5 +1,40 @@
 import psycopg2
-from app.database.connection import get_connection
+from app.database.connection import get_connection, release_connection
+from app.database.timeouts import fallback, is_timeout, remember, statement_budget
+from app.database.unit_of_work import write_action
+
+# Statements shared by the sync model and app.models.async_repository
+SELECT_FOR_JOB_SEEKER = """
+    SELECT m.id, m.job_seeker_id, m.job_giver_id, m.job_id, 
+           m.created_at, m.status,
+           j.title, jg.company_name
+    FROM matches m
+    JOIN jobs j ON m.job_id = j.id
+    JOIN job_givers jg ON m.job_giver_id = jg.id
+    WHERE m.job_seeker_id = %s
+    ORDER BY m.created_at DESC
+"""
+
+SELECT_FOR_JOB_GIVER = """
+    SELECT m.id, m.job_seeker_id, m.job_giver_id, m.job_id, 
+           m.created_at, m.status,
+           j.title, js.full_name
+    FROM matches m
+    JOIN jobs j ON m.job_id = j.id
+    JOIN job_seekers js ON m.job_seeker_id = js.id
+    WHERE m.job_giver_id = %s
+    ORDER BY m.created_at DESC
+"""
+
+SELECT_RECENT = """
+    SELECT m.created_at, js.full_name, jg.company_name, j.title
+    FROM matches m
+    JOIN job_seekers js ON m.job_seeker_id = js.id
+    JOIN job_givers jg ON m.job_giver_id = jg.id
+    JOIN jobs j ON m.job_id = j.id
+    ORDER BY m.created_at DESC
+    LIMIT %s
+"""
 
 class Match:
     def __init__(self, id=None, job_seeker_id=None, job_giver_id=None, job_id=None, 
@@ -10,11 +45,36 @@ class Match:
         self.job_id = job_id
         self.created_at = created_at
         self.status = status or 'active'
+
+    @staticmethod
+    def _from_row(row):
+        return Match(
+            id=row[0],
+            job_seeker_id=row[1],
+            job_giver_id=row[2],
+            job_id=row[3],
+            created_at=row[4],
+            status=row[5]
+        )
+
+    @staticmethod
+    def _from_job_seeker_row(row):
+        match = Match._from_row(row)
+        match.job_title = row[6]
+        match.company_name = row[7]
+        return match
+
+    @staticmethod
+    def _from_job_giver_row(row):
+        match = Match._from_row(row)
+        match.job_title = row[6]
+        match.job_seeker_name = row[7]
+        return match
     
     @staticmethod
     def get_by_id(match_id):
         """Get a match by ID"""
-        conn = get_connection()
+        conn = get_connection(read_only=True)
         if conn is None:
             return None
         
@@ -45,108 +105,92 @@ class Match:
             return None
         finally:
             cursor.close()
-            conn.close()
+            release_connection(conn)
     
     @staticmethod
     def get_for_job_seeker(job_seeker_id):
         """Get all matches for a job seeker"""
-        conn = get_connection()
+        cache_key = ("Match.get_for_job_seeker", job_seeker_id)
+        conn = get_connection(read_only=True)
         if conn is None:
-            return []
+            return fallback(cache_key, "matches", [])
         
         try:
             cursor = conn.cursor()
-            cursor.execute(
-                """
-                SELECT m.id, m.job_seeker_id, m.job_giver_id, m.job_id, 
-                       m.created_at, m.status,
-                       j.title, jg.company_name
-                FROM matches m
-                JOIN jobs j ON m.job_id = j.id
-                JOIN job_givers jg ON m.job_giver_id = jg.id
-                WHERE m.job_seeker_id = %s
-                ORDER BY m.created_at DESC
-                """,
-                (job_seeker_id,)
-            )
+            with statement_budget(cursor, "match_list"):
+                cursor.execute(SELECT_FOR_JOB_SEEKER, (job_seeker_id,))
+                rows = cursor.fetchall()
             
-            matches = []
-            for row in cursor.fetchall():
-                match = Match(
-                    id=row[0],
-                    job_seeker_id=row[1],
-                    job_giver_id=row[2],
-                    job_id=row[3],
-                    created_at=row[4],
-                    status=row[5]
-                )
-                match.job_title = row[6]
-                match.company_name = row[7]
-                matches.append(match)
+            matches = [Match._from_job_seeker_row(row) for row in rows]
             
             # Print for debugging
             print(f"Found {len(matches)} matches for job seeker {job_seeker_id}")
             
-            return matches
+            return remember(cache_key, matches)
         except psycopg2.Error as e:
             print(f"Error getting matches for job seeker: {e}")
+            conn.rollback()
+            if is_timeout(e):
+                return fallback(cache_key, "matches", [])
             return []
         finally:
             cursor.close()
-            conn.close()
+            release_connection(conn)
     
     @staticmethod
     def get_for_job_giver(job_giver_id):
         """Get all matches for a job giver"""
-        conn = get_connection()
+        cache_key = ("Match.get_for_job_giver", job_giver_id)
+        conn = get_connection(read_only=True)
         if conn is None:
-            return []
+            return fallback(cache_key, "matches", [])
         
         try:
             cursor = conn.cursor()
-            cursor.execute(
-                """
-                SELECT m.id, m.job_seeker_id, m.job_giver_id, m.job_id, 
-                       m.created_at, m.status,
-                       j.title, js.full_name
-                FROM matches m
-                JOIN jobs j ON m.job_id = j.id
-                JOIN job_seekers js ON m.job_seeker_id = js.id
-                WHERE m.job_giver_id = %s
-                ORDER BY m.created_at DESC
-                """,
-                (job_giver_id,)
-            )
+            with statement_budget(cursor, "match_list"):
+                cursor.execute(SELECT_FOR_JOB_GIVER, (job_giver_id,))
+                rows = cursor.fetchall()
             
-            matches = []
-            for row in cursor.fetchall():
-                match = Match(
-                    id=row[0],
-                    job_seeker_id=row[1],
-                    job_giver_id=row[2],
-                    job_id=row[3],
-                    created_at=row[4],
-                    status=row[5]
-                )
-                match.job_title = row[6]
-                match.job_seeker_name = row[7]
-                matches.append(match)
+            matches = [Match._from_job_giver_row(row) for row in rows]
             
             # Print for debugging
             print(f"Found {len(matches)} matches for job giver {job_giver_id}")
             
-            return matches
+            return remember(cache_key, matches)
         except psycopg2.Error as e:
             print(f"Error getting matches for job giver: {e}")
+            conn.rollback()
+            if is_timeout(e):
+                return fallback(cache_key, "matches", [])
+            return []
+        finally:
+            cursor.close()
+            release_connection(conn)
+    
+    @staticmethod
+    def get_recent(limit=5):
+        """(created_at, seeker name, company name, job title) rows for the
+        newest matches across the platform"""
+        conn = get_connection(read_only=True)
+        if conn is None:
+            return []
+        
+        try:
+            cursor = conn.cursor()
+            cursor.execute(SELECT_RECENT, (limit,))
+            return cursor.fetchall()
+        except psycopg2.Error as e:
+            print(f"Error getting recent matches: {e}")
+            conn.rollback()
             return []
         finally:
             cursor.close()
-            conn.close()
+            release_connection(conn)
     
     @staticmethod
     def get_applicants_for_job(job_id):
         """Get all applicants (job seekers) who matched with a specific job"""
-        conn = get_connection()
+        conn = get_connection(read_only=True)
         if conn is None:
             return []
         
@@ -191,8 +235,9 @@ class Match:
             return []
         finally:
             cursor.close()
-            conn.close()
+            release_connection(conn)
     @staticmethod
+    @write_action
     def update_status_by_id(match_id, new_status):
         """Updates the status of a match given its ID."""
         conn = get_connection()
@@ -221,9 +266,10 @@ class Match:
             if conn:
                 if 'cursor' in locals() and cursor:
                     cursor.close()
-                conn.close()
+                release_connection(conn)
         return success
         
+    @write_action
     def update_status(self, new_status):
         """Update match status"""
         conn = get_connection()
@@ -250,4 +296,4 @@ class Match:
             return False
         finally:
             cursor.close()
-            conn.close()
+            release_connection(conn)
@@ -1,6 +1,7 @@
 import stripe
 import os
-from app.database.connection import get_connection
+from app.database.connection import get_connection, release_connection
+from app.database.unit_of_work import write_action
 from datetime import datetime
 
 # Initialize Stripe with your secret key
@@ -26,6 +27,7 @@ class Payment:
             return None
 
     @staticmethod
+    @write_action
     def record_payment(user_id, stripe_payment_id, amount, currency, status, package_id):
         """Record payment transaction in database"""
         conn = get_connection()
@@ -50,9 +52,10 @@ class Payment:
             return None
         finally:
             cursor.close()
-            conn.close()
+            release_connection(conn)
 
     @staticmethod
+    @write_action
     def handle_successful_payment(payment_intent_id):
         """Handle successful payment and add credits to user"""
         conn = get_connection()
@@ -138,4 +141,4 @@ class Payment:
             return False
         finally:
             cursor.close()
-            conn.close() 
\ No newline at end of file
+            release_connection(conn) 
\ No newline at end of file
@@ -0,0 +1,225 @@
+"""Materialized recommendation queues (migration 16).
+
+recommendation_queue holds the top RECOMMENDATION_QUEUE_SIZE job ids ranked
+for each job seeker, and the top candidate ids for each active job, so an
+unfiltered feed page is a single range read on
+idx_recommendation_queue_rank. rank_key is the ranking score from
+app.utils.ranking; in a job's queue, candidates who already swiped right on
+the job get INTERESTED_BOOST on top so they sort first.
+
+The queues are kept current incrementally:
+- a right swipe deletes the target from the swiper's queue in the swipe's
+  own transaction (and moves the seeker up in, or adds them to, the job's
+  queue);
+- job and profile changes add a row to recommendation_refresh in the same
+  transaction, and the worker in app.utils.recommendation_worker rebuilds
+  that queue and merges the changed job or seeker into the other side's
+  queues.
+
+recommendation_owners records each built queue's size and lowest rank_key,
+which lets a merge tell which queues a new score gets into without reading
+them. Searches with filters keep using the live queries.
+"""
+import os
+
+import psycopg2
+
+from app.database.connection import get_connection, release_connection
+from app.database.schema import has_column
+from app.utils.pagination import decode_cursor, encode_cursor
+
+RECOMMENDATION_CHANNEL = "recommendation_refresh"
+RECOMMENDATION_QUEUE_SIZE = int(os.environ.get("RECOMMENDATION_QUEUE_SIZE", 200))
+
+SEEKER_QUEUE = 'job_seeker'   # jobs for a job seeker
+JOB_QUEUE = 'job'             # candidates for a job
+INTERESTED_BOOST = 1.0
+
+_CURSOR_TAG = "queue"
+
+
+def recommendation_queue_enabled():
+    return os.environ.get("RECOMMENDATION_QUEUE", "false").lower() in ("1", "true", "yes")
+
+
+class RecommendationQueue:
+    @staticmethod
+    def available():
+        """Whether queues are switched on and migration 16 has run; starts the
+        in-process worker on first use"""
+        if not (recommendation_queue_enabled() and has_column('recommendation_queue', 'rank_key')):
+            return False
+        # Late import: the worker imports the models
+        from app.utils.recommendation_worker import start_recommendation_worker
+        start_recommendation_worker()
+        return True
+
+    @staticmethod
+    def cursor_for(rank_key, target_id):
+        """Cursor that continues a queue read after this entry"""
+        return encode_cursor(_CURSOR_TAG, rank_key, target_id)
+
+    @staticmethod
+    def seek(after):
+        """SQL condition and parameters that continue a queue read after `after`.
+
+        Returns ("", []) for the first page, and None when `after` is not a
+        queue cursor, i.e. the feed has already moved on to live results.
+        """
+        if after is None:
+            return "", []
+        try:
+            position = decode_cursor(after)
+        except ValueError:
+            return None
+        if len(position) != 3 or position[0] != _CURSOR_TAG:
+            return None
+        # rank_key is a real; the cursor's copy is cast back so it compares exactly
+        return " AND (q.rank_key, q.target_id) < (%s::real, %s)", list(position[1:])
+
+    @staticmethod
+    def request_refresh(cursor, owner_type, owner_id, merge=False):
+        """Ask the worker to rebuild a queue once this transaction commits.
+
+        merge=True also re-scores the job or seeker in the other side's
+        queues, for changes to the job or profile itself.
+        """
+        cursor.execute(
+            """
+            INSERT INTO recommendation_refresh (owner_type, owner_id, merge)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (owner_type, owner_id) DO UPDATE
+            SET merge = recommendation_refresh.merge OR EXCLUDED.merge,
+                requested_at = clock_timestamp()
+            """,
+            (owner_type, owner_id, merge)
+        )
+        cursor.execute("SELECT pg_notify(%s, '')", (RECOMMENDATION_CHANNEL,))
+
+    @staticmethod
+    def request_refresh_now(owner_type, owner_id):
+        """request_refresh() in its own transaction, for read paths that find a
+        queue missing or used up"""
+        conn = get_connection()
+        if conn is None:
+            return False
+
+        try:
+            cursor = conn.cursor()
+            RecommendationQueue.request_refresh(cursor, owner_type, owner_id)
+            conn.commit()
+            return True
+        except psycopg2.Error as e:
+            conn.rollback()
+            print(f"Error requesting a refresh of {owner_type} {owner_id} recommendations: {e}")
+            return False
+        finally:
+            cursor.close()
+            release_connection(conn)
+
+    @staticmethod
+    def record_swipe(cursor, user_id, target_type, target_id, job_id=None):
+        """Take a right-swiped target out of the swiper's queue"""
+        if target_type == 'job':
+            cursor.execute(
+                """
+                DELETE FROM recommendation_queue
+                WHERE owner_type = %s AND target_id = %s
+                AND owner_id = (SELECT id FROM job_seekers WHERE user_id = %s)
+                """,
+                (SEEKER_QUEUE, target_id, user_id)
+            )
+            # The seeker is now waiting on the job giver: move them to the
+            # front of the job's queue, adding them if they are not in it
+            cursor.execute(
+                """
+                UPDATE recommendation_queue SET rank_key = rank_key + %s
+                WHERE owner_type = %s AND owner_id = %s AND rank_key < %s
+                AND target_id = (SELECT id FROM job_seekers WHERE user_id = %s)
+                """,
+                (INTERESTED_BOOST, JOB_QUEUE, target_id, INTERESTED_BOOST, user_id)
+            )
+            if cursor.rowcount == 0:
+                RecommendationQueue._add_interested(cursor, user_id, target_id)
+        elif target_type == 'job_seeker' and job_id:
+            cursor.execute(
+                """
+                DELETE FROM recommendation_queue
+                WHERE owner_type = %s AND owner_id = %s AND target_id = %s
+                """,
+                (JOB_QUEUE, job_id, target_id)
+            )
+
+    @staticmethod
+    def _add_interested(cursor, user_id, job_id):
+        """Put a seeker who swiped right on a job into the job's queue at
+        INTERESTED_BOOST plus their candidate score, as the worker would.
+
+        Only built queues are touched; a queue not built yet gets the boost
+        when its first read has it built.
+        """
+        # Late import: the models import this module
+        from app.models.job import Job
+        from app.models.job_seeker import JobSeeker
+        from app.utils.ranking import candidate_scores
+        cursor.execute(
+            """
+            SELECT j.id, j.job_giver_id, j.title, j.description, j.requirements, j.location
+            FROM recommendation_owners o JOIN jobs j ON j.id = o.owner_id
+            WHERE o.owner_type = %s AND o.owner_id = %s AND j.active = TRUE
+            """,
+            (JOB_QUEUE, job_id)
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return
+        job = Job(id=row[0], job_giver_id=row[1], title=row[2], description=row[3],
+                  requirements=row[4], location=row[5])
+
+        # Only a candidate the job giver can still swipe on belongs in the queue
+        query, params = JobSeeker._eligible_query("js.id, js.updated_at", job.job_giver_id,
+                                                  job_id=job.id)
+        cursor.execute(query + " AND js.user_id = %s", params + [user_id])
+        row = cursor.fetchone()
+        if row is None:
+            return
+        seeker_id, version = row
+        scores = candidate_scores.scores_for(job)
+        if scores.get(seeker_id, (None,))[0] != version:
+            JobSeeker._score_candidates(cursor, job, [seeker_id], scores)
+        if seeker_id not in scores:
+            return
+
+        cursor.execute(
+            """
+            INSERT INTO recommendation_queue (owner_type, owner_id, target_id, rank_key)
+            VALUES (%s, %s, %s, %s)
+            ON CONFLICT (owner_type, owner_id, target_id) DO UPDATE SET rank_key = EXCLUDED.rank_key
+            """,
+            (JOB_QUEUE, job.id, seeker_id, INTERESTED_BOOST + scores[seeker_id][1])
+        )
+        # Keep the queue at its size, then record its size and cutoff
+        cursor.execute(
+            """
+            DELETE FROM recommendation_queue
+            WHERE owner_type = %s AND owner_id = %s AND target_id IN (
+                SELECT target_id FROM recommendation_queue
+                WHERE owner_type = %s AND owner_id = %s
+                ORDER BY rank_key DESC, target_id DESC
+                OFFSET %s
+            )
+            """,
+            (JOB_QUEUE, job.id, JOB_QUEUE, job.id, RECOMMENDATION_QUEUE_SIZE)
+        )
+        cursor.execute(
+            """
+            UPDATE recommendation_owners o
+            SET size = stats.size, cutoff = stats.cutoff
+            FROM (
+                SELECT count(*) AS size, min(rank_key) AS cutoff FROM recommendation_queue
+                WHERE owner_type = %s AND owner_id = %s
+            ) stats
+            WHERE o.owner_type = %s AND o.owner_id = %s
+            """,
+            (JOB_QUEUE, job.id, JOB_QUEUE, job.id)
+        )
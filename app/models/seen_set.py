@@ -0,0 +1,231 @@
+"""Per-user sets of swiped-right targets, used to exclude them from the feeds.
+
+Each set is a RoaringBitmap stored in swipe_seen_sets (migration 13):
+- a job seeker has one set of job ids (job_id 0);
+- a job giver has one set of seeker ids across all jobs (job_id 0), plus one
+  per job.
+
+Swipe.create adds to the sets in the swipe's own transaction. Feed reads
+check a process-wide cache and only fetch the stored set again when its
+version has moved on; a set read before it exists is built and stored once.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import psycopg2
+
+from app.database.connection import checkout_connection, release_connection
+from app.database.schema import has_column
+from app.utils.bitmap import RoaringBitmap
+
+SEEN_SET_CACHE_SIZE = int(os.environ.get("SEEN_SET_CACHE_SIZE", 2000))
+
+_cache = OrderedDict()   # (user_id, target_type, job_id) -> (version, RoaringBitmap)
+_user_ids = {}           # (profile table, profile id) -> user id; never changes
+_lock = threading.Lock()
+
+
+def _cache_get(key):
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            _cache.move_to_end(key)
+        return entry
+
+
+def _cache_put(key, version, bitmap):
+    with _lock:
+        _cache[key] = (version, bitmap)
+        _cache.move_to_end(key)
+        while len(_cache) > SEEN_SET_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def _cache_discard(key):
+    with _lock:
+        _cache.pop(key, None)
+
+
+class SeenSet:
+    @staticmethod
+    def available():
+        return has_column('swipe_seen_sets', 'bitmap')
+
+    @staticmethod
+    def for_job_seeker(cursor, job_seeker_id):
+        """Ids of the jobs this seeker has swiped right on, or None if unavailable"""
+        user_id = SeenSet._user_id(cursor, "job_seekers", job_seeker_id)
+        if user_id is None:
+            return None
+        return SeenSet.load(cursor, user_id, 'job')
+
+    @staticmethod
+    def for_job_giver(cursor, job_giver_id, job_id=0):
+        """Ids of the seekers this job giver has swiped right on, for one job or
+        (job_id 0) any of them; None if unavailable"""
+        user_id = SeenSet._user_id(cursor, "job_givers", job_giver_id)
+        if user_id is None:
+            return None
+        return SeenSet.load(cursor, user_id, 'job_seeker', job_id or 0)
+
+    @staticmethod
+    def _user_id(cursor, table, profile_id):
+        key = (table, profile_id)
+        user_id = _user_ids.get(key)
+        if user_id is None:
+            # table is one of two literals above
+            cursor.execute(f"SELECT user_id FROM {table} WHERE id = %s", (profile_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            user_id = _user_ids[key] = row[0]
+        return user_id
+
+    @staticmethod
+    def load(cursor, user_id, target_type, job_id=0):
+        """The user's set for target_type (and job), or None if unavailable.
+
+        Runs on the caller's cursor, which may be on a replica; the stored set
+        is only transferred when the cached copy is out of date. A user with no
+        stored set yet gets one built from swipes on the primary and stored,
+        empty or not, so later reads find it.
+        """
+        if not SeenSet.available():
+            return None
+        key = (user_id, target_type, job_id)
+        cached = _cache_get(key)
+        cursor.execute(
+            """
+            SELECT version, CASE WHEN version = %s THEN NULL ELSE bitmap END
+            FROM swipe_seen_sets
+            WHERE user_id = %s AND target_type = %s AND job_id = %s
+            """,
+            (cached[0] if cached else -1, user_id, target_type, job_id)
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return SeenSet._build_and_store(key)
+        version, data = row
+        if data is None:
+            return cached[1]
+        try:
+            bitmap = RoaringBitmap.from_bytes(data)
+        except ValueError as e:
+            print(f"Rebuilding unreadable seen set {key}: {e}")
+            return SeenSet._build(cursor, user_id, target_type, job_id)
+        _cache_put(key, version, bitmap)
+        return bitmap
+
+    @staticmethod
+    def _build(cursor, user_id, target_type, job_id):
+        query = """
+            SELECT target_id FROM swipes
+            WHERE user_id = %s AND target_type = %s AND direction = 'right'
+        """
+        params = [user_id, target_type]
+        if job_id:
+            query += " AND job_id = %s"
+            params.append(job_id)
+        cursor.execute(query, params)
+        return RoaringBitmap(row[0] for row in cursor.fetchall())
+
+    @staticmethod
+    def _build_and_store(key):
+        """Build a missing set from the primary's swipes and store it, leaving
+        one stored meanwhile by a swipe alone; None if the primary is down"""
+        conn = checkout_connection()
+        if conn is None:
+            return None
+        try:
+            cursor = conn.cursor()
+            bitmap = SeenSet._build(cursor, *key)
+            cursor.execute(
+                """
+                INSERT INTO swipe_seen_sets (user_id, target_type, job_id, bitmap)
+                VALUES (%s, %s, %s, %s)
+                ON CONFLICT (user_id, target_type, job_id) DO NOTHING
+                RETURNING version
+                """,
+                key + (bitmap.to_bytes(),)
+            )
+            row = cursor.fetchone()
+            conn.commit()
+            if row is not None:
+                _cache_put(key, row[0], bitmap)
+            return bitmap
+        except psycopg2.Error as e:
+            print(f"Error storing seen set {key}: {e}")
+            conn.rollback()
+            return None
+        finally:
+            release_connection(conn)
+
+    @staticmethod
+    def _read_for_update(cursor, key):
+        """(True, stored set) for an existing set, row-locked so concurrent
+        swipes by the same user update it in turn; the set is None if it is
+        unreadable. (False, None) if there is no set yet."""
+        cursor.execute(
+            """
+            SELECT bitmap FROM swipe_seen_sets
+            WHERE user_id = %s AND target_type = %s AND job_id = %s
+            FOR UPDATE
+            """,
+            key
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return False, None
+        try:
+            return True, RoaringBitmap.from_bytes(row[0])
+        except ValueError as e:
+            print(f"Rebuilding unreadable seen set {key}: {e}")
+            return True, None
+
+    @staticmethod
+    def record(cursor, user_id, target_type, target_id, job_id=None):
+        """Add a right swipe to the user's sets, in the swipe's transaction.
+
+        Call after inserting the swipe row: a set that does not exist yet is
+        built from swipes, which then already includes it.
+        """
+        if not SeenSet.available():
+            return
+        job_ids = [0]
+        if target_type == 'job_seeker' and job_id and has_column('swipes', 'job_id'):
+            job_ids.append(job_id)
+        for set_job_id in job_ids:
+            key = (user_id, target_type, set_job_id)
+            exists, bitmap = SeenSet._read_for_update(cursor, key)
+            if not exists:
+                cursor.execute(
+                    """
+                    INSERT INTO swipe_seen_sets (user_id, target_type, job_id, bitmap)
+                    VALUES (%s, %s, %s, %s)
+                    ON CONFLICT (user_id, target_type, job_id) DO NOTHING
+                    RETURNING version
+                    """,
+                    key + (SeenSet._build(cursor, *key).to_bytes(),)
+                )
+                if cursor.fetchone() is not None:
+                    _cache_discard(key)
+                    continue
+                # A concurrent first swipe (or feed read) stored the set after
+                # our read; the insert waited for it, so merge into that set
+                # rather than replace it with one built without its swipe
+                exists, bitmap = SeenSet._read_for_update(cursor, key)
+            if bitmap is None:
+                bitmap = SeenSet._build(cursor, *key)
+            else:
+                bitmap.add(target_id)
+            cursor.execute(
+                """
+                UPDATE swipe_seen_sets
+                SET bitmap = %s, version = version + 1
+                WHERE user_id = %s AND target_type = %s AND job_id = %s
+                """,
+                (bitmap.to_bytes(),) + key
+            )
+            # The transaction may still roll back; the next read refetches
+            _cache_discard(key)
@@ -1,7 +1,23 @@
 import psycopg2
 import psycopg2.extras # For DictCursor in new methods
 import bcrypt
-from app.database.connection import get_connection
+from app.database.connection import get_connection, release_connection
+from app.database.unit_of_work import write_action
+
+# Statements shared by the sync model and app.models.async_repository
+SELECT_BY_USERNAME = """
+    SELECT id, username, email, password_hash, user_type, created_at, is_active
+    FROM users
+    WHERE username = %s
+"""
+
+SELECT_RECENT_REGISTRATIONS = """
+    SELECT username, user_type, created_at
+    FROM users
+    WHERE user_type != 'admin'
+    ORDER BY created_at DESC
+    LIMIT %s
+"""
 
 class User:
     def __init__(self, id=None, username=None, email=None, password_hash=None, 
@@ -13,6 +29,18 @@ class User:
         self.user_type = user_type
         self.created_at = created_at
         self.is_active = is_active # Initialize is_active
+
+    @staticmethod
+    def _from_row(row):
+        return User(
+            id=row[0],
+            username=row[1],
+            email=row[2],
+            password_hash=row[3],
+            user_type=row[4],
+            created_at=row[5],
+            is_active=row[6]
+        )
     
     @staticmethod
     def hash_password(password):
@@ -27,6 +55,7 @@ class User:
         return bcrypt.checkpw(provided_password.encode('utf-8'), stored_password.encode('utf-8'))
     
     @staticmethod
+    @write_action
     def create(username, email, password, user_type):
         """Create a new user"""
         print(f"Starting user creation for username: {username}")
@@ -106,7 +135,7 @@ class User:
             return None
         finally:
             cursor.close()
-            conn.close()
+            release_connection(conn)
             print("Database connection closed")
     
     @staticmethod
@@ -118,33 +147,37 @@ class User:
         
         try:
             cursor = conn.cursor()
-            cursor.execute(
-                """
-                SELECT id, username, email, password_hash, user_type, created_at, is_active
-                FROM users
-                WHERE username = %s
-                """,
-                (username,)
-            )
+            cursor.execute(SELECT_BY_USERNAME, (username,))
             
             user_data = cursor.fetchone()
             if user_data:
-                return User(
-                    id=user_data[0],
-                    username=user_data[1],
-                    email=user_data[2],
-                    password_hash=user_data[3],
-                    user_type=user_data[4],
-                    created_at=user_data[5],
-                    is_active=user_data[6] # Added is_active
-                )
+                return User._from_row(user_data)
             return None
         except psycopg2.Error as e:
             print(f"Error getting user: {e}")
             return None
         finally:
             cursor.close()
-            conn.close()
+            release_connection(conn)
+    
+    @staticmethod
+    def get_recent_registrations(limit=5):
+        """(username, user_type, created_at) rows for the newest non-admin users"""
+        conn = get_connection(read_only=True)
+        if conn is None:
+            return []
+        
+        try:
+            cursor = conn.cursor()
+            cursor.execute(SELECT_RECENT_REGISTRATIONS, (limit,))
+            return cursor.fetchall()
+        except psycopg2.Error as e:
+            print(f"Error getting recent registrations: {e}")
+            conn.rollback()
+            return []
+        finally:
+            cursor.close()
+            release_connection(conn)
     
     @staticmethod
     def get_by_id(user_id):
@@ -181,7 +214,7 @@ class User:
             return None
         finally:
             cursor.close()
-            conn.close()
+            release_connection(conn)
     
     @staticmethod
     def authenticate(username, password):
@@ -237,7 +270,7 @@ class User:
             if cursor:
                 cursor.close()
             if conn:
-                conn.close()
+                release_connection(conn)
 
     @staticmethod
     def get_all_managed_users():
@@ -261,10 +294,11 @@ class User:
             print(f"Database error fetching all users: {e}")
         finally:
             if conn:
-                conn.close()
+                release_connection(conn)
         return users_list
 
     @staticmethod
+    @write_action
     def set_active_status(user_id, is_active_bool):
         """Sets the is_active status for a user."""
         conn = get_connection()
@@ -282,10 +316,11 @@ class User:
             conn.rollback()
         finally:
             if conn:
-                conn.close()
+                release_connection(conn)
         return updated_rows > 0
 
     @staticmethod
+    @write_action
     def delete_user_by_id(user_id_to_delete, current_admin_id):
         """
         Deletes a user and their associated data.
@@ -365,9 +400,10 @@ class User:
             return False, f"Error deleting user: {e}"
         finally:
             if conn:
-                conn.close()
+                release_connection(conn)
 
     @staticmethod
+    @write_action
     def update_password_by_username(username, new_password):
         """Update user's password by username."""
         conn = get_connection()
@@ -400,4 +436,4 @@ class User:
             if cursor:
                 cursor.close()
             if conn:
-                conn.close()
\ No newline at end of file
+                release_connection(conn)
\ No newline at end of file
@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify, session
-from app.database.connection import get_connection
+from app.database.connection import get_connection, release_connection
 from functools import wraps
 
 credit_redemption = Blueprint('credit_redemption', __name__)
@@ -18,7 +18,7 @@ def check_redemption_enabled():
         return False
     finally:
         cursor.close()
-        conn.close()
+        release_connection(conn)
 
 @credit_redemption.route('/api/redemption/request', methods=['POST'])
 def request_redemption():
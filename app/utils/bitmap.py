@@ -0,0 +1,142 @@
+"""Compressed sets of non-negative 32-bit integers, laid out like Roaring bitmaps.
+
+Values are split by their high 16 bits into containers. A container holds
+its low 16 bits as a sorted uint16 array while it has at most ARRAY_MAX
+values, and as a 65536-bit bitmap beyond that, so sparse and dense id
+ranges both stay small. to_bytes() gives a compact, byte-order independent
+encoding for storage.
+"""
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+ARRAY_MAX = 4096
+_BITMAP_BYTES = 8192
+_MAGIC = b"RB1"
+_ARRAY, _BITMAP = 0, 1
+
+
+def _array_to_bitmap(values):
+    bits = bytearray(_BITMAP_BYTES)
+    for low in values:
+        bits[low >> 3] |= 1 << (low & 7)
+    return bits
+
+
+def _bitmap_to_array(bits):
+    return array("H", (i for i in range(65536) if bits[i >> 3] & (1 << (i & 7))))
+
+
+def _bitmap_count(bits):
+    return bin(int.from_bytes(bits, "little")).count("1")
+
+
+class RoaringBitmap:
+    """Set of ints in [0, 2**32) supporting add, discard, `in`, len and iteration"""
+
+    def __init__(self, values=()):
+        self._containers = {}
+        self.update(values)
+
+    def add(self, value):
+        high, low = value >> 16, value & 0xFFFF
+        container = self._containers.get(high)
+        if container is None:
+            self._containers[high] = array("H", [low])
+        elif isinstance(container, bytearray):
+            container[low >> 3] |= 1 << (low & 7)
+        else:
+            position = bisect_left(container, low)
+            if position < len(container) and container[position] == low:
+                return
+            container.insert(position, low)
+            if len(container) > ARRAY_MAX:
+                self._containers[high] = _array_to_bitmap(container)
+
+    def update(self, values):
+        for value in values:
+            self.add(value)
+
+    def discard(self, value):
+        high, low = value >> 16, value & 0xFFFF
+        container = self._containers.get(high)
+        if container is None:
+            return
+        if isinstance(container, bytearray):
+            container[low >> 3] &= ~(1 << (low & 7)) & 0xFF
+            if _bitmap_count(container) <= ARRAY_MAX:
+                container = self._containers[high] = _bitmap_to_array(container)
+        else:
+            position = bisect_left(container, low)
+            if position < len(container) and container[position] == low:
+                del container[position]
+        if not container:
+            del self._containers[high]
+
+    def __contains__(self, value):
+        container = self._containers.get(value >> 16)
+        if container is None:
+            return False
+        low = value & 0xFFFF
+        if isinstance(container, bytearray):
+            return bool(container[low >> 3] & (1 << (low & 7)))
+        position = bisect_left(container, low)
+        return position < len(container) and container[position] == low
+
+    def __len__(self):
+        return sum(_bitmap_count(c) if isinstance(c, bytearray) else len(c)
+                   for c in self._containers.values())
+
+    def __iter__(self):
+        for high in sorted(self._containers):
+            container = self._containers[high]
+            if isinstance(container, bytearray):
+                container = _bitmap_to_array(container)
+            for low in container:
+                yield (high << 16) | low
+
+    def to_bytes(self):
+        parts = [_MAGIC, struct.pack("<I", len(self._containers))]
+        for high in sorted(self._containers):
+            container = self._containers[high]
+            if isinstance(container, bytearray):
+                parts.append(struct.pack("<HB", high, _BITMAP))
+                parts.append(bytes(container))
+            else:
+                values = array("H", container)
+                if sys.byteorder == "big":
+                    values.byteswap()
+                parts.append(struct.pack("<HBH", high, _ARRAY, len(values) - 1))
+                parts.append(values.tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Decode to_bytes() output; raises ValueError if it is malformed"""
+        data = bytes(data)
+        if data[:3] != _MAGIC:
+            raise ValueError("not a serialized RoaringBitmap")
+        bitmap = cls()
+        try:
+            (count,), offset = struct.unpack_from("<I", data, 3), 7
+            for _ in range(count):
+                high, kind = struct.unpack_from("<HB", data, offset)
+                offset += 3
+                if kind == _BITMAP:
+                    container = bytearray(data[offset:offset + _BITMAP_BYTES])
+                    offset += _BITMAP_BYTES
+                else:
+                    (size,) = struct.unpack_from("<H", data, offset)
+                    offset += 2
+                    container = array("H")
+                    container.frombytes(data[offset:offset + 2 * (size + 1)])
+                    if sys.byteorder == "big":
+                        container.byteswap()
+                    offset += 2 * (size + 1)
+                bitmap._containers[high] = container
+        except struct.error as e:
+            raise ValueError(f"truncated RoaringBitmap: {e}")
+        if offset != len(data):
+            raise ValueError("RoaringBitmap length does not match its containers")
+        return bitmap
@@ -0,0 +1,114 @@
+import contextvars
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from app.database.unit_of_work import run_detached
+
+# Background refills share a small process-wide pool; each buffer has at most
+# one refill in flight.
+FEED_REFILL_WORKERS = int(os.environ.get("FEED_REFILL_WORKERS", 4))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=FEED_REFILL_WORKERS,
+                                           thread_name_prefix="feed-refill")
+        return _executor
+
+
+class FeedBuffer:
+    """Per-session buffer of swipe cards, refilled ahead of the user.
+
+    fetch(after) returns the next batch of up to batch_size items following
+    the cursor `after` (None for the first batch); cursor_for(item) gives the
+    cursor that continues after an item. Swiped items are dropped locally with
+    advance(), and once low_water or fewer remain the next batch is fetched on
+    a background thread, so a rerun only waits on the database when the buffer
+    has run dry. Refills run in a copy of the caller's context, so they keep
+    its session scope (read_from_primary) and count against its query scope,
+    but outside its unit of work; when the buffer has run dry the fetch runs
+    on the caller's thread instead.
+
+    key identifies what the buffer was filled for (user and search filters);
+    a buffer whose key no longer matches should be thrown away. rank, if
+    given, reorders each batch before it is queued; the cursor is taken from
+    the batch as fetched, so ranking does not disturb paging.
+    """
+
+    def __init__(self, key, fetch, cursor_for, batch_size=50, low_water=10, rank=None):
+        self.key = key
+        self._fetch = fetch
+        self._cursor_for = cursor_for
+        self._rank = rank
+        self.batch_size = batch_size
+        self.low_water = low_water
+        self.delivered = 0        # items swiped through so far
+        self._items = deque()
+        self._seen = set()        # ids already buffered, to drop overlap between batches
+        self._cursor = None
+        self._exhausted = False
+        self._pending = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        """The item to show now, or None once the feed has run out"""
+        with self._lock:
+            self._collect(wait=False)
+            while not self._items and not self._exhausted:
+                if self._pending is not None:
+                    self._collect(wait=True)
+                else:
+                    self._merge(self._fetch(self._cursor))
+            return self._items[0] if self._items else None
+
+    def advance(self):
+        """Drop the current item after it has been swiped"""
+        with self._lock:
+            self._collect(wait=False)
+            if self._items:
+                self._items.popleft()
+                self.delivered += 1
+            if len(self._items) <= self.low_water:
+                self._start_refill()
+
+    def _start_refill(self):
+        if self._pending is None and not self._exhausted:
+            context = contextvars.copy_context()
+            self._pending = _get_executor().submit(context.run, run_detached,
+                                                   self._fetch, self._cursor)
+
+    def _collect(self, wait):
+        """Merge a finished refill into the buffer (waiting for it if asked)"""
+        pending = self._pending
+        if pending is None or not (wait or pending.done()):
+            return
+        self._pending = None
+        try:
+            batch = pending.result()
+        except Exception as e:
+            print(f"Error refilling feed buffer: {e}")
+            return
+        self._merge(batch)
+
+    def _merge(self, batch):
+        if len(batch) < self.batch_size:
+            self._exhausted = True
+        if not batch:
+            return
+        self._cursor = self._cursor_for(batch[-1])
+        if self._rank is not None:
+            try:
+                batch = self._rank(batch)
+            except Exception as e:
+                print(f"Error ranking feed batch: {e}")
+        for item in batch:
+            if item.id not in self._seen:
+                self._seen.add(item.id)
+                self._items.append(item)
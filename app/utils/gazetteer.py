@@ -0,0 +1,189 @@
+"""Offline gazetteer for normalizing free-text locations.
+
+gazetteer.csv (bundled next to this module) lists places with a canonical
+id, coordinates and aliases, so "Bengaluru", "Bangalore" and "BLR" all
+resolve to the place "bengaluru". Jobs, job seekers and job givers store
+that id in location_id (migration 17) when they are saved, and location
+filters match those ids as well as the text. A radius filter expands
+the place into every gazetteer id within the distance, found through a
+latitude-sorted bounding-box index and then checked by great-circle distance.
+
+Only the whole text, or a whole comma-, slash- or "or"-separated part of
+it, is looked up, so short aliases never match inside longer names ("Del
+Mar, CA" is not Delhi). Locations the gazetteer does not know keep
+location_id NULL; filters also match the text as a substring, which keeps
+multi-city and unknown listings.
+"""
+import csv
+import math
+import os
+import re
+import threading
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from functools import lru_cache
+
+GAZETTEER_PATH = os.environ.get("GAZETTEER_PATH",
+                                os.path.join(os.path.dirname(__file__), "gazetteer.csv"))
+EARTH_RADIUS_KM = 6371.0088
+# Choices offered by the location filters; None is the place itself
+RADIUS_OPTIONS_KM = (None, 10, 25, 50, 100)
+
+_PART_RE = re.compile(r"[,;/|()&\n]+|\s+-\s+|\s+(?:or|and)\s+", re.IGNORECASE)
+_NON_WORD_RE = re.compile(r"[\W_]+", re.UNICODE)
+
+Place = namedtuple("Place", ["id", "name", "country", "latitude", "longitude"])
+
+
+def normalize_place_name(text):
+    """Lower-cased words of a place name, without punctuation"""
+    return " ".join(_NON_WORD_RE.sub(" ", (text or "").lower()).split())
+
+
+def distance_km(a, b):
+    """Great-circle distance between two located places"""
+    lat1, lat2 = math.radians(a.latitude), math.radians(b.latitude)
+    d_lat = lat2 - lat1
+    d_lon = math.radians(b.longitude - a.longitude)
+    h = math.sin(d_lat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(d_lon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+
+class Gazetteer:
+    def __init__(self, entries):
+        """entries: (Place, [alias, ...]) pairs"""
+        self.places = {}
+        self._aliases = {}      # normalized name -> place id
+        for place, aliases in entries:
+            self.places[place.id] = place
+            for alias in [place.id, place.name] + list(aliases):
+                key = normalize_place_name(alias)
+                if key:
+                    self._aliases.setdefault(key, place.id)
+        located = sorted((place.latitude, place.id) for place in self.places.values()
+                         if place.latitude is not None)
+        self._latitudes = [latitude for latitude, _ in located]
+        self._by_latitude = [place_id for _, place_id in located]
+
+    @classmethod
+    def load(cls, path=GAZETTEER_PATH):
+        entries = []
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                latitude = float(row["latitude"]) if row["latitude"] else None
+                longitude = float(row["longitude"]) if row["longitude"] else None
+                place = Place(row["id"], row["name"], row["country"] or None, latitude, longitude)
+                aliases = [alias for alias in (row["aliases"] or "").split("|") if alias]
+                entries.append((place, aliases))
+        return cls(entries)
+
+    def __len__(self):
+        return len(self.places)
+
+    def resolve(self, text):
+        """The first Place a free-text location names, or None"""
+        places = self.resolve_all(text)
+        return places[0] if places else None
+
+    def resolve_all(self, text):
+        """Every Place a free-text location names, in order of appearance.
+
+        The whole text is tried first, then each separated part
+        ("Koramangala, Bangalore, Karnataka", "Mumbai or Pune"). Parts are
+        only matched whole.
+        """
+        normalized = normalize_place_name(text)
+        if not normalized:
+            return []
+        place_id = self._aliases.get(normalized)
+        if place_id is not None:
+            return [self.places[place_id]]
+        place_ids = []
+        for part in _PART_RE.split(text):
+            place_id = self._aliases.get(normalize_place_name(part))
+            if place_id is not None and place_id not in place_ids:
+                place_ids.append(place_id)
+        return [self.places[place_id] for place_id in place_ids]
+
+    def within(self, place, radius_km):
+        """Ids of the places within radius_km of place, itself included"""
+        if place.latitude is None:
+            return [place.id]
+        # Bounding box first: a latitude band from the sorted index, then longitude
+        delta_latitude = math.degrees(radius_km / EARTH_RADIUS_KM)
+        start = bisect_left(self._latitudes, place.latitude - delta_latitude)
+        end = bisect_right(self._latitudes, place.latitude + delta_latitude)
+        cos_latitude = math.cos(math.radians(place.latitude))
+        delta_longitude = (math.degrees(radius_km / (EARTH_RADIUS_KM * cos_latitude))
+                           if cos_latitude > 1e-6 else 180.0)
+        ids = []
+        for place_id in self._by_latitude[start:end]:
+            other = self.places[place_id]
+            longitude_gap = abs(other.longitude - place.longitude) % 360
+            if min(longitude_gap, 360 - longitude_gap) > delta_longitude:
+                continue
+            if place_id == place.id or distance_km(place, other) <= radius_km:
+                ids.append(place_id)
+        return ids
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer():
+    """The bundled gazetteer, loaded on first use (empty if the file is missing)"""
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                try:
+                    _gazetteer = Gazetteer.load()
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"Could not load the gazetteer from {GAZETTEER_PATH}: {e}")
+                    _gazetteer = Gazetteer([])
+    return _gazetteer
+
+
+@lru_cache(maxsize=4096)
+def resolve_locations(text):
+    """The gazetteer Places a free-text location names, as a tuple"""
+    if not text:
+        return ()
+    return tuple(get_gazetteer().resolve_all(text))
+
+
+def resolve_location(text):
+    """The first gazetteer Place a free-text location names, or None"""
+    places = resolve_locations(text)
+    return places[0] if places else None
+
+
+def location_id(text):
+    """Canonical location id to store alongside a free-text location, or None
+    (the first place, for multi-city text)"""
+    place = resolve_location(text)
+    return place.id if place is not None else None
+
+
+def location_filter_ids(text, radius_km=None):
+    """Location ids a location filter accepts, or None when the text names no
+    known place.
+
+    Callers match these ids in addition to the text as a substring, not
+    instead of it. With radius_km, every known place within that distance of
+    any named place is accepted.
+    """
+    places = resolve_locations(text)
+    if not places:
+        return None
+    ids = []
+    for place in places:
+        nearby = get_gazetteer().within(place, float(radius_km)) if radius_km else [place.id]
+        ids.extend(place_id for place_id in nearby if place_id not in ids)
+    return ids
+
+
+def format_radius(radius_km):
+    """Label for a RADIUS_OPTIONS_KM choice"""
+    return "Exact location" if not radius_km else f"Within {radius_km} km"
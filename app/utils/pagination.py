@@ -0,0 +1,23 @@
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(*values):
+    """Opaque keyset cursor holding the sort key of the last row on a page"""
+    payload = [{"ts": value.isoformat()} if isinstance(value, datetime) else value
+               for value in values]
+    text = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """Return the sort key values given to encode_cursor(); raises ValueError if malformed"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if not isinstance(payload, list):
+            raise ValueError("not a list")
+        return tuple(datetime.fromisoformat(value["ts"]) if isinstance(value, dict) else value
+                     for value in payload)
+    except (TypeError, AttributeError, KeyError, UnicodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
@@ -0,0 +1,298 @@
+"""Relevance ranking of jobs for a job seeker, and of candidates for a job.
+
+Pairs are scored on:
+- skill fit: the share of the job's requirements the seeker lists as skills;
+- experience fit: the seeker's years against any "N+ years" the job asks for;
+- location: whether the job is in the seeker's location, or remote; places
+  are compared by gazetteer id (app.utils.gazetteer), or by the city part
+  of the text for places the gazetteer does not know;
+- education (candidates only): the seeker's degree level against the one
+  the job mentions.
+
+Skills are integer-encoded through a vocabulary built for each scoring
+call, so a whole batch is scored with a few NumPy array operations rather
+than a Python loop over every (job, requirement) pair, and nothing is kept
+between calls.
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from app.utils.gazetteer import normalize_place_name, resolve_locations
+from app.utils.skills import normalize_skills
+
+SKILL_WEIGHT = 0.6
+EXPERIENCE_WEIGHT = 0.25
+LOCATION_WEIGHT = 0.15
+# Keyword searches blend the full-text rank in, so the best text matches stay near the top
+SEARCH_RANK_WEIGHT = 0.5
+# Share of the score from bio/description similarity (app.utils.similarity), when available
+TEXT_WEIGHT = 0.2
+
+# Candidate scores for a job; education replaces part of the skill weight
+CANDIDATE_SKILL_WEIGHT = 0.5
+CANDIDATE_EXPERIENCE_WEIGHT = 0.2
+CANDIDATE_LOCATION_WEIGHT = 0.15
+CANDIDATE_EDUCATION_WEIGHT = 0.15
+
+# Jobs whose candidate scores are kept, most recently used first
+CANDIDATE_SCORE_CACHE_JOBS = int(os.environ.get("CANDIDATE_SCORE_CACHE_JOBS", 200))
+
+_YEARS_RE = re.compile(r"(\d{1,2})\s*\+?\s*(?:-\s*\d{1,2}\s*)?(?:years?|yrs?)\b", re.IGNORECASE)
+_WORD_RE = re.compile(r"\w+")
+# Location parts that name no city, skipped when comparing unknown places
+_NOT_A_CITY = {"remote", "hybrid", "onsite", "on site", "anywhere", "india", "usa", "us",
+               "united states", "uk", "united kingdom"}
+# Highest level first; matched against lower-cased text
+_EDUCATION_LEVELS = [
+    (4, re.compile(r"\b(?:ph\.?d|doctorate)\b")),
+    (3, re.compile(r"\b(?:masters?|m\.?tech|m\.sc|msc|mba|mca|post ?graduate)\b")),
+    (2, re.compile(r"\b(?:bachelors?|b\.?tech|b\.sc|bsc|b\.com|bcom|bca|graduate|degree)\b")),
+    (1, re.compile(r"\b(?:diploma|12th|hsc|high school)\b")),
+]
+
+
+class SkillVocabulary:
+    """Mapping of normalized skills to dense integer ids, for one scoring call"""
+
+    def __init__(self):
+        self._ids = {}
+
+    def encode(self, skills):
+        """Ids of the given (already normalized) skills, adding unseen ones"""
+        return [self._ids.setdefault(skill, len(self._ids)) for skill in skills]
+
+    def __len__(self):
+        return len(self._ids)
+
+
+def required_years(*texts):
+    """Smallest "N years" of experience mentioned in the texts, or None"""
+    years = [int(match.group(1)) for text in texts if text
+             for match in _YEARS_RE.finditer(text)]
+    return min(years) if years else None
+
+
+def education_level(*texts):
+    """Highest education level named in the texts: 4 doctorate, 3 master's,
+    2 bachelor's, 1 diploma/school, 0 none"""
+    text = " ".join(text for text in texts if text).lower()
+    for level, pattern in _EDUCATION_LEVELS:
+        if pattern.search(text):
+            return level
+    return 0
+
+
+def _location_keys(location):
+    """(places, remote) for a location: gazetteer ids of the places it names,
+    or else its normalized city part, and whether it allows remote work"""
+    text = location or ""
+    remote = "remote" in _WORD_RE.findall(text.lower())
+    places = set()
+    for place in resolve_locations(text):
+        if place.id == "remote":
+            remote = True
+        else:
+            places.add(place.id)
+    if not places:
+        # "Pune, Maharashtra, India": the city comes first
+        for part in text.split(","):
+            name = normalize_place_name(part)
+            if name and name not in _NOT_A_CITY:
+                places.add(name)
+                break
+    return places, remote
+
+
+def skill_overlap(wanted, offered):
+    """Per-row count of `offered` skill ids found in each row of `wanted`.
+
+    wanted is a list of skill-id lists (one per job or candidate); offered
+    is one list of skill ids. Returns (overlap counts, row lengths) arrays.
+    """
+    lengths = np.fromiter((len(row) for row in wanted), dtype=np.int64, count=len(wanted))
+    if not lengths.sum():
+        return np.zeros(len(wanted)), lengths
+    codes = np.fromiter((code for row in wanted for code in row), dtype=np.int64,
+                        count=int(lengths.sum()))
+    rows = np.repeat(np.arange(len(wanted)), lengths)
+    hits = np.isin(codes, np.asarray(offered, dtype=np.int64))
+    return np.bincount(rows, weights=hits, minlength=len(wanted)), lengths
+
+
+def _job_fits(job_seeker, jobs):
+    """Skill, experience and location fit of one seeker for each job"""
+    vocabulary = SkillVocabulary()
+    seeker_skills = vocabulary.encode(normalize_skills(job_seeker.skills))
+    requirements = [vocabulary.encode(normalize_skills(job.requirements)) for job in jobs]
+    overlap, lengths = skill_overlap(requirements, seeker_skills)
+    # Jobs that list no requirements are neither favoured nor penalised
+    skill_fit = np.where(lengths > 0, overlap / np.maximum(lengths, 1), 0.5)
+
+    wanted_years = np.array(
+        [required_years(" ".join(job.requirements or []), job.description) or 0 for job in jobs],
+        dtype=float
+    )
+    experience = float(job_seeker.experience or 0)
+    experience_fit = np.where(wanted_years > 0,
+                              np.minimum(experience / np.maximum(wanted_years, 1), 1.0), 1.0)
+
+    seeker_places, _ = _location_keys(job_seeker.location)
+    job_locations = [_location_keys(job.location) for job in jobs]
+    location_fit = np.array(
+        [1.0 if remote or seeker_places & places else 0.0
+         for places, remote in job_locations]
+    )
+    return skill_fit, experience_fit, location_fit
+
+
+def _candidate_fits(job, seekers):
+    """Skill, experience, location and education fit of each seeker for one job"""
+    vocabulary = SkillVocabulary()
+    requirements = vocabulary.encode(normalize_skills(job.requirements))
+    skills = [vocabulary.encode(normalize_skills(seeker.skills)) for seeker in seekers]
+    overlap, _ = skill_overlap(skills, requirements)
+    skill_fit = overlap / len(requirements) if requirements else np.full(len(seekers), 0.5)
+
+    job_text = " ".join(job.requirements or []) + " " + (job.description or "")
+    wanted_years = required_years(job_text) or 0
+    experience = np.array([float(seeker.experience or 0) for seeker in seekers])
+    experience_fit = (np.minimum(experience / wanted_years, 1.0) if wanted_years
+                      else np.ones(len(seekers)))
+
+    job_places, job_remote = _location_keys(job.location)
+    if job_remote:
+        location_fit = np.ones(len(seekers))
+    else:
+        location_fit = np.array([1.0 if job_places & _location_keys(seeker.location)[0] else 0.0
+                                 for seeker in seekers])
+
+    wanted_level = education_level(job_text)
+    levels = np.array([education_level(seeker.education) for seeker in seekers], dtype=float)
+    education_fit = (np.minimum(levels / wanted_level, 1.0) if wanted_level
+                     else np.ones(len(seekers)))
+    return skill_fit, experience_fit, location_fit, education_fit
+
+
+def _job_score(skill_fit, experience_fit, location_fit, text_similarity):
+    score = (SKILL_WEIGHT * skill_fit + EXPERIENCE_WEIGHT * experience_fit
+             + LOCATION_WEIGHT * location_fit)
+    if text_similarity is not None:
+        score = (1 - TEXT_WEIGHT) * score + TEXT_WEIGHT * np.asarray(text_similarity, dtype=float)
+    return score
+
+
+def _candidate_score(skill_fit, experience_fit, location_fit, education_fit, text_similarity):
+    score = (CANDIDATE_SKILL_WEIGHT * skill_fit + CANDIDATE_EXPERIENCE_WEIGHT * experience_fit
+             + CANDIDATE_LOCATION_WEIGHT * location_fit
+             + CANDIDATE_EDUCATION_WEIGHT * education_fit)
+    if text_similarity is not None:
+        score = (1 - TEXT_WEIGHT) * score + TEXT_WEIGHT * np.asarray(text_similarity, dtype=float)
+    return score
+
+
+def score_jobs(job_seeker, jobs, text_similarity=None):
+    """Relevance of each job to the seeker, as a float array in [0, 1].
+
+    text_similarity optionally gives the TF-IDF similarity of the seeker's
+    bio to each job, aligned with jobs.
+    """
+    if not jobs:
+        return np.zeros(0)
+
+    score = _job_score(*_job_fits(job_seeker, jobs), text_similarity)
+
+    search_rank = np.array([getattr(job, "search_rank", None) or 0.0 for job in jobs], dtype=float)
+    if search_rank.max() > 0:
+        score = ((1 - SEARCH_RANK_WEIGHT) * score
+                 + SEARCH_RANK_WEIGHT * search_rank / search_rank.max())
+    return score
+
+
+def score_job_for_seekers(job, seekers, text_similarity=None):
+    """score_jobs() of one job for each of many seekers (without keyword
+    search rank), aligned with seekers"""
+    if not seekers:
+        return np.zeros(0)
+    skill_fit, experience_fit, location_fit, _ = _candidate_fits(job, seekers)
+    return _job_score(skill_fit, experience_fit, location_fit, text_similarity)
+
+
+def rank_jobs(job_seeker, jobs, text_similarity=None):
+    """The jobs ordered by relevance to the seeker, best first.
+
+    Each job gets a `relevance` attribute; ties keep the incoming (newest
+    first) order.
+    """
+    scores = score_jobs(job_seeker, jobs, text_similarity)
+    order = np.argsort(-scores, kind="stable")
+    ranked = []
+    for position in order:
+        job = jobs[position]
+        job.relevance = float(scores[position])
+        ranked.append(job)
+    return ranked
+
+
+def score_candidates(job, seekers, text_similarity=None):
+    """Fit of each seeker for the job, as a float array in [0, 1].
+
+    text_similarity optionally gives the TF-IDF similarity of the job's
+    description to each seeker's bio, aligned with seekers.
+    """
+    if not seekers:
+        return np.zeros(0)
+    return _candidate_score(*_candidate_fits(job, seekers), text_similarity)
+
+
+def score_seeker_for_jobs(job_seeker, jobs, text_similarity=None):
+    """score_candidates() of one seeker for each of many jobs, aligned with jobs"""
+    if not jobs:
+        return np.zeros(0)
+    skill_fit, experience_fit, location_fit = _job_fits(job_seeker, jobs)
+    level = education_level(job_seeker.education)
+    wanted_levels = np.array(
+        [education_level(" ".join(job.requirements or []) + " " + (job.description or ""))
+         for job in jobs], dtype=float
+    )
+    education_fit = np.where(wanted_levels > 0,
+                             np.minimum(level / np.maximum(wanted_levels, 1), 1.0), 1.0)
+    return _candidate_score(skill_fit, experience_fit, location_fit, education_fit,
+                            text_similarity)
+
+
+def job_version(job):
+    """Changes whenever the job fields candidate scores depend on change"""
+    return hash((tuple(job.requirements or ()), job.description, job.location))
+
+
+class CandidateScoreCache:
+    """Per-job candidate scores, keyed by each seeker's profile version.
+
+    A job's entry is dropped when its scoring fields change (job_version),
+    and a seeker's score is recomputed when their profile version (the
+    row's updated_at) moves on.
+    """
+
+    def __init__(self, max_jobs=CANDIDATE_SCORE_CACHE_JOBS):
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()   # job id -> (job version, {seeker id: (profile version, score)})
+        self._lock = threading.Lock()
+
+    def scores_for(self, job):
+        """The mutable {seeker id: (profile version, score)} map for this job"""
+        version = job_version(job)
+        with self._lock:
+            entry = self._jobs.get(job.id)
+            if entry is None or entry[0] != version:
+                entry = self._jobs[job.id] = (version, {})
+            self._jobs.move_to_end(job.id)
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+            return entry[1]
+
+
+candidate_scores = CandidateScoreCache()
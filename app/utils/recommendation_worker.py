@@ -0,0 +1,453 @@
+"""Background worker that keeps the recommendation queues current.
+
+The models record what changed in recommendation_refresh (see
+app.models.recommendation_queue) and send NOTIFY recommendation_refresh; the
+worker takes the oldest requests in small batches and, for each:
+- rebuilds the owner's own queue: a seeker's top jobs, or a job's top
+  candidates (scored as the live ranked deck scores them);
+- with merge set, takes the changed job or seeker out of every queue on the
+  other side and puts it back into those its new score reaches.
+
+When idle it also folds changed jobs and profiles into the text similarity
+model every SIMILARITY_REFRESH_INTERVAL seconds (see app.utils.similarity).
+
+A request is only deleted if it was not renewed while being processed, so a
+change that lands mid-refresh is picked up again.
+
+One worker runs at a time across all processes: it holds a session advisory
+lock for as long as it is connected, and the others retry now and then. The
+feeds start it in-process on first use; with RECOMMENDATION_WORKER=false it
+is left to its own process instead:
+
+    python -m app.utils.recommendation_worker
+"""
+import heapq
+import os
+import select
+import threading
+import time
+
+import psycopg2
+import psycopg2.extras
+
+from app.database.schema import has_column
+from app.models.job import Job
+from app.models.job_seeker import INTERESTED_COLUMN, JobSeeker
+from app.models.recommendation_queue import (INTERESTED_BOOST, JOB_QUEUE, RECOMMENDATION_CHANNEL,
+                                             RECOMMENDATION_QUEUE_SIZE, SEEKER_QUEUE)
+from app.utils.ranking import (candidate_scores, score_job_for_seekers, score_jobs,
+                               score_seeker_for_jobs)
+from app.utils.similarity import (SIMILARITY_REFRESH_INTERVAL, get_similarity_model,
+                                  refresh_saved_model)
+
+# Arbitrary application-wide key for pg_try_advisory_lock, so one worker runs at a time
+RECOMMENDATION_WORKER_LOCK_KEY = 7340023
+RECOMMENDATION_BATCH_SIZE = int(os.environ.get("RECOMMENDATION_BATCH_SIZE", 20))
+
+_IDLE_WAIT = 5
+_LOCK_RETRY = 60
+_RETRY_DELAY = 10
+
+
+def recommendation_worker_enabled():
+    return os.environ.get("RECOMMENDATION_WORKER", "true").lower() in ("1", "true", "yes")
+
+
+def _text_similarity(query_kind, query_id, target_kind, target_ids):
+    model = get_similarity_model()
+    if model is None or not target_ids:
+        return None
+    return model.similarities(query_kind, query_id, target_kind, target_ids)
+
+
+class _Snapshot:
+    """Active jobs, and the jobs and seekers whose queues are built, loaded at
+    most once per batch.
+
+    A merge only reaches built queues (see RecommendationWorker._merge), so
+    only their owners are scored against the changed job or seeker.
+    """
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self._jobs = None
+        self._job_owners = None
+        self._seeker_owners = None
+
+    def jobs(self):
+        if self._jobs is None:
+            self.cursor.execute(
+                """
+                SELECT id, job_giver_id, title, description, requirements, location
+                FROM jobs WHERE active = TRUE
+                """
+            )
+            self._jobs = [Job(id=row[0], job_giver_id=row[1], title=row[2], description=row[3],
+                              requirements=row[4], location=row[5])
+                          for row in self.cursor.fetchall()]
+        return self._jobs
+
+    def job_owners(self):
+        """Active jobs with a built candidate queue"""
+        if self._job_owners is None:
+            self.cursor.execute(
+                "SELECT owner_id FROM recommendation_owners WHERE owner_type = %s",
+                (JOB_QUEUE,)
+            )
+            owners = {row[0] for row in self.cursor.fetchall()}
+            self._job_owners = [job for job in self.jobs() if job.id in owners]
+        return self._job_owners
+
+    def seeker_owners(self):
+        """Complete profiles with a built job queue"""
+        if self._seeker_owners is None:
+            self.cursor.execute(
+                """
+                SELECT js.id, js.user_id, js.skills, js.experience, js.location, js.education
+                FROM recommendation_owners o JOIN job_seekers js ON js.id = o.owner_id
+                WHERE o.owner_type = %s AND js.profile_complete = TRUE
+                """,
+                (SEEKER_QUEUE,)
+            )
+            self._seeker_owners = [JobSeeker(id=row[0], user_id=row[1], skills=row[2],
+                                             experience=row[3], location=row[4], education=row[5])
+                                   for row in self.cursor.fetchall()]
+        return self._seeker_owners
+
+
+class RecommendationWorker:
+    def __init__(self, queue_size=RECOMMENDATION_QUEUE_SIZE, batch_size=RECOMMENDATION_BATCH_SIZE):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self._similarity_refreshed_at = None
+
+    def run_forever(self):
+        # Late import: connection imports the models' dependencies
+        from app.database.connection import connect_unpooled
+        while True:
+            conn = None
+            try:
+                conn = connect_unpooled()
+                if conn is None:
+                    print("Recommendation worker disabled: DATABASE_URL is not set")
+                    return
+                cursor = conn.cursor()
+                cursor.execute("SELECT pg_try_advisory_lock(%s)", (RECOMMENDATION_WORKER_LOCK_KEY,))
+                locked = cursor.fetchone()[0]
+                conn.commit()
+                if not locked:
+                    # Another process's worker is running
+                    conn.close()
+                    conn = None
+                    time.sleep(_LOCK_RETRY)
+                    continue
+                cursor.execute(f"LISTEN {RECOMMENDATION_CHANNEL}")
+                conn.commit()
+                print("Recommendation worker started")
+                while True:
+                    if not self.process_batch(conn):
+                        self.refresh_similarity(conn)
+                        self._wait(conn)
+            except (psycopg2.Error, OSError) as e:
+                print(f"Recommendation worker error: {e}; retrying in {_RETRY_DELAY}s")
+            finally:
+                # Closing the session also releases the advisory lock
+                if conn is not None:
+                    conn.close()
+            time.sleep(_RETRY_DELAY)
+
+    def _wait(self, conn):
+        if select.select([conn], [], [], _IDLE_WAIT) != ([], [], []):
+            conn.poll()
+            del conn.notifies[:]
+
+    def refresh_similarity(self, conn):
+        """Refresh the similarity model once SIMILARITY_REFRESH_INTERVAL has passed"""
+        now = time.monotonic()
+        if not SIMILARITY_REFRESH_INTERVAL or (
+                self._similarity_refreshed_at is not None
+                and now - self._similarity_refreshed_at < SIMILARITY_REFRESH_INTERVAL):
+            return
+        self._similarity_refreshed_at = now
+        cursor = conn.cursor()
+        try:
+            processed = refresh_saved_model(cursor)
+            conn.rollback()
+            if processed:
+                print(f"Similarity model refreshed with {processed} changed rows "
+                      f"in {time.monotonic() - now:.1f}s")
+        except (psycopg2.Error, OSError, ValueError, KeyError) as e:
+            conn.rollback()
+            print(f"Error refreshing the similarity model: {e}")
+        finally:
+            cursor.close()
+
+    def process_batch(self, conn):
+        """Handle the oldest refresh requests; False if there were none"""
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            SELECT owner_type, owner_id, merge, requested_at FROM recommendation_refresh
+            ORDER BY requested_at LIMIT %s
+            """,
+            (self.batch_size,)
+        )
+        requests = cursor.fetchall()
+        conn.commit()
+        if not requests:
+            return False
+
+        snapshot = _Snapshot(cursor)
+        for owner_type, owner_id, merge, requested_at in requests:
+            try:
+                if owner_type == SEEKER_QUEUE:
+                    self.refresh_seeker(cursor, owner_id, merge, snapshot)
+                else:
+                    self.refresh_job(cursor, owner_id, merge, snapshot)
+                cursor.execute(
+                    """
+                    DELETE FROM recommendation_refresh
+                    WHERE owner_type = %s AND owner_id = %s AND requested_at = %s
+                    """,
+                    (owner_type, owner_id, requested_at)
+                )
+                conn.commit()
+            except psycopg2.Error as e:
+                conn.rollback()
+                print(f"Error refreshing {owner_type} {owner_id} recommendations: {e}")
+                # Move it to the back so one bad request does not hold up the rest
+                cursor.execute(
+                    """
+                    UPDATE recommendation_refresh SET requested_at = clock_timestamp()
+                    WHERE owner_type = %s AND owner_id = %s AND requested_at = %s
+                    """,
+                    (owner_type, owner_id, requested_at)
+                )
+                conn.commit()
+        return True
+
+    def refresh_seeker(self, cursor, seeker_id, merge, snapshot):
+        cursor.execute(
+            """
+            SELECT id, user_id, skills, experience, location, education, profile_complete
+            FROM job_seekers WHERE id = %s
+            """,
+            (seeker_id,)
+        )
+        row = cursor.fetchone()
+        if row is None or not row[6]:
+            self._drop(cursor, SEEKER_QUEUE, seeker_id)
+            self._merge(cursor, JOB_QUEUE, seeker_id, {})
+            return
+        seeker = JobSeeker(id=row[0], user_id=row[1], skills=row[2], experience=row[3],
+                           location=row[4], education=row[5])
+
+        # Jobs for the seeker: active ones they have not swiped right on
+        cursor.execute(
+            """
+            SELECT target_id FROM swipes
+            WHERE user_id = %s AND target_type = 'job' AND direction = 'right'
+            """,
+            (seeker.user_id,)
+        )
+        swiped = {row[0] for row in cursor.fetchall()}
+        jobs = [job for job in snapshot.jobs() if job.id not in swiped]
+        job_ids = [job.id for job in jobs]
+        scores = score_jobs(seeker, jobs, _text_similarity("seeker", seeker.id, "job", job_ids))
+        self._replace(cursor, SEEKER_QUEUE, seeker.id, dict(zip(job_ids, scores.tolist())))
+
+        if merge:
+            # The seeker in each job's candidate queue, leaving out jobs whose
+            # giver already swiped right on them or matched them
+            per_job = " AND s.job_id = j.id" if has_column('swipes', 'job_id') else ""
+            cursor.execute(
+                f"""
+                SELECT j.id FROM swipes s
+                JOIN job_givers jg ON jg.user_id = s.user_id
+                JOIN jobs j ON j.job_giver_id = jg.id
+                WHERE s.target_type = 'job_seeker' AND s.target_id = %s
+                AND s.direction = 'right'{per_job}
+                UNION
+                SELECT job_id FROM matches WHERE job_seeker_id = %s
+                """,
+                (seeker.id, seeker.id)
+            )
+            excluded = {row[0] for row in cursor.fetchall()}
+            jobs = [job for job in snapshot.job_owners() if job.id not in excluded]
+            job_ids = [job.id for job in jobs]
+            fits = score_seeker_for_jobs(seeker, jobs,
+                                         _text_similarity("seeker", seeker.id, "job", job_ids))
+            keys = {job_id: fit + (INTERESTED_BOOST if job_id in swiped else 0.0)
+                    for job_id, fit in zip(job_ids, fits.tolist())}
+            self._merge(cursor, JOB_QUEUE, seeker.id, keys)
+
+    def refresh_job(self, cursor, job_id, merge, snapshot):
+        cursor.execute(
+            """
+            SELECT id, job_giver_id, title, description, requirements, location, active
+            FROM jobs WHERE id = %s
+            """,
+            (job_id,)
+        )
+        row = cursor.fetchone()
+        if row is None or not row[6]:
+            self._drop(cursor, JOB_QUEUE, job_id)
+            self._merge(cursor, SEEKER_QUEUE, job_id, {})
+            return
+        job = Job(id=row[0], job_giver_id=row[1], title=row[2], description=row[3],
+                  requirements=row[4], location=row[5])
+
+        # Candidates for the job: the live ranked deck's candidates and scores
+        query, params = JobSeeker._eligible_query(
+            f"js.id, js.updated_at, {INTERESTED_COLUMN}", job.job_giver_id, job_id=job.id
+        )
+        cursor.execute(query, [job.id] + params)
+        eligible = cursor.fetchall()
+        scores = candidate_scores.scores_for(job)
+        stale = [seeker_id for seeker_id, version, _ in eligible
+                 if scores.get(seeker_id, (None,))[0] != version]
+        if stale:
+            JobSeeker._score_candidates(cursor, job, stale, scores)
+        keys = {seeker_id: scores[seeker_id][1] + (INTERESTED_BOOST if interested else 0.0)
+                for seeker_id, _, interested in eligible if seeker_id in scores}
+        self._replace(cursor, JOB_QUEUE, job.id, keys)
+
+        if merge:
+            # The job in each seeker's queue, except for those who swiped right
+            # on it (matched ones included, which the eligibility query leaves out)
+            interested = JobSeeker._interested_in_job(cursor, job.id)
+            seekers = [seeker for seeker in snapshot.seeker_owners() if seeker.id not in interested]
+            seeker_ids = [seeker.id for seeker in seekers]
+            fits = score_job_for_seekers(job, seekers,
+                                         _text_similarity("job", job.id, "seeker", seeker_ids))
+            self._merge(cursor, SEEKER_QUEUE, job.id, dict(zip(seeker_ids, fits.tolist())))
+
+    def _replace(self, cursor, owner_type, owner_id, keys):
+        """Rewrite one queue with the best entries of {target id: rank key}"""
+        top = heapq.nlargest(self.queue_size, keys.items(), key=lambda item: (item[1], item[0]))
+        cursor.execute(
+            "DELETE FROM recommendation_queue WHERE owner_type = %s AND owner_id = %s",
+            (owner_type, owner_id)
+        )
+        if top:
+            psycopg2.extras.execute_values(
+                cursor,
+                "INSERT INTO recommendation_queue (owner_type, owner_id, target_id, rank_key) VALUES %s",
+                [(owner_type, owner_id, target_id, key) for target_id, key in top],
+                page_size=len(top)
+            )
+        cursor.execute(
+            """
+            INSERT INTO recommendation_owners (owner_type, owner_id, size, cutoff, refreshed_at)
+            VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (owner_type, owner_id) DO UPDATE
+            SET size = EXCLUDED.size, cutoff = EXCLUDED.cutoff, refreshed_at = EXCLUDED.refreshed_at
+            """,
+            (owner_type, owner_id, len(top), top[-1][1] if top else None)
+        )
+
+    def _drop(self, cursor, owner_type, owner_id):
+        cursor.execute(
+            "DELETE FROM recommendation_queue WHERE owner_type = %s AND owner_id = %s",
+            (owner_type, owner_id)
+        )
+        cursor.execute(
+            "DELETE FROM recommendation_owners WHERE owner_type = %s AND owner_id = %s",
+            (owner_type, owner_id)
+        )
+
+    def _merge(self, cursor, owner_type, target_id, keys):
+        """Re-place one target in every built queue of owner_type.
+
+        keys maps owner id -> the target's rank key in that owner's queue. The
+        target's old entries go first, so a lower score does not linger; it is
+        then added wherever it beats the queue's lowest entry, or the queue has
+        room. Queues not built yet are left for their first read to build.
+        """
+        cursor.execute(
+            """
+            DELETE FROM recommendation_queue WHERE owner_type = %s AND target_id = %s
+            RETURNING owner_id
+            """,
+            (owner_type, target_id)
+        )
+        removed = {row[0] for row in cursor.fetchall()}
+
+        inserts = []
+        if keys:
+            cursor.execute(
+                "SELECT owner_id, size, cutoff FROM recommendation_owners WHERE owner_type = %s",
+                (owner_type,)
+            )
+            for owner_id, size, cutoff in cursor.fetchall():
+                key = keys.get(owner_id)
+                if key is None:
+                    continue
+                if owner_id in removed:
+                    size -= 1
+                if size < self.queue_size or cutoff is None or key > cutoff:
+                    inserts.append((owner_type, owner_id, target_id, key))
+        if inserts:
+            psycopg2.extras.execute_values(
+                cursor,
+                "INSERT INTO recommendation_queue (owner_type, owner_id, target_id, rank_key) VALUES %s",
+                inserts,
+                page_size=1000
+            )
+
+        changed = list(removed | {owner_id for _, owner_id, _, _ in inserts})
+        if not changed:
+            return
+        # Trim queues the target pushed over size, then record sizes and cutoffs
+        cursor.execute(
+            """
+            DELETE FROM recommendation_queue q
+            USING (
+                SELECT owner_id, target_id FROM (
+                    SELECT owner_id, target_id,
+                           row_number() OVER (PARTITION BY owner_id
+                                              ORDER BY rank_key DESC, target_id DESC) AS position
+                    FROM recommendation_queue
+                    WHERE owner_type = %s AND owner_id = ANY(%s)
+                ) ranked
+                WHERE position > %s
+            ) extra
+            WHERE q.owner_type = %s AND q.owner_id = extra.owner_id AND q.target_id = extra.target_id
+            """,
+            (owner_type, changed, self.queue_size, owner_type)
+        )
+        cursor.execute(
+            """
+            UPDATE recommendation_owners o
+            SET size = coalesce(stats.size, 0), cutoff = stats.cutoff
+            FROM unnest(%s::integer[]) AS changed(owner_id)
+            LEFT JOIN (
+                SELECT owner_id, count(*) AS size, min(rank_key) AS cutoff
+                FROM recommendation_queue
+                WHERE owner_type = %s AND owner_id = ANY(%s)
+                GROUP BY owner_id
+            ) stats ON stats.owner_id = changed.owner_id
+            WHERE o.owner_type = %s AND o.owner_id = changed.owner_id
+            """,
+            (changed, owner_type, changed, owner_type)
+        )
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def start_recommendation_worker():
+    """Start the in-process worker thread once, unless RECOMMENDATION_WORKER is off"""
+    global _worker
+    if _worker is not None or not recommendation_worker_enabled():
+        return
+    with _worker_lock:
+        if _worker is None:
+            _worker = threading.Thread(target=RecommendationWorker().run_forever,
+                                       name="recommendation-worker", daemon=True)
+            _worker.start()
+
+
+if __name__ == "__main__":
+    RecommendationWorker().run_forever()
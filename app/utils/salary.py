@@ -0,0 +1,111 @@
+import os
+import re
+from collections import namedtuple
+
+# Parsed salary; min_amount/max_amount are yearly amounts in `currency`, and
+# either may be None for open-ended ranges ("up to 70k", "50k+")
+Salary = namedtuple("Salary", ["min_amount", "max_amount", "currency", "period"])
+
+# Periods are normalised to a year so that feeds can compare salaries
+YEARLY_MULTIPLIERS = {"hour": 2080, "day": 260, "week": 52, "month": 12, "year": 1}
+
+# Largest amount that fits the INTEGER columns
+MAX_AMOUNT = 2_000_000_000
+
+# Currency assumed for salaries (and salary filters) that do not state one
+DEFAULT_CURRENCY = os.environ.get("SALARY_DEFAULT_CURRENCY", "INR")
+
+_CURRENCIES = [
+    (re.compile(r"₹|\brs\.?|\binr\b", re.I), "INR"),
+    (re.compile(r"\$|\busd\b", re.I), "USD"),
+    (re.compile(r"€|\beur\b", re.I), "EUR"),
+    (re.compile(r"£|\bgbp\b", re.I), "GBP"),
+]
+
+_PERIODS = [
+    (re.compile(r"\bhour(ly)?\b|/\s*h(ou)?r\b|\bp\.?h\.?\b", re.I), "hour"),
+    (re.compile(r"\bdai?ly\b|\bday\b|/\s*d(ay)?\b", re.I), "day"),
+    (re.compile(r"\bweek(ly)?\b|/\s*w(ee)?k\b", re.I), "week"),
+    (re.compile(r"\bmonth(ly)?\b|/\s*mo(nth)?\b|\bp\.?m\.?\b|\bpcm\b", re.I), "month"),
+    (re.compile(r"\byear(ly)?\b|\bannum\b|\bannual(ly)?\b|/\s*y(ea)?r\b|\bp\.?a\.?\b|\blpa\b", re.I), "year"),
+]
+
+_UNITS = {
+    "k": 1_000, "thousand": 1_000,
+    "l": 100_000, "lakh": 100_000, "lakhs": 100_000, "lac": 100_000, "lacs": 100_000,
+    "lpa": 100_000,
+    "cr": 10_000_000, "crore": 10_000_000, "crores": 10_000_000,
+    "m": 1_000_000, "mn": 1_000_000, "million": 1_000_000,
+}
+
+# Lakh and crore amounts are rupees
+_INDIAN_UNITS = {100_000, 10_000_000}
+
+_NUMBER_RE = re.compile(
+    r"(\d[\d,]*(?:\.\d+)?)\s*(" + "|".join(sorted(_UNITS, key=len, reverse=True)) + r")?\b",
+    re.I,
+)
+# Experience requirements that often share the field ("3-5 years exp, 10 LPA")
+_EXPERIENCE_RE = re.compile(
+    r"\d+(?:\.\d+)?\s*(?:(?:-|to)\s*\d+(?:\.\d+)?\s*)?\+?\s*(?:years?|yrs?)\b", re.I
+)
+_UPPER_BOUND_RE = re.compile(r"\b(up\s*to|upto|max(imum)?|below|under|less\s+than)\b", re.I)
+_LOWER_BOUND_RE = re.compile(r"\+|\b(from|min(imum)?|above|over|more\s+than|at\s+least|starting)\b", re.I)
+
+
+def _amounts(text):
+    """[(value with its unit applied, unit multiplier or None)] for each number in text"""
+    amounts = []
+    for match in _NUMBER_RE.finditer(text):
+        value = float(match.group(1).replace(",", ""))
+        unit = _UNITS[match.group(2).lower()] if match.group(2) else None
+        amounts.append((value * (unit or 1), unit))
+    return amounts
+
+
+def parse_salary(text):
+    """Parse a free-text salary range, or return None if it has no amounts.
+
+        parse_salary("$50,000 - $70,000")  -> Salary(50000, 70000, "USD", "year")
+        parse_salary("₹8-12 LPA")          -> Salary(800000, 1200000, "INR", "year")
+        parse_salary("25k/month")          -> Salary(300000, 300000, None, "month")
+
+    Without a stated period the amounts are taken to be yearly. Numbers
+    followed by "years"/"yrs" are experience, not salary, and are skipped.
+    """
+    if not text:
+        return None
+    text = _EXPERIENCE_RE.sub(" ", text)
+    amounts = _amounts(text)
+    if not amounts:
+        return None
+
+    currency = next((code for pattern, code in _CURRENCIES if pattern.search(text)), None)
+    if currency is None and any(unit in _INDIAN_UNITS for _, unit in amounts):
+        currency = "INR"
+    period = next((name for pattern, name in _PERIODS if pattern.search(text)), "year")
+
+    low, low_unit = amounts[0]
+    if len(amounts) > 1:
+        high, high_unit = amounts[1]
+        # "50-70k" and "8-12 LPA": the unit on the upper bound covers both
+        if low_unit is None and high_unit is not None and low * high_unit <= high:
+            low *= high_unit
+        if low > high:
+            low, high = high, low
+    elif _UPPER_BOUND_RE.search(text):
+        low, high = None, low
+    elif _LOWER_BOUND_RE.search(text):
+        high = None
+    else:
+        high = low
+
+    multiplier = YEARLY_MULTIPLIERS[period]
+
+    def yearly(amount):
+        if amount is None:
+            return None
+        return min(int(round(amount * multiplier)), MAX_AMOUNT)
+
+    return Salary(yearly(low), yearly(high), currency, period)
+
@@ -0,0 +1,79 @@
+import re
+
+# Full-text search configuration used for jobs.search_vector (migration 6)
+SEARCH_CONFIG = "english"
+
+# "quoted phrase", -excluded, OR, or a bare word
+_TOKEN_RE = re.compile(r'(-?)"([^"]*)"|(\S+)')
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _lexemes(text):
+    # Only word characters reach to_tsquery, so its operators and quoting
+    # never need escaping
+    return [word.lower() for word in _WORD_RE.findall(text)]
+
+
+def parse_search_query(text):
+    """Turn search box input into a to_tsquery() expression, or None if empty.
+
+    Words are ANDed together; "quoted phrases" must appear in order, a
+    leading - excludes a word or phrase, and OR between two terms accepts
+    either. OR binds tighter than the implicit AND, as in web search: "a OR
+    b c" wants a or b, and c. The last word also matches as a prefix, so
+    results keep up with a half-typed word ("engin" finds "engineer").
+
+        parse_search_query('python "data science" -intern')
+        -> "python & (data <-> science) & !intern"
+        parse_search_query('django OR flask remote')
+        -> "(django | flask) & remote:*"
+    """
+    if not text or not text.strip():
+        return None
+
+    groups = []       # ANDed together; the terms within a group are ORed
+    after_or = False
+    tokens = list(_TOKEN_RE.finditer(text))
+    for index, token in enumerate(tokens):
+        negate, phrase, bare = token.groups()
+        if bare is not None and bare.upper() == "OR" and groups:
+            after_or = True
+            continue
+        if bare is not None:
+            negate = "-" if bare.startswith("-") else ""
+            words = _lexemes(bare)
+            if words and index == len(tokens) - 1 and not negate and len(words) == 1:
+                words[-1] += ":*"
+        else:
+            words = _lexemes(phrase)
+        if not words:
+            continue
+        term = " <-> ".join(words)
+        if len(words) > 1:
+            term = f"({term})"
+        if negate:
+            term = f"!{term}"
+        if after_or:
+            groups[-1].append(term)
+        else:
+            groups.append([term])
+        after_or = False
+
+    if not groups:
+        return None
+    return " & ".join(group[0] if len(group) == 1 else "(" + " | ".join(group) + ")"
+                      for group in groups)
+
+
+def substring_filter(column, value, typo_tolerant=False):
+    """SQL condition (with its params) matching value anywhere in column.
+
+    Both forms are served by a pg_trgm GIN index on the column (migration 8).
+    With typo_tolerant, a value that closely resembles a word sequence in
+    the column also matches ("Banglore" finds "Bangalore, India"); that
+    needs the pg_trgm extension, so callers check has_extension() first.
+    """
+    pattern = f"%{value}%"
+    if typo_tolerant:
+        return f"({column} ILIKE %s OR %s <%% {column})", [pattern, value]
+    return f"{column} ILIKE %s", [pattern]
@@ -1,5 +1,5 @@
 import streamlit as st
-from app.database.connection import get_connection
+from app.database.connection import get_connection, release_connection
 import psycopg2 # Import psycopg2 for specific error handling if needed
 
 @st.cache_data(ttl=300) # Cache for 5 minutes
@@ -28,4 +28,4 @@ def get_platform_setting(key: str, default_value: any = None) -> any:
         if cursor:
             cursor.close()
         if conn:
-            conn.close()
\ No newline at end of file
+            release_connection(conn)
\ No newline at end of file
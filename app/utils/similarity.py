@@ -0,0 +1,400 @@
+"""TF-IDF similarity between job seeker bios and job descriptions.
+
+Jobs (title, description, requirements) and job seekers (bio, skills) share
+one vocabulary and document frequencies. Raw term counts are kept as SciPy
+CSR matrices, so documents can be added or replaced without refitting; the
+TF-IDF weights (sublinear tf, smoothed idf, L2-normalized rows) are derived
+from the counts when first needed after a change.
+
+The model lives in one compressed .npz file (SIMILARITY_MODEL_PATH) built
+offline and refreshed incrementally from rows updated since the last run:
+
+    python -m app.utils.similarity build      # from scratch
+    python -m app.utils.similarity refresh    # new and changed rows only
+
+The recommendation worker also folds changed rows into the file every
+SIMILARITY_REFRESH_INTERVAL seconds (refresh_saved_model()). Processes load
+the file lazily with get_similarity_model() and pick up a rewritten file
+within SIMILARITY_RELOAD_INTERVAL seconds. Until a model has been built,
+get_similarity_model() logs that once and returns None, and callers rank
+without text similarity.
+"""
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import scipy.sparse as sparse
+
+SIMILARITY_MODEL_PATH = os.environ.get("SIMILARITY_MODEL_PATH", "data/tfidf.npz")
+SIMILARITY_RELOAD_INTERVAL = int(os.environ.get("SIMILARITY_RELOAD_INTERVAL", 60))
+# How often the recommendation worker refreshes the model file; 0 turns it off
+SIMILARITY_REFRESH_INTERVAL = int(os.environ.get("SIMILARITY_REFRESH_INTERVAL", 300))
+
+KINDS = ("job", "seeker")
+
+# updated_at is the writing transaction's start time, so a refresh re-reads
+# this far behind its watermark to catch transactions that committed late
+_REFRESH_OVERLAP = timedelta(minutes=5)
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+_STOP_WORDS = frozenset("""
+    a about above after all also am an and any are as at be been being below both but by
+    can could did do does doing down during each few for from further had has have having
+    he her here hers him his how i if in into is it its itself just me more most my no nor
+    not now of off on once only or other our ours out over own same she should so some such
+    than that the their theirs them then there these they this those through to too under
+    until up very was we were what when where which while who whom why will with would you
+    your yours
+""".split())
+
+
+def tokenize(text):
+    """Lower-cased terms of the text, minus stop words and single characters
+    (tech terms such as c++, c# and node.js are kept whole)"""
+    return [token for token in _TOKEN_RE.findall((text or "").lower())
+            if len(token) > 1 and token not in _STOP_WORDS]
+
+
+def job_text(title, description, requirements):
+    return " ".join([title or "", description or "", " ".join(requirements or [])])
+
+
+def seeker_text(bio, skills):
+    return " ".join([bio or "", " ".join(skills or [])])
+
+
+class _Corpus:
+    """Count matrix and row bookkeeping for one kind of document"""
+
+    def __init__(self, counts, ids):
+        self.counts = counts                      # csr (rows x terms), int32
+        self.ids = ids                            # row -> document id, -1 once removed
+        self.row_of = {int(doc_id): row for row, doc_id in enumerate(ids) if doc_id >= 0}
+
+
+class TfidfModel:
+    def __init__(self):
+        self.terms = []
+        self.vocabulary = {}
+        self.corpora = {kind: _Corpus(sparse.csr_matrix((0, 0), dtype=np.int32),
+                                      np.zeros(0, dtype=np.int64)) for kind in KINDS}
+        # Latest updated_at seen per kind, where `refresh` resumes
+        self.watermarks = {kind: None for kind in KINDS}
+        self._weights = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return sum(len(corpus.row_of) for corpus in self.corpora.values())
+
+    # -- Building -----------------------------------------------------------
+
+    def add(self, kind, documents):
+        """Add or replace (id, text) documents of one kind"""
+        with self._lock:
+            corpus = self.corpora[kind]
+            rows, cols, values, ids = [], [], [], []
+            for doc_id, text in documents:
+                term_counts = {}
+                for token in tokenize(text):
+                    column = self.vocabulary.get(token)
+                    if column is None:
+                        column = self.vocabulary[token] = len(self.terms)
+                        self.terms.append(token)
+                    term_counts[column] = term_counts.get(column, 0) + 1
+                self._remove_row(corpus, doc_id)
+                row = len(ids)
+                rows.extend([row] * len(term_counts))
+                cols.extend(term_counts)
+                values.extend(term_counts.values())
+                ids.append(doc_id)
+            if not ids:
+                return
+
+            width = len(self.terms)
+            added = sparse.csr_matrix((np.array(values, dtype=np.int32), (rows, cols)),
+                                      shape=(len(ids), width))
+            for other in self.corpora.values():
+                other.counts.resize((other.counts.shape[0], width))
+            start = corpus.counts.shape[0]
+            corpus.counts = sparse.vstack([corpus.counts, added], format="csr")
+            corpus.ids = np.concatenate([corpus.ids, np.array(ids, dtype=np.int64)])
+            for offset, doc_id in enumerate(ids):
+                corpus.row_of[int(doc_id)] = start + offset
+            self._weights = None
+
+    def remove(self, kind, doc_ids):
+        with self._lock:
+            corpus = self.corpora[kind]
+            for doc_id in doc_ids:
+                self._remove_row(corpus, doc_id)
+            self._weights = None
+
+    @staticmethod
+    def _remove_row(corpus, doc_id):
+        row = corpus.row_of.pop(int(doc_id), None)
+        if row is not None:
+            start, end = corpus.counts.indptr[row], corpus.counts.indptr[row + 1]
+            corpus.counts.data[start:end] = 0
+            corpus.ids[row] = -1
+
+    def compact(self):
+        """Drop removed rows (done before saving)"""
+        with self._lock:
+            for kind, corpus in self.corpora.items():
+                keep = corpus.ids >= 0
+                counts = corpus.counts[keep]
+                counts.eliminate_zeros()
+                self.corpora[kind] = _Corpus(counts, corpus.ids[keep])
+            self._weights = None
+
+    # -- Scoring ------------------------------------------------------------
+
+    def _weighted(self):
+        weights = self._weights
+        if weights is not None:
+            return weights
+        with self._lock:
+            if self._weights is None:
+                matrices = [self.corpora[kind].counts for kind in KINDS]
+                documents = sum(len(self.corpora[kind].row_of) for kind in KINDS)
+                frequency = np.zeros(len(self.terms), dtype=np.float64)
+                for counts in matrices:
+                    frequency += np.bincount(counts.indices[counts.data > 0],
+                                             minlength=len(self.terms))
+                idf = (np.log((1 + documents) / (1 + frequency)) + 1).astype(np.float32)
+
+                weights = {}
+                for kind, counts in zip(KINDS, matrices):
+                    tf = counts.astype(np.float32)
+                    present = tf.data > 0             # removed rows hold zeros
+                    tf.data[present] = 1 + np.log(tf.data[present])
+                    weighted = tf.multiply(idf).tocsr()
+                    norms = np.sqrt(np.asarray(weighted.multiply(weighted).sum(axis=1)).ravel())
+                    weighted = sparse.diags(1 / np.maximum(norms, 1e-12)).dot(weighted).tocsr()
+                    weights[kind] = weighted
+                self._weights = weights
+            return self._weights
+
+    def similarities(self, query_kind, query_id, target_kind, target_ids):
+        """Cosine similarity of one document to each of target_ids, as a float
+        array aligned with target_ids (0 for documents not in the model)"""
+        weights = self._weighted()
+        scores = np.zeros(len(target_ids), dtype=np.float32)
+        query_row = self.corpora[query_kind].row_of.get(int(query_id))
+        if query_row is None:
+            return scores
+        row_of = self.corpora[target_kind].row_of
+        positions = [i for i, doc_id in enumerate(target_ids) if int(doc_id) in row_of]
+        if positions:
+            rows = [row_of[int(target_ids[i])] for i in positions]
+            query = weights[query_kind][query_row]
+            scores[positions] = np.asarray(
+                weights[target_kind][rows].dot(query.T).todense()
+            ).ravel()
+        return scores
+
+    def top_k(self, query_kind, query_id, target_kind, k=50, among=None):
+        """The k most similar target documents as [(id, score)], best first.
+
+        among optionally restricts the search to those target ids.
+        """
+        if among is not None:
+            among = list(among)
+            scores = self.similarities(query_kind, query_id, target_kind, among)
+            ids = np.asarray(among, dtype=np.int64)
+        else:
+            weights = self._weighted()
+            query_row = self.corpora[query_kind].row_of.get(int(query_id))
+            if query_row is None:
+                return []
+            scores = np.asarray(
+                weights[target_kind].dot(weights[query_kind][query_row].T).todense()
+            ).ravel()
+            ids = self.corpora[target_kind].ids
+            scores[ids < 0] = 0
+        if not len(scores):
+            return []
+        k = min(k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(int(ids[i]), float(scores[i])) for i in best if scores[i] > 0]
+
+    # -- Storage ------------------------------------------------------------
+
+    def save(self, path):
+        """Write the model to one compressed .npz file, atomically"""
+        self.compact()
+        arrays = {"terms": np.frombuffer("\n".join(self.terms).encode("utf-8"), dtype=np.uint8)}
+        for kind, corpus in self.corpora.items():
+            arrays[f"{kind}_data"] = corpus.counts.data.astype(np.int32)
+            arrays[f"{kind}_indices"] = corpus.counts.indices.astype(np.int32)
+            arrays[f"{kind}_indptr"] = corpus.counts.indptr.astype(np.int64)
+            arrays[f"{kind}_ids"] = corpus.ids
+            watermark = self.watermarks[kind]
+            arrays[f"{kind}_watermark"] = np.array(watermark.isoformat() if watermark else "")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{path}.tmp.npz"
+        np.savez_compressed(temporary, **arrays)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        model = cls()
+        with np.load(path) as arrays:
+            raw_terms = arrays["terms"].tobytes().decode("utf-8")
+            model.terms = raw_terms.split("\n") if raw_terms else []
+            model.vocabulary = {term: column for column, term in enumerate(model.terms)}
+            for kind in KINDS:
+                ids = arrays[f"{kind}_ids"]
+                counts = sparse.csr_matrix(
+                    (arrays[f"{kind}_data"], arrays[f"{kind}_indices"], arrays[f"{kind}_indptr"]),
+                    shape=(len(ids), len(model.terms))
+                )
+                model.corpora[kind] = _Corpus(counts, ids)
+                watermark = str(arrays[f"{kind}_watermark"])
+                model.watermarks[kind] = datetime.fromisoformat(watermark) if watermark else None
+        return model
+
+
+# -- Loading from the database ---------------------------------------------
+
+_SOURCES = {
+    "job": """
+        SELECT id, title, description, requirements, active, updated_at
+        FROM jobs
+        WHERE updated_at >= %s
+        ORDER BY updated_at, id
+    """,
+    "seeker": """
+        SELECT id, bio, skills, profile_complete, updated_at
+        FROM job_seekers
+        WHERE updated_at >= %s
+        ORDER BY updated_at, id
+    """,
+}
+
+
+def refresh_model(cursor, model):
+    """Bring the model up to date with jobs and job seekers changed since its
+    watermarks (everything, for a new model). Returns the rows processed."""
+    processed = 0
+    for kind in KINDS:
+        watermark = model.watermarks[kind]
+        cursor.execute(_SOURCES[kind], (watermark - _REFRESH_OVERLAP if watermark else datetime.min,))
+        rows = cursor.fetchall()
+        if not rows:
+            continue
+        if kind == "job":
+            keep = [(row[0], job_text(row[1], row[2], row[3])) for row in rows if row[4]]
+            drop = [row[0] for row in rows if not row[4]]
+        else:
+            keep = [(row[0], seeker_text(row[1], row[2])) for row in rows if row[3]]
+            drop = [row[0] for row in rows if not row[3]]
+        model.remove(kind, drop)
+        model.add(kind, keep)
+        model.watermarks[kind] = rows[-1][-1]
+        processed += len(rows)
+    return processed
+
+
+_model = None
+_model_mtime = None
+_checked_at = 0
+_model_lock = threading.Lock()
+_reported = set()   # reasons already logged for running without the model
+
+
+def _report_unavailable(reason, message):
+    if reason not in _reported:
+        _reported.add(reason)
+        print(message)
+
+
+def get_similarity_model():
+    """The TF-IDF model from SIMILARITY_MODEL_PATH, or None if it has not been built"""
+    global _model, _model_mtime, _checked_at
+    now = time.monotonic()
+    if now - _checked_at < SIMILARITY_RELOAD_INTERVAL:
+        return _model
+    with _model_lock:
+        if now - _checked_at < SIMILARITY_RELOAD_INTERVAL:
+            return _model
+        _checked_at = now
+        try:
+            mtime = os.path.getmtime(SIMILARITY_MODEL_PATH)
+        except OSError:
+            if _model is None:
+                _report_unavailable("file", f"Text similarity disabled: no model at {SIMILARITY_MODEL_PATH} "
+                                            "(build it with python -m app.utils.similarity build)")
+            return _model
+        if mtime != _model_mtime:
+            try:
+                _model = TfidfModel.load(SIMILARITY_MODEL_PATH)
+                _model_mtime = mtime
+                print(f"Loaded similarity model: {len(_model)} documents, {len(_model.terms)} terms")
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Error loading similarity model: {e}")
+    return _model
+
+
+def refresh_saved_model(cursor):
+    """Fold rows changed since the saved model's watermarks into the model file
+    and use the result in this process. Returns the rows processed.
+
+    The refresh works on a fresh copy of the file, so readers of the current
+    model are never handed one that is half updated. A model that has not
+    been built yet is left to `python -m app.utils.similarity build`.
+    """
+    global _model, _model_mtime
+    if not os.path.exists(SIMILARITY_MODEL_PATH):
+        return 0
+    model = TfidfModel.load(SIMILARITY_MODEL_PATH)
+    processed = refresh_model(cursor, model)
+    if processed:
+        model.save(SIMILARITY_MODEL_PATH)
+        with _model_lock:
+            _model = model
+            _model_mtime = os.path.getmtime(SIMILARITY_MODEL_PATH)
+    return processed
+
+
+if __name__ == "__main__":
+    import sys
+
+    import psycopg2
+
+    from app.database.connection import checkout_connection, release_connection
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "refresh"
+    if command not in ("build", "refresh"):
+        raise SystemExit("usage: python -m app.utils.similarity [build|refresh]")
+
+    if command == "refresh" and os.path.exists(SIMILARITY_MODEL_PATH):
+        model = TfidfModel.load(SIMILARITY_MODEL_PATH)
+    else:
+        model = TfidfModel()
+
+    conn = checkout_connection()
+    if conn is None:
+        raise SystemExit("Could not connect to the database")
+    try:
+        cursor = conn.cursor()
+        try:
+            started = time.monotonic()
+            processed = refresh_model(cursor, model)
+            conn.rollback()
+        except psycopg2.Error as e:
+            raise SystemExit(f"Similarity model {command} failed: {e}")
+        finally:
+            cursor.close()
+    finally:
+        release_connection(conn)
+
+    model.save(SIMILARITY_MODEL_PATH)
+    print(f"{command}: {processed} rows in {time.monotonic() - started:.1f}s; "
+          f"{len(model)} documents, {len(model.terms)} terms -> {SIMILARITY_MODEL_PATH}")
@@ -0,0 +1,22 @@
+def normalize_skill(skill):
+    """Canonical form of one skill: trimmed and lower-cased"""
+    return skill.strip().lower()
+
+
+def normalize_skills(skills):
+    """Distinct canonical skills, in first-seen order, from a list or comma-separated string.
+
+    Mirrors the normalize_skills() SQL function behind
+    job_seekers.skills_normalized (migration 11), so filter values compare
+    equal to the stored ones.
+    """
+    if not skills:
+        return []
+    if isinstance(skills, str):
+        skills = skills.split(",")
+    normalized = []
+    for skill in skills:
+        skill = normalize_skill(skill or "")
+        if skill and skill not in normalized:
+            normalized.append(skill)
+    return normalized
@@ -0,0 +1,134 @@
+"""Build, storage and query costs of the TF-IDF similarity model.
+
+Generates synthetic job descriptions and seeker bios (no database needed),
+then measures a full build, the weighting pass, the on-disk size, a reload,
+top-k queries over every job, scoring one feed batch, and an incremental
+add of new jobs.
+
+    python benchmarks/bench_similarity.py --jobs 60000 --seekers 40000
+
+Requires NumPy and SciPy.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.utils.similarity import SIMILARITY_AVAILABLE, TfidfModel, job_text, seeker_text  # noqa: E402
+
+SKILLS = ["python", "java", "javascript", "react", "node.js", "sql", "postgresql", "aws",
+          "docker", "kubernetes", "c++", "c#", "go", "rust", "django", "flask", "spark",
+          "excel", "tableau", "figma", "sales", "marketing", "seo", "accounting", "tally",
+          "recruitment", "nursing", "teaching", "logistics", "autocad"]
+ROLES = ["engineer", "developer", "analyst", "manager", "designer", "consultant",
+         "executive", "associate", "specialist", "lead", "intern", "architect"]
+
+def make_vocabulary(rng, size):
+    """Pseudo-words with Zipf-like frequencies, standing in for free text"""
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = ["".join(rng.choice(letters) for _ in range(rng.randint(3, 10))) for _ in range(size)]
+    cumulative, total = [], 0.0
+    for rank in range(1, size + 1):
+        total += 1 / rank
+        cumulative.append(total)
+    return words, cumulative
+
+
+def _words(rng, vocabulary, count):
+    words, cumulative = vocabulary
+    return " ".join(rng.choices(words, cum_weights=cumulative, k=count))
+
+
+def synthetic_jobs(rng, vocabulary, count, first_id=1):
+    for job_id in range(first_id, first_id + count):
+        skills = rng.sample(SKILLS, rng.randint(2, 6))
+        title = f"{rng.choice(skills).title()} {rng.choice(ROLES)}"
+        description = f"We need a {title} with {rng.randint(0, 10)} years. {_words(rng, vocabulary, 60)}"
+        yield job_id, job_text(title, description, skills)
+
+
+def synthetic_seekers(rng, vocabulary, count):
+    for seeker_id in range(1, count + 1):
+        skills = rng.sample(SKILLS, rng.randint(2, 8))
+        bio = f"{rng.choice(ROLES).title()} who loves {' and '.join(skills[:2])}. {_words(rng, vocabulary, 30)}"
+        yield seeker_id, seeker_text(bio, skills)
+
+
+def timed(label, results, function, *args):
+    started = time.perf_counter()
+    value = function(*args)
+    results.append((label, (time.perf_counter() - started) * 1000))
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--jobs", type=int, default=60_000)
+    parser.add_argument("--seekers", type=int, default=40_000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=50, help="feed batch size to score")
+    parser.add_argument("--added", type=int, default=1_000,
+                        help="jobs added incrementally after the build")
+    parser.add_argument("--vocabulary", type=int, default=50_000,
+                        help="distinct filler words in the synthetic text")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="also write the report to this file")
+    args = parser.parse_args()
+
+    if not SIMILARITY_AVAILABLE:
+        print("Error: NumPy and SciPy are required (pip install numpy scipy).")
+        return 1
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(rng, args.vocabulary)
+    jobs = list(synthetic_jobs(rng, vocabulary, args.jobs))
+    seekers = list(synthetic_seekers(rng, vocabulary, args.seekers))
+    results = []
+
+    model = TfidfModel()
+    timed("build: add jobs", results, model.add, "job", jobs)
+    timed("build: add seekers", results, model.add, "seeker", seekers)
+    timed("weights (first query after a change)", results, model._weighted)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "tfidf.npz")
+        timed("save", results, model.save, path)
+        size = os.path.getsize(path)
+        model = timed("load", results, TfidfModel.load, path)
+    timed("weights after load", results, model._weighted)
+
+    top_k = []
+    for _ in range(args.queries):
+        seeker_id = rng.randint(1, args.seekers)
+        started = time.perf_counter()
+        model.top_k("seeker", seeker_id, "job", k=50)
+        top_k.append((time.perf_counter() - started) * 1000)
+    results.append(("top-50 jobs for a seeker (median)", statistics.median(top_k)))
+
+    batch = [rng.randint(1, args.jobs) for _ in range(args.batch)]
+    timed(f"score a {args.batch}-job feed batch", results,
+          model.similarities, "seeker", 1, "job", batch)
+
+    added = list(synthetic_jobs(rng, vocabulary, args.added, first_id=args.jobs + 1))
+    timed(f"incremental add of {args.added} jobs", results, model.add, "job", added)
+    timed("weights after incremental add", results, model._weighted)
+
+    lines = [f"{len(model)} documents, {len(model.terms)} terms, "
+             f"{size / 1024 / 1024:.1f} MiB on disk",
+             f"{'step':48} {'ms':>10}"]
+    lines += [f"{label:48} {ms:10.1f}" for label, ms in results]
+    report = "\n".join(lines)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
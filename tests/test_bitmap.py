@@ -0,0 +1,76 @@
+import pytest
+
+from app.utils.bitmap import ARRAY_MAX, RoaringBitmap
+
+
+def _container(bitmap, high=0):
+    return bitmap._containers[high]
+
+
+def test_add_contains_and_iterate_in_order():
+    bitmap = RoaringBitmap([70000, 3, 2**32 - 1, 3, 65536])
+    assert len(bitmap) == 4
+    assert list(bitmap) == [3, 65536, 70000, 2**32 - 1]
+    assert 70000 in bitmap
+    assert 4 not in bitmap
+    assert 2**20 not in bitmap
+
+
+def test_discard_removes_values_and_empty_containers():
+    bitmap = RoaringBitmap([1, 2, 65537])
+    bitmap.discard(65537)
+    bitmap.discard(99)
+    assert list(bitmap) == [1, 2]
+    assert 1 not in bitmap._containers
+
+
+def test_round_trip_sparse():
+    bitmap = RoaringBitmap([0, 5, 65535, 65536, 10**9])
+    restored = RoaringBitmap.from_bytes(bitmap.to_bytes())
+    assert list(restored) == list(bitmap)
+
+
+def test_round_trip_empty():
+    restored = RoaringBitmap.from_bytes(RoaringBitmap().to_bytes())
+    assert len(restored) == 0
+    assert list(restored) == []
+
+
+def test_array_becomes_bitmap_past_array_max():
+    bitmap = RoaringBitmap(range(ARRAY_MAX))
+    assert not isinstance(_container(bitmap), bytearray)
+    bitmap.add(ARRAY_MAX)
+    assert isinstance(_container(bitmap), bytearray)
+    assert len(bitmap) == ARRAY_MAX + 1
+    assert list(bitmap) == list(range(ARRAY_MAX + 1))
+
+
+def test_bitmap_becomes_array_again_when_thinned():
+    bitmap = RoaringBitmap(range(ARRAY_MAX + 1))
+    bitmap.discard(0)
+    assert not isinstance(_container(bitmap), bytearray)
+    assert list(bitmap) == list(range(1, ARRAY_MAX + 1))
+    assert 0 not in bitmap
+
+
+def test_round_trip_bitmap_container():
+    values = list(range(0, 3 * ARRAY_MAX, 2)) + [2**31]
+    bitmap = RoaringBitmap(values)
+    assert isinstance(_container(bitmap), bytearray)
+    restored = RoaringBitmap.from_bytes(bitmap.to_bytes())
+    assert list(restored) == values
+    assert isinstance(_container(restored), bytearray)
+    restored.add(1)
+    assert 1 in restored
+
+
+def test_from_bytes_rejects_malformed_data():
+    data = RoaringBitmap(range(10)).to_bytes()
+    with pytest.raises(ValueError):
+        RoaringBitmap.from_bytes(b"XX" + data[2:])
+    with pytest.raises(ValueError):
+        RoaringBitmap.from_bytes(data[:-1])
+    with pytest.raises(ValueError):
+        RoaringBitmap.from_bytes(data + b"\0")
+    with pytest.raises(ValueError):
+        RoaringBitmap.from_bytes(data[:8])
@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+from app.database import unit_of_work
+from app.database.instrumentation import current_scope, query_scope
+from app.database.unit_of_work import current_unit_of_work, reads_from_primary, session_scope
+from app.utils.feed_buffer import FeedBuffer
+
+
+def _items(start, count):
+    return [SimpleNamespace(id=i) for i in range(start, start + count)]
+
+
+def _buffer(fetch, **kwargs):
+    return FeedBuffer("key", fetch, lambda item: item.id, batch_size=3, low_water=1, **kwargs)
+
+
+def test_pages_through_batches_and_drops_overlap():
+    batches = {None: _items(0, 3), 2: _items(2, 3), 4: _items(5, 1)}
+    feed = _buffer(lambda after: batches[after])
+    seen = []
+    while feed.current() is not None:
+        seen.append(feed.current().id)
+        feed.advance()
+    assert seen == [0, 1, 2, 3, 4, 5]
+    assert feed.delivered == 6
+
+
+def test_refill_keeps_session_and_query_scope_but_not_the_unit(monkeypatch):
+    observed = []
+
+    def fetch(after):
+        observed.append((after, reads_from_primary(), current_scope(), current_unit_of_work()))
+        return _items(0, 3) if after is None else []
+
+    feed = _buffer(fetch)
+    page_unit = object()
+    with session_scope(read_from_primary=True), query_scope("feed") as scope:
+        token = unit_of_work._current_unit.set(page_unit)
+        try:
+            feed.current()
+            feed.advance()
+            feed.advance()
+            feed._pending.result()
+        finally:
+            unit_of_work._current_unit.reset(token)
+
+    assert observed[0] == (None, True, scope, page_unit)
+    assert observed[1] == (2, True, scope, None)
+
+
+def test_rank_reorders_without_moving_the_cursor():
+    calls = []
+
+    def fetch(after):
+        calls.append(after)
+        return _items(0, 3) if after is None else []
+
+    feed = _buffer(fetch, rank=lambda batch: list(reversed(batch)))
+    assert feed.current().id == 2
+    feed.advance()
+    feed.advance()
+    feed._pending.result()
+    assert calls == [None, 2]
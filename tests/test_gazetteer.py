@@ -0,0 +1,80 @@
+import pytest
+
+from app.utils.gazetteer import (Gazetteer, Place, distance_km, format_radius,
+                                 normalize_place_name)
+
+
+@pytest.fixture(scope="module")
+def gazetteer():
+    return Gazetteer.load()
+
+
+def _ids(places):
+    return [place.id for place in places]
+
+
+@pytest.mark.parametrize("text, place_id", [
+    ("Bengaluru", "bengaluru"),
+    ("Bangalore", "bengaluru"),
+    ("BLR", "bengaluru"),
+    ("bombay", "mumbai"),
+    ("Gurgaon", "gurugram"),
+    ("Koramangala, Bangalore, Karnataka", "bengaluru"),
+    ("  New   Delhi. ", "delhi"),
+])
+def test_aliases(gazetteer, text, place_id):
+    assert gazetteer.resolve(text).id == place_id
+
+
+def test_every_named_place_in_order(gazetteer):
+    assert _ids(gazetteer.resolve_all("Mumbai or Pune")) == ["mumbai", "pune"]
+    assert _ids(gazetteer.resolve_all("Pune / Poona / Hyderabad")) == ["pune", "hyderabad"]
+
+
+@pytest.mark.parametrize("text", ["Del Mar, CA", "Salt Lake City, UT", "Springfield", "", None])
+def test_short_aliases_do_not_match_inside_names(gazetteer, text):
+    assert gazetteer.resolve_all(text) == []
+
+
+def test_radius_includes_nearby_places(gazetteer):
+    delhi = gazetteer.places["delhi"]
+    assert gazetteer.within(delhi, 5) == ["delhi"]
+    nearby = gazetteer.within(delhi, 40)
+    assert {"delhi", "noida", "gurugram"} <= set(nearby)
+    assert "mumbai" not in nearby
+
+
+def test_radius_matches_brute_force(gazetteer):
+    for place in gazetteer.places.values():
+        if place.latitude is None:
+            continue
+        expected = {other.id for other in gazetteer.places.values()
+                    if other.latitude is not None and distance_km(place, other) <= 100}
+        assert set(gazetteer.within(place, 100)) == expected
+
+
+def test_radius_across_the_antimeridian():
+    gazetteer = Gazetteer([
+        (Place("east", "East", None, 0.0, 179.9), []),
+        (Place("west", "West", None, 0.0, -179.9), []),
+        (Place("far", "Far", None, 0.0, 170.0), []),
+    ])
+    assert set(gazetteer.within(gazetteer.places["east"], 50)) == {"east", "west"}
+
+
+def test_place_without_coordinates_is_only_itself():
+    gazetteer = Gazetteer([(Place("x", "X", None, None, None), ["ex"])])
+    assert gazetteer.resolve("ex").id == "x"
+    assert gazetteer.within(gazetteer.places["x"], 100) == ["x"]
+
+
+def test_distance():
+    london = Place("london", "London", "GB", 51.5072, -0.1276)
+    paris = Place("paris", "Paris", "FR", 48.8566, 2.3522)
+    assert distance_km(london, paris) == pytest.approx(344, abs=2)
+
+
+def test_helpers():
+    assert normalize_place_name("São Paulo, SP!") == "são paulo sp"
+    assert format_radius(None) == "Exact location"
+    assert format_radius(25) == "Within 25 km"
@@ -0,0 +1,63 @@
+from datetime import datetime
+
+from app.database.job_index import WORD_SIMILARITY_THRESHOLD, JobIndex, _ValueIndex, _word_similarity
+
+VALUES = ["san francisco, ca", "new york", "newark", "york", "remote", "",
+          "bangalore, india", "bengaluru", "acme corp", "acme", "san jose"]
+
+
+def _brute_force(needle, typo_tolerant):
+    return {i for i, value in enumerate(VALUES)
+            if needle in value or (typo_tolerant and
+                                   _word_similarity(needle, value) >= WORD_SIMILARITY_THRESHOLD)}
+
+
+def _value_index():
+    index = _ValueIndex()
+    for i, value in enumerate(VALUES):
+        index.add(value, i)
+    return index
+
+
+def test_matches_the_linear_scan():
+    index = _value_index()
+    for needle in ["york", "new", "n", "an", "san", "san f", "francisco", "acme co", "zzz",
+                   "bangalor", "bengaluru", "new yrok", "sanjose", "remote", ","]:
+        for typo_tolerant in (False, True):
+            assert index.match(needle, typo_tolerant) == _brute_force(needle, typo_tolerant), \
+                (needle, typo_tolerant)
+
+
+def test_typo_tolerant_finds_misspellings():
+    index = _value_index()
+    assert index.match("franciso", False) == set()
+    assert 0 in index.match("franciso", True)
+
+
+def test_discard_drops_emptied_values_and_grams():
+    index = _ValueIndex()
+    index.add("york", 1)
+    index.add("york", 2)
+    index.add("new york", 3)
+    index.discard("york", 1)
+    assert index.match("york", False) == {2, 3}
+    index.discard("york", 2)
+    index.discard("new york", 3)
+    assert index.ids == {} and index._grams == {} and index._word_trigrams == {}
+
+
+def _row(job_id, location, company, active=True):
+    return (job_id, "Python developer", "", [], location, "full-time",
+            datetime(2024, 1, job_id), company, None, None, active, None, None)
+
+
+def test_job_index_filters_by_location_and_company():
+    index = JobIndex()
+    index.replace_all([_row(1, "New York", "Acme"), _row(2, "Newark", "Globex"),
+                       _row(3, "York", "Acme", active=False)])
+    assert index.match(location="york") == {1}
+    assert index.match(company="acme", location="new") == {1}
+    index.apply([2], [_row(2, "Newark", "Acme Labs")])
+    assert index.match(company="acme") == {1, 2}
+    index.apply([1], [])
+    assert index.match(location="new") == {2}
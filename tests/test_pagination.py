@@ -0,0 +1,37 @@
+import base64
+from datetime import datetime, timezone
+
+import pytest
+
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+def test_round_trip():
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    cursor = encode_cursor(created_at, 42)
+    assert decode_cursor(cursor) == (created_at, 42)
+
+
+def test_round_trip_keeps_time_zones_and_mixed_values():
+    values = (1, 0.75, "text", None, datetime(2024, 1, 1, tzinfo=timezone.utc))
+    assert decode_cursor(encode_cursor(*values)) == values
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor("???>>>", datetime(2024, 1, 1))
+    assert all(c.isalnum() or c in "-_=" for c in cursor)
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not base64!",
+    base64.urlsafe_b64encode(b"{not json").decode(),
+    base64.urlsafe_b64encode(b'{"a": 1}').decode(),
+    base64.urlsafe_b64encode(b'[{"ts": "yesterday"}]').decode(),
+    base64.urlsafe_b64encode(b'[{"no_ts": 1}]').decode(),
+    "é",
+    None,
+])
+def test_malformed_cursors_raise_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
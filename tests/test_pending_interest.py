@@ -0,0 +1,92 @@
+"""pending_interest_count kept by record_swipe() and the matches delete
+trigger against the recount in backfill_pending_interest.
+
+Needs a scratch PostgreSQL database: set TEST_DATABASE_URL to run it. The
+migrations are applied to it, and each test rolls back what it wrote.
+"""
+import os
+import random
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+
+from app.database.backfills import backfill_pending_interest
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+
+@pytest.fixture(scope="module")
+def migrated():
+    from app.database.migrations import run_migrations
+    conn = psycopg2.connect(TEST_DATABASE_URL)
+    try:
+        run_migrations(conn)
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def cursor(migrated):
+    conn = psycopg2.connect(TEST_DATABASE_URL)
+    cursor = conn.cursor()
+    try:
+        yield cursor
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def _insert(cursor, query, *params):
+    cursor.execute(query + " RETURNING id", params)
+    return cursor.fetchone()[0]
+
+
+def _user(cursor, name, user_type):
+    return _insert(cursor, "INSERT INTO users (username, email, password_hash, user_type) "
+                           "VALUES (%s, %s, 'x', %s)", name, f"{name}@example.com", user_type)
+
+
+def _swipe(cursor, user_id, target_id, target_type, direction, job_id=None):
+    cursor.execute("SELECT outcome FROM record_swipe(%s, %s, %s, %s, %s, 1)",
+                   (user_id, target_id, target_type, direction, job_id))
+    return cursor.fetchone()[0]
+
+
+def test_incremental_counts_match_the_recount(cursor):
+    # Settle drift from whatever else is in the database, inside this transaction
+    backfill_pending_interest(cursor)
+
+    givers, jobs = [], []
+    for g in range(2):
+        user_id = _user(cursor, f"pi_giver_{g}", "job_giver")
+        giver_id = _insert(cursor, "INSERT INTO job_givers (user_id, company_name, credits) "
+                                   "VALUES (%s, 'Acme', 1000)", user_id)
+        givers.append(user_id)
+        for _ in range(2):
+            jobs.append((_insert(cursor, "INSERT INTO jobs (job_giver_id, title, description) "
+                                         "VALUES (%s, 'Job', 'Work')", giver_id), user_id))
+    seekers = []
+    for s in range(5):
+        user_id = _user(cursor, f"pi_seeker_{s}", "job_seeker")
+        seekers.append((user_id, _insert(cursor, "INSERT INTO job_seekers (user_id, profile_complete) "
+                                                 "VALUES (%s, TRUE)", user_id)))
+
+    rng = random.Random(22)
+    for step in range(150):
+        job_id, giver_user_id = rng.choice(jobs)
+        seeker_user_id, seeker_id = rng.choice(seekers)
+        action = rng.random()
+        if action < 0.45:
+            _swipe(cursor, seeker_user_id, job_id, "job", rng.choice(["right", "right", "left"]))
+        elif action < 0.8:
+            _swipe(cursor, giver_user_id, seeker_id, "job_seeker", "right", job_id)
+        else:
+            cursor.execute("DELETE FROM matches WHERE job_id = %s AND job_seeker_id = %s",
+                           (job_id, seeker_id))
+        assert backfill_pending_interest(cursor) == 0, f"counts drifted at step {step}"
+
+    cursor.execute("SELECT sum(pending_interest_count) FROM jobs WHERE id = ANY(%s)",
+                   ([job_id for job_id, _ in jobs],))
+    assert cursor.fetchone()[0] > 0
@@ -0,0 +1,164 @@
+import threading
+
+import psycopg2
+import pytest
+from psycopg2 import extensions
+
+from app.database import pool as pool_module
+from app.database.pool import ConnectionPool, PoolTimeout
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, params=None):
+        if self.conn.broken:
+            raise psycopg2.OperationalError("server closed the connection")
+        self.conn.queries.append(query)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.autocommit = False
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+        self.queries = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class FakePool(ConnectionPool):
+    def __init__(self, *args, **kwargs):
+        self.opened = []
+        super().__init__("dbname=test", *args, **kwargs)
+
+    def _connect(self):
+        conn = FakeConnection()
+        self.opened.append(conn)
+        return conn
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(pool_module.time, "monotonic", fake.monotonic)
+    return fake
+
+
+def test_reuses_returned_connections(clock):
+    pool = FakePool(min_size=1, max_size=2)
+    first = pool.getconn()
+    pool.putconn(first)
+    assert pool.getconn() is first
+    assert len(pool.opened) == 1
+
+
+def test_putconn_rolls_back_open_transactions(clock):
+    pool = FakePool(min_size=0)
+    conn = pool.getconn()
+    conn.status = extensions.TRANSACTION_STATUS_INTRANS
+    conn.autocommit = True
+    pool.putconn(conn)
+    assert conn.rollbacks == 1
+    assert conn.autocommit is False
+    assert pool.stats()["idle"] == 1
+
+
+def test_putconn_discards_unknown_and_requested(clock):
+    pool = FakePool(min_size=0)
+    lost = pool.getconn()
+    lost.status = extensions.TRANSACTION_STATUS_UNKNOWN
+    pool.putconn(lost)
+    dropped = pool.getconn()
+    pool.putconn(dropped, discard=True)
+    assert lost.closed and dropped.closed
+    assert pool.size == 0
+
+
+def test_connections_past_max_lifetime_are_retired(clock):
+    pool = FakePool(min_size=0, max_lifetime=60)
+    conn = pool.getconn()
+    clock.now += 61
+    pool.putconn(conn)
+    assert conn.closed
+    assert pool.getconn() is not conn
+
+
+def test_idle_connections_are_reaped_down_to_min_size(clock):
+    pool = FakePool(min_size=1, max_size=3, max_idle=30, max_lifetime=0)
+    conns = [pool.getconn() for _ in range(3)]
+    for conn in conns:
+        pool.putconn(conn)
+    clock.now += 31
+    pool.getconn()
+    assert sum(1 for conn in conns if conn.closed) == 2
+    assert pool.size == 1
+
+
+def test_health_check_drops_broken_connections(clock):
+    pool = FakePool(min_size=0, check_after=10, max_idle=0)
+    conn = pool.getconn()
+    pool.putconn(conn)
+    conn.broken = True
+    clock.now += 11
+    replacement = pool.getconn()
+    assert replacement is not conn
+    assert conn.closed
+
+
+def test_recently_used_connections_skip_the_health_check(clock):
+    pool = FakePool(min_size=0, check_after=10)
+    conn = pool.getconn()
+    pool.putconn(conn)
+    assert pool.getconn() is conn
+    assert conn.queries == []
+
+
+def test_checkout_times_out_when_exhausted():
+    pool = FakePool(min_size=0, max_size=1, timeout=0.05)
+    pool.getconn()
+    with pytest.raises(PoolTimeout):
+        pool.getconn()
+
+
+def test_waiting_checkout_gets_the_returned_connection():
+    pool = FakePool(min_size=0, max_size=1, timeout=5)
+    conn = pool.getconn()
+    timer = threading.Timer(0.05, pool.putconn, args=(conn,))
+    timer.start()
+    assert pool.getconn() is conn
+    timer.join()
+
+
+def test_closed_pool_refuses_checkouts():
+    pool = FakePool(min_size=1)
+    idle = pool.opened[0]
+    pool.closeall()
+    assert idle.closed
+    with pytest.raises(psycopg2.InterfaceError):
+        pool.getconn()
@@ -0,0 +1,106 @@
+import psycopg2
+import pytest
+
+from app.database import prepared
+from app.database.prepared import _parse, execute_prepared
+
+
+class FakeConnection:
+    def __init__(self, autocommit=False):
+        self.autocommit = autocommit
+
+
+class FakeCursor:
+    def __init__(self, connection=None, fail_on=None):
+        self.connection = connection or FakeConnection()
+        self.executed = []
+        self.fail_on = fail_on or {}
+
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+        for prefix, error in self.fail_on.items():
+            if query.startswith(prefix):
+                raise error
+
+
+def _error(pgcode):
+    return type("FakeError", (psycopg2.Error,), {"pgcode": pgcode})()
+
+
+@pytest.fixture(autouse=True)
+def enabled(monkeypatch):
+    monkeypatch.setattr(prepared, "_enabled", True)
+
+
+def test_placeholders_become_numbered_parameters():
+    name, text, count = _parse("SELECT * FROM jobs WHERE id = %s AND title ILIKE %s;")
+    assert text == "SELECT * FROM jobs WHERE id = $1 AND title ILIKE $2"
+    assert count == 2
+    assert name.startswith("ps_")
+    assert _parse("SELECT * FROM jobs WHERE id = %s AND title ILIKE %s;")[0] == name
+
+
+def test_escaped_percent_signs_become_literal():
+    assert _parse("SELECT 'a%%b' LIKE %s")[1:] == ("SELECT 'a%b' LIKE $1", 1)
+    assert _parse("SELECT 1")[1:] == ("SELECT 1", 0)
+
+
+def test_named_placeholders_are_not_converted():
+    assert _parse("SELECT %(id)s") is None
+    cursor = FakeCursor()
+    execute_prepared(cursor, "SELECT %(id)s", {"id": 1})
+    assert cursor.executed == [("SELECT %(id)s", {"id": 1})]
+
+
+def test_prepares_once_per_connection_then_executes_by_name():
+    query = "SELECT title FROM jobs WHERE id = %s AND active = %s"
+    name = _parse(query)[0]
+    cursor = FakeCursor()
+    execute_prepared(cursor, query, (1, True))
+    execute_prepared(cursor, query, (2, False))
+    prepare, first, second = cursor.executed
+    assert prepare[0].startswith(f"SAVEPOINT prepare_statement; PREPARE {name} AS SELECT")
+    assert first == (f"EXECUTE {name} (%s, %s)", (1, True))
+    assert second == (f"EXECUTE {name} (%s, %s)", (2, False))
+
+    other = FakeCursor(FakeConnection(autocommit=True))
+    execute_prepared(other, query, (3, True))
+    assert other.executed[0][0] == f"PREPARE {name} AS SELECT title FROM jobs WHERE id = $1 AND active = $2\n"
+
+
+def test_disabled_runs_plain_statements(monkeypatch):
+    monkeypatch.setattr(prepared, "_enabled", False)
+    cursor = FakeCursor()
+    execute_prepared(cursor, "SELECT %s", (1,))
+    assert cursor.executed == [("SELECT %s", (1,))]
+
+
+def test_per_connection_limit(monkeypatch):
+    monkeypatch.setattr(prepared, "MAX_PREPARED_PER_CONNECTION", 1)
+    cursor = FakeCursor()
+    execute_prepared(cursor, "SELECT 1 WHERE %s", (True,))
+    execute_prepared(cursor, "SELECT 2 WHERE %s", (True,))
+    assert cursor.executed[-1] == ("SELECT 2 WHERE %s", (True,))
+
+
+def test_failed_prepare_falls_back_and_keeps_the_transaction():
+    cursor = FakeCursor(fail_on={"SAVEPOINT": _error("42601")})
+    execute_prepared(cursor, "SELECT 3 WHERE %s", (True,))
+    assert cursor.executed[1][0].startswith("ROLLBACK TO SAVEPOINT prepare_statement")
+    assert cursor.executed[2] == ("SELECT 3 WHERE %s", (True,))
+
+
+def test_already_prepared_counts_as_prepared():
+    query = "SELECT 4 WHERE %s"
+    cursor = FakeCursor(fail_on={"SAVEPOINT": _error("42P05")})
+    execute_prepared(cursor, query, (True,))
+    assert cursor.executed[-1] == (f"EXECUTE {_parse(query)[0]} (%s)", (True,))
+
+
+def test_statement_missing_on_server_disables_preparing():
+    query = "SELECT 5 WHERE %s"
+    cursor = FakeCursor(fail_on={"EXECUTE": _error("26000")})
+    with pytest.raises(psycopg2.Error):
+        execute_prepared(cursor, query, (True,))
+    assert not prepared.prepared_statements_enabled()
+    assert prepared.statement_for(_parse(query)[0]) == query
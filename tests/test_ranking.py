@@ -0,0 +1,120 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.utils import ranking
+from app.utils.ranking import (CandidateScoreCache, SkillVocabulary, _location_keys,
+                               education_level, rank_jobs, required_years, score_candidates,
+                               score_jobs, skill_overlap)
+
+
+def job(id=1, requirements=("Python", "SQL"), description="", location="Pune", **fields):
+    return SimpleNamespace(id=id, requirements=list(requirements), description=description,
+                           location=location, **fields)
+
+
+def seeker(skills=("python", "sql"), experience=5, location="Pune", education=None):
+    return SimpleNamespace(skills=list(skills), experience=experience, location=location,
+                           education=education)
+
+
+def test_required_years_and_education_level():
+    assert required_years("3+ years of Python", "at least 5 yrs overall") == 3
+    assert required_years("2-4 years", None) == 2
+    assert required_years("no experience needed") is None
+    assert education_level("B.Tech in CS") == 2
+    assert education_level("MBA preferred, bachelor's required") == 3
+    assert education_level(None, "") == 0
+
+
+@pytest.mark.parametrize("location, expected", [
+    ("Pune, Maharashtra, India", ({"pune"}, False)),
+    ("Bangalore", ({"bengaluru"}, False)),
+    ("Remote", (set(), True)),
+    ("Mumbai (remote ok)", ({"mumbai"}, True)),
+    ("Springfield, IL, USA", ({"springfield"}, False)),
+    ("India", (set(), False)),
+    (None, (set(), False)),
+])
+def test_location_keys(location, expected):
+    assert _location_keys(location) == expected
+
+
+def test_skill_vocabulary_and_overlap():
+    vocabulary = SkillVocabulary()
+    assert vocabulary.encode(["python", "sql", "python"]) == [0, 1, 0]
+    assert len(vocabulary) == 2
+    overlap, lengths = skill_overlap([[0, 1], [], [2]], [0])
+    assert list(overlap) == [1, 0, 0]
+    assert list(lengths) == [2, 0, 1]
+
+
+def test_no_vocabulary_is_kept_between_calls():
+    assert not hasattr(ranking, "vocabulary")
+
+
+def test_perfect_fit_scores_one():
+    assert score_jobs(seeker(), [job()])[0] == pytest.approx(1.0)
+
+
+def test_each_fit_counts_with_its_weight():
+    scores = score_jobs(seeker(experience=1), [
+        job(requirements=["Python", "Go"]),
+        job(location="Bengaluru"),
+        job(requirements=[], description="Needs 2 years"),
+    ])
+    assert scores[0] == pytest.approx(ranking.SKILL_WEIGHT * 0.5 + ranking.EXPERIENCE_WEIGHT * 1
+                                      + ranking.LOCATION_WEIGHT)
+    assert scores[1] == pytest.approx(1 - ranking.LOCATION_WEIGHT)
+    # No requirements is neutral; 1 of 2 wanted years is half the experience fit
+    assert scores[2] == pytest.approx(ranking.SKILL_WEIGHT * 0.5 + ranking.EXPERIENCE_WEIGHT * 0.5
+                                      + ranking.LOCATION_WEIGHT)
+
+
+def test_remote_jobs_fit_any_location():
+    assert score_jobs(seeker(location="Chennai"), [job(location="Remote")])[0] == pytest.approx(1.0)
+
+
+def test_text_similarity_and_search_rank_are_blended_in():
+    base = score_jobs(seeker(), [job()], text_similarity=[0.0])[0]
+    assert base == pytest.approx(1 - ranking.TEXT_WEIGHT)
+    ranked = job(search_rank=0.0), job(search_rank=0.4)
+    scores = score_jobs(seeker(), list(ranked))
+    assert scores[0] == pytest.approx(1 - ranking.SEARCH_RANK_WEIGHT)
+    assert scores[1] == pytest.approx(1.0)
+
+
+def test_rank_jobs_orders_best_first_and_keeps_ties_in_order():
+    jobs = [job(id=1, location="Delhi"), job(id=2), job(id=3), job(id=4, requirements=["Rust"])]
+    ranked = rank_jobs(seeker(), jobs)
+    assert [j.id for j in ranked] == [2, 3, 1, 4]
+    assert ranked[0].relevance == pytest.approx(1.0)
+
+
+def test_score_candidates_uses_education():
+    posting = job(description="Bachelor's degree and 4 years required")
+    scores = score_candidates(posting, [
+        seeker(education="B.Tech", experience=4),
+        seeker(education="Diploma", experience=4),
+        seeker(education="M.Tech", experience=2),
+    ])
+    assert scores[0] == pytest.approx(1.0)
+    assert scores[1] == pytest.approx(1 - ranking.CANDIDATE_EDUCATION_WEIGHT * 0.5)
+    assert scores[2] == pytest.approx(1 - ranking.CANDIDATE_EXPERIENCE_WEIGHT * 0.5)
+    assert score_candidates(posting, []).shape == (0,)
+
+
+def test_candidate_score_cache():
+    cache = CandidateScoreCache(max_jobs=2)
+    first = job(id=1)
+    cache.scores_for(first)[10] = ("v1", 0.5)
+    assert cache.scores_for(first) == {10: ("v1", 0.5)}
+    # A change to a scoring field drops the job's scores
+    first.description = "changed"
+    assert cache.scores_for(first) == {}
+    cache.scores_for(first)[10] = ("v1", 0.5)
+    cache.scores_for(job(id=2))
+    cache.scores_for(job(id=3))
+    assert cache.scores_for(first) == {}
+    assert isinstance(score_jobs(seeker(), []), np.ndarray)
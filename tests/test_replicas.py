@@ -0,0 +1,114 @@
+import threading
+
+import psycopg2
+import pytest
+
+from app.database import connection
+from app.database.connection import _Replica, checkout_replica_connection
+from app.database.unit_of_work import keep_reads_on_primary, reads_from_primary, session_scope
+
+
+class FakePool:
+    def __init__(self, name, fail=False):
+        self.name = name
+        self.fail = fail
+        self.returned = []
+
+    def getconn(self):
+        if self.fail:
+            raise psycopg2.OperationalError("could not connect")
+        return object()
+
+    def putconn(self, conn, discard=False):
+        self.returned.append((conn, discard))
+
+
+@pytest.fixture
+def replicas(monkeypatch):
+    replicas = []
+    monkeypatch.setattr(connection, "get_replicas", lambda: replicas)
+    monkeypatch.setattr(connection, "REPLICA_CHECK_INTERVAL", 10)
+    monkeypatch.setattr(connection, "REPLICA_MAX_LAG", 5)
+    return replicas
+
+
+def test_lagging_replica_is_skipped_until_rechecked(replicas, monkeypatch):
+    lags = iter([30.0, 0.0])
+    monkeypatch.setattr(connection, "_replica_lag", lambda conn: next(lags))
+    clock = [100.0]
+    monkeypatch.setattr(connection.time, "monotonic", lambda: clock[0])
+    replica = _Replica(FakePool("replica-1"))
+    replicas.append(replica)
+
+    assert checkout_replica_connection() is None
+    assert len(replica.pool.returned) == 1
+    clock[0] += 5
+    assert checkout_replica_connection() is None
+    clock[0] += 6
+    assert checkout_replica_connection() is not None
+    assert replica.lag == 0.0
+
+
+def test_unreachable_replica_is_marked_down(replicas, monkeypatch):
+    monkeypatch.setattr(connection, "_replica_lag", lambda conn: 0.0)
+    down, up = _Replica(FakePool("replica-1", fail=True)), _Replica(FakePool("replica-2"))
+    replicas.extend([down, up])
+    for _ in range(4):
+        assert checkout_replica_connection() is not None
+    assert down.down_until > 0
+    assert up.lag == 0.0
+
+
+def test_one_thread_measures_lag_at_a_time(replicas, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_lag(conn):
+        calls.append(conn)
+        started.set()
+        release.wait(5)
+        return 0.0
+
+    monkeypatch.setattr(connection, "_replica_lag", slow_lag)
+    replicas.append(_Replica(FakePool("replica-1")))
+    checker = threading.Thread(target=checkout_replica_connection)
+    checker.start()
+    started.wait(5)
+    # Meanwhile other threads use the last known lag instead of checking too
+    others = [checkout_replica_connection() for _ in range(3)]
+    release.set()
+    checker.join()
+    assert len(calls) == 1
+    assert all(conn is not None for conn in others)
+
+
+def test_write_keeps_the_rest_of_the_scope_on_the_primary():
+    with session_scope(read_from_primary=False, on_write=keep_reads_on_primary):
+        assert not reads_from_primary()
+        keep_reads_on_primary()
+        assert reads_from_primary()
+    assert not reads_from_primary()
+
+
+class FakeConnection:
+    closed = 0
+
+    def get_transaction_status(self):
+        return psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+def test_pin_from_a_unit_of_works_commit_reaches_later_reads(monkeypatch):
+    from app.database.unit_of_work import unit_of_work
+    monkeypatch.setattr(connection, "checkout_connection", FakeConnection)
+    monkeypatch.setattr(connection, "release_connection", lambda conn: None)
+    with session_scope(on_write=keep_reads_on_primary):
+        with unit_of_work() as unit:
+            unit.connection()
+            unit.wrote = True
+        assert reads_from_primary()
@@ -0,0 +1,61 @@
+import pytest
+
+from app.utils.salary import MAX_AMOUNT, Salary, parse_salary
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("$50,000 - $70,000", Salary(50000, 70000, "USD", "year")),
+    ("50-70k", Salary(50000, 70000, None, "year")),
+    ("€40k to €55k", Salary(40000, 55000, "EUR", "year")),
+    ("70k - 50k GBP", Salary(50000, 70000, "GBP", "year")),
+])
+def test_ranges(text, expected):
+    assert parse_salary(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("₹8-12 LPA", Salary(800000, 1200000, "INR", "year")),
+    ("10 LPA", Salary(1000000, 1000000, "INR", "year")),
+    ("5-8 lakhs", Salary(500000, 800000, "INR", "year")),
+    ("1.2 crore", Salary(12000000, 12000000, "INR", "year")),
+    ("Rs. 6 lakh per annum", Salary(600000, 600000, "INR", "year")),
+])
+def test_lakh_and_crore_amounts_are_rupees(text, expected):
+    assert parse_salary(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("25k/month", Salary(300000, 300000, None, "month")),
+    ("₹40,000 per month", Salary(480000, 480000, "INR", "month")),
+    ("$20/hour", Salary(41600, 41600, "USD", "hour")),
+    ("500 weekly", Salary(26000, 26000, None, "week")),
+])
+def test_periods_are_converted_to_yearly(text, expected):
+    assert parse_salary(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("up to 70k", Salary(None, 70000, None, "year")),
+    ("50k+", Salary(50000, None, None, "year")),
+    ("from $90,000", Salary(90000, None, "USD", "year")),
+])
+def test_open_ended_ranges(text, expected):
+    assert parse_salary(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("3-5 years exp, 10 LPA", Salary(1000000, 1000000, "INR", "year")),
+    ("2 yrs+, 6-9 LPA", Salary(600000, 900000, "INR", "year")),
+    ("5+ years experience, $120k", Salary(120000, 120000, "USD", "year")),
+])
+def test_experience_ranges_are_not_salary(text, expected):
+    assert parse_salary(text) == expected
+
+
+@pytest.mark.parametrize("text", [None, "", "Competitive", "3-5 years"])
+def test_no_amount(text):
+    assert parse_salary(text) is None
+
+
+def test_amounts_are_capped_to_the_column_range():
+    assert parse_salary("$5,000,000/hour").max_amount == MAX_AMOUNT
@@ -0,0 +1,48 @@
+import pytest
+
+from app.utils.search import parse_search_query, substring_filter
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("python developer", "python & developer:*"),
+    ("engin", "engin:*"),
+    ('"data science"', "(data <-> science)"),
+    ('python "data science" -intern', "python & (data <-> science) & !intern"),
+    ('-"night shift" nurse', "!(night <-> shift) & nurse:*"),
+    ("nurse -night", "nurse & !night"),
+    ("django OR flask", "(django | flask:*)"),
+    ("django or flask", "(django | flask:*)"),
+])
+def test_operators(text, expected):
+    assert parse_search_query(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    # OR binds tighter than the implicit AND
+    ("a OR b c", "(a | b) & c:*"),
+    ("a b OR c", "a & (b | c:*)"),
+    ("a OR b OR c d", "(a | b | c) & d:*"),
+    ("x OR -y z", "(x | !y) & z:*"),
+])
+def test_or_precedence(text, expected):
+    assert parse_search_query(text) == expected
+
+
+@pytest.mark.parametrize("text", [None, "", "   ", "-", '""', "!!! &&"])
+def test_empty(text):
+    assert parse_search_query(text) is None
+
+
+def test_tsquery_operators_in_input_are_dropped():
+    assert parse_search_query("c++ & (rust | go)") == "c & rust & go:*"
+
+
+def test_a_leading_or_is_a_word():
+    assert parse_search_query("OR python") == "or & python:*"
+
+
+def test_substring_filter():
+    assert substring_filter("j.location", "Pune") == ("j.location ILIKE %s", ["%Pune%"])
+    condition, params = substring_filter("j.location", "Pune", typo_tolerant=True)
+    assert condition == "(j.location ILIKE %s OR %s <%% j.location)"
+    assert params == ["%Pune%", "Pune"]
@@ -0,0 +1,112 @@
+from datetime import datetime
+
+import pytest
+
+from app.utils import similarity
+from app.utils.similarity import (TfidfModel, job_text, refresh_model, refresh_saved_model,
+                                  seeker_text, tokenize)
+
+
+@pytest.fixture
+def model():
+    model = TfidfModel()
+    model.add("job", [
+        (1, job_text("Python developer", "Build Django APIs", ["python", "django"])),
+        (2, job_text("Java engineer", "Spring Boot services", ["java", "spring"])),
+        (3, job_text("Data analyst", "SQL dashboards and Python notebooks", ["sql"])),
+    ])
+    model.add("seeker", [
+        (10, seeker_text("I write Django and Python", ["python"])),
+        (11, seeker_text("Spring and Java for ten years", ["java"])),
+    ])
+    return model
+
+
+def test_tokenize_keeps_tech_terms():
+    assert tokenize("I know C++, C# and Node.js; a b") == ["know", "c++", "c#", "node.js"]
+    assert tokenize(None) == []
+
+
+def test_top_k_orders_by_similarity(model):
+    top = model.top_k("seeker", 10, "job", k=3)
+    assert [doc_id for doc_id, _ in top] == [1, 3]
+    assert top[0][1] > top[1][1] > 0
+    assert model.top_k("seeker", 11, "job", k=1)[0][0] == 2
+    assert model.top_k("seeker", 99, "job") == []
+
+
+def test_top_k_among_candidates(model):
+    assert [doc_id for doc_id, _ in model.top_k("seeker", 10, "job", among=[2, 3, 42])] == [3]
+
+
+def test_similarities_are_cosines(model):
+    scores = model.similarities("seeker", 10, "job", [1, 2, 42])
+    assert 0 < scores[0] <= 1
+    assert scores[1] == 0 and scores[2] == 0
+    assert model.similarities("job", 1, "job", [1])[0] == pytest.approx(1.0)
+
+
+def test_replace_and_remove(model):
+    model.add("job", [(2, job_text("Django developer", "Python", []))])
+    assert len(model) == 5
+    assert {doc_id for doc_id, _ in model.top_k("seeker", 10, "job")} == {1, 2, 3}
+    model.remove("job", [1, 2])
+    assert len(model) == 3
+    assert [doc_id for doc_id, _ in model.top_k("seeker", 10, "job")] == [3]
+
+
+def test_save_and_load(model, tmp_path):
+    model.remove("job", [2])
+    model.watermarks["job"] = datetime(2024, 3, 1, 9, 30)
+    path = str(tmp_path / "models" / "tfidf.npz")
+    model.save(path)
+    loaded = TfidfModel.load(path)
+    assert len(loaded) == len(model) == 4
+    assert loaded.terms == model.terms
+    assert loaded.watermarks == {"job": datetime(2024, 3, 1, 9, 30), "seeker": None}
+    assert loaded.top_k("seeker", 10, "job") == pytest.approx(model.top_k("seeker", 10, "job"))
+    loaded.add("job", [(4, "python django")])
+    assert loaded.top_k("seeker", 10, "job")[0][0] in (1, 4)
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.kind = None
+
+    def execute(self, query, params):
+        self.kind = "job" if "FROM jobs" in query else "seeker"
+
+    def fetchall(self):
+        return self.rows[self.kind]
+
+
+def test_refresh_adds_active_and_drops_inactive(model):
+    when = datetime(2024, 5, 1)
+    cursor = FakeCursor({
+        "job": [(4, "Rust developer", "Systems work", ["rust"], True, when),
+                (1, "Python developer", "", [], False, when)],
+        "seeker": [(12, "Rust and systems", ["rust"], True, when)],
+    })
+    assert refresh_model(cursor, model) == 3
+    assert model.watermarks == {"job": when, "seeker": when}
+    assert model.top_k("seeker", 12, "job", k=1)[0][0] == 4
+    assert 1 not in {doc_id for doc_id, _ in model.top_k("seeker", 10, "job")}
+
+
+def test_refresh_saved_model_rewrites_the_file_and_swaps_the_model(model, tmp_path, monkeypatch):
+    path = str(tmp_path / "tfidf.npz")
+    monkeypatch.setattr(similarity, "SIMILARITY_MODEL_PATH", path)
+    monkeypatch.setattr(similarity, "_model", model)
+    empty = FakeCursor({"job": [], "seeker": []})
+    assert refresh_saved_model(empty) == 0
+
+    model.save(path)
+    when = datetime(2024, 5, 1)
+    cursor = FakeCursor({"job": [(4, "Rust developer", "Systems work", ["rust"], True, when)],
+                         "seeker": []})
+    assert refresh_saved_model(cursor) == 1
+    assert len(model) == 5
+    assert len(similarity._model) == 6
+    assert len(TfidfModel.load(path)) == 6
+    assert TfidfModel.load(path).watermarks["job"] == when